@@ -4,6 +4,8 @@ from datetime import datetime
 from enum import Enum
 from pybit.unified_trading import HTTP
 from results_manager import ResultsManager
+from historico_velas import atualizar_velas
+from data_loader import velas_para_dataframe
 
 # ===== CONFIGURAÇÕES =====
 cripto = 'XRPUSDT'
@@ -33,29 +35,13 @@ def buscar_dados_historicos():
     cliente = HTTP()
     start_timestamp = int(pd.to_datetime(data_inicio).timestamp()) * 1000
     end_timestamp = int(pd.to_datetime(data_fim).timestamp()) * 1000
-    velas = []
-    tentativas = 0  
-
-    while start_timestamp < end_timestamp:
-        resposta = cliente.get_kline(symbol=cripto, interval=tempo_grafico, limit=1000, start=start_timestamp)
-        dados = resposta['result']['list']
-        if not dados:
-            print("Sem dados retornados. Encerrando busca.")
-            break
-        velas += dados[::-1]
-        start_timestamp = int(dados[-1][0]) + 1000
-        tentativas += 1
-        print(f"Lote {tentativas}: {len(velas)} velas carregadas...")
-        if tentativas > 100:
-            print("Limite de tentativas atingido. Parando busca para evitar loop infinito.")
-            break
-    ...
+    velas = atualizar_velas(cliente, cripto, tempo_grafico, start_timestamp, end_timestamp - 1)
+    if not len(velas):
+        print("Sem dados retornados.")
 
     colunas = ['open_time', 'open', 'high', 'low', 'close', 'volume', 'turnover']
-    df = pd.DataFrame(velas, columns=colunas)
-    df['open_time'] = pd.to_datetime(df['open_time'].astype(np.int64), unit='ms')
-    for col in ['open', 'high', 'low', 'close', 'volume']:
-        df[col] = df[col].astype(float)
+    df = velas_para_dataframe(velas)
+    df.columns = colunas
     print(f"Total de velas carregadas: {len(df)}")
     return df
 
@@ -0,0 +1,230 @@
+import sys
+import time
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from results_manager import ResultsManager
+from backtesting import (saldo, risco_retorno, qntd_velas_stop, taxa_corretora, setup, alavancagem,
+                         executar_backtest, carregar_velas_backtest)
+
+# Mesma estratégia do loop de backtesting.py, calculada com arrays do NumPy.
+# Os sinais de entrada e os níveis de stop/alvo saem de uma vez para todas as velas;
+# só as saídas dependem do trade anterior, então o laço em Python é por trade, não por vela.
+
+
+def contar_candles_consecutivos_vetorizado(fechamento, ema):
+    """
+    Mesmo resultado de backtesting.contar_candles_consecutivos para todos os índices.
+
+    O loop original anda para trás a partir de i-1, zerando o contador oposto a cada
+    troca de lado e parando na vela que fechou em cima da EMA. Por isso o que sobra é
+    o tamanho da sequência mais antiga depois dessa vela (cortada em i-1), e não o da
+    mais recente. Isso é reproduzido aqui para gerar os mesmos trades.
+    """
+    n = len(fechamento)
+    lado = np.sign(fechamento - ema)
+    indices = np.arange(n)
+
+    # Primeira vela que o loop alcança: a seguinte à última vela em cima da EMA antes de i
+    ultima_igual = np.maximum.accumulate(np.where(lado == 0, indices, -1))
+    primeira = np.zeros(n, dtype=np.int64)
+    primeira[1:] = ultima_igual[:-1] + 1
+
+    # Última vela da sequência (mesmo lado) que contém cada vela
+    trocas = np.flatnonzero(lado[1:] != lado[:-1])
+    fim_da_sequencia = np.r_[trocas, n - 1][np.searchsorted(trocas, indices)]
+
+    anterior = indices - 1
+    valida = primeira <= anterior
+    primeira_segura = np.minimum(primeira, n - 1)
+    tamanho = np.where(valida, np.minimum(fim_da_sequencia[primeira_segura], anterior) - primeira + 1, 0)
+    lado_da_primeira = np.where(valida, lado[primeira_segura], 0)
+
+    count_acima = np.where(lado_da_primeira > 0, tamanho, 0)
+    count_abaixo = np.where(lado_da_primeira < 0, tamanho, 0)
+    return count_acima, count_abaixo
+
+
+def calcular_sinais(df, qntd_velas_stop=qntd_velas_stop, risco_retorno=risco_retorno):
+    fechamento = df['close'].to_numpy(dtype=np.float64)
+    maxima = df['high'].to_numpy(dtype=np.float64)
+    minima = df['low'].to_numpy(dtype=np.float64)
+    volume = df['volume'].to_numpy(dtype=np.float64)
+    ema_9 = df['EMA_9'].to_numpy(dtype=np.float64)
+    ema_21 = df['EMA_21'].to_numpy(dtype=np.float64)
+    ema_200 = df['EMA_200'].to_numpy(dtype=np.float64)
+    rsi = df['RSI'].to_numpy(dtype=np.float64)
+    volume_ema = df['Volume_EMA_20'].to_numpy(dtype=np.float64)
+
+    count_acima, count_abaixo = contar_candles_consecutivos_vetorizado(fechamento, ema_9)
+
+    # Valores da vela anterior, alinhados com a vela atual
+    fechamento_anterior = np.r_[np.nan, fechamento[:-1]]
+    maxima_anterior = np.r_[np.nan, maxima[:-1]]
+    minima_anterior = np.r_[np.nan, minima[:-1]]
+    ema_9_anterior = np.r_[np.nan, ema_9[:-1]]
+    ema_21_anterior = np.r_[np.nan, ema_21[:-1]]
+    ema_200_anterior = np.r_[np.nan, ema_200[:-1]]
+
+    volume_alto = volume > volume_ema
+    compra = ((count_acima >= 9) &
+              (fechamento_anterior > ema_9_anterior) &
+              (fechamento_anterior > ema_21_anterior) &
+              (fechamento_anterior > ema_200_anterior) &
+              (rsi < 70) & volume_alto & (maxima > maxima_anterior))
+    venda = (~compra & (count_abaixo >= 9) &
+             (fechamento_anterior < ema_9_anterior) &
+             (fechamento_anterior < ema_21_anterior) &
+             (fechamento_anterior < ema_200_anterior) &
+             (rsi > 30) & volume_alto & (minima < minima_anterior))
+
+    # Mínima/máxima das `qntd_velas_stop` velas antes da vela atual
+    stop_compra = np.full(len(df), np.nan)
+    stop_venda = np.full(len(df), np.nan)
+    if len(df) > qntd_velas_stop:
+        stop_compra[qntd_velas_stop:] = sliding_window_view(minima, qntd_velas_stop).min(axis=1)[:-1]
+        stop_venda[qntd_velas_stop:] = sliding_window_view(maxima, qntd_velas_stop).max(axis=1)[:-1]
+
+    entrada = np.where(compra, maxima_anterior, minima_anterior)
+    stop = np.where(compra, stop_compra, stop_venda)
+    alvo = entrada + (entrada - stop) * risco_retorno
+
+    return {
+        'compra': compra,
+        'venda': venda,
+        'entrada': entrada,
+        'stop': stop,
+        'alvo': alvo,
+        'maxima': maxima,
+        'minima': minima,
+    }
+
+
+def _primeira_saida(maxima, minima, inicio, preco_alvo, preco_stop, comprado, bloco=256):
+    # Procura em blocos crescentes, para não varrer o resto do histórico a cada trade
+    n = len(maxima)
+    while inicio < n:
+        fim = min(inicio + bloco, n)
+        if comprado:
+            bateu_alvo = maxima[inicio:fim] >= preco_alvo
+            bateu_stop = minima[inicio:fim] <= preco_stop
+        else:
+            bateu_alvo = minima[inicio:fim] <= preco_alvo
+            bateu_stop = maxima[inicio:fim] >= preco_stop
+        saiu = bateu_alvo | bateu_stop
+        if saiu.any():
+            indice = int(np.argmax(saiu))
+            # Alvo tem prioridade quando os dois são tocados na mesma vela, como no loop
+            return inicio + indice, bool(bateu_alvo[indice])
+        inicio = fim
+        bloco *= 2
+    return None, None
+
+
+def executar_backtest_vetorizado(df, resultados=None, saldo=saldo, alavancagem=alavancagem,
+                                 taxa_corretora=taxa_corretora, qntd_velas_stop=qntd_velas_stop,
+                                 risco_retorno=risco_retorno):
+    """
+    Retorna os trades fechados no mesmo formato de backtesting.executar_backtest:
+    (indice_entrada, indice_saida, tipo, entrada, stop, alvo, percentual, saldo).
+    Se `resultados` (ResultsManager) for passado, recebe as mesmas chamadas do loop.
+    """
+    sinais = calcular_sinais(df, qntd_velas_stop, risco_retorno)
+    maxima, minima = sinais['maxima'], sinais['minima']
+    inicio = max(200, qntd_velas_stop) + 1
+    candidatas = np.flatnonzero(sinais['compra'] | sinais['venda'])
+    candidatas = candidatas[candidatas >= inicio]
+
+    trades = []
+    saidas_no_alvo = []
+    entradas_sem_saida = []
+    proxima = inicio
+    while True:
+        posicao = np.searchsorted(candidatas, proxima)
+        if posicao == len(candidatas):
+            break
+        i = int(candidatas[posicao])
+        comprado = bool(sinais['compra'][i])
+        preco_entrada, preco_stop, preco_alvo = sinais['entrada'][i], sinais['stop'][i], sinais['alvo'][i]
+
+        saida, bateu_alvo = _primeira_saida(maxima, minima, i + 1, preco_alvo, preco_stop, comprado)
+        if saida is None:
+            entradas_sem_saida.append(i)
+            break
+
+        if comprado:
+            variacao = (preco_alvo if bateu_alvo else preco_stop) - preco_entrada
+        else:
+            variacao = preco_entrada - (preco_alvo if bateu_alvo else preco_stop)
+        percentual = (variacao / preco_entrada) * 100 * alavancagem - (taxa_corretora * 2)
+        saldo += saldo * (percentual / 100)
+        trades.append((i, saida, 'compra' if comprado else 'venda',
+                       preco_entrada, preco_stop, preco_alvo, percentual, saldo))
+        saidas_no_alvo.append(bateu_alvo)
+        proxima = saida + 1
+
+    if resultados is not None:
+        preencher_resultados(resultados, df, trades, saidas_no_alvo, entradas_sem_saida, inicio)
+    return trades
+
+
+def preencher_resultados(resultados, df, trades, saidas_no_alvo, entradas_sem_saida, inicio):
+    # Repete as chamadas do loop ao ResultsManager, na mesma ordem, só nas velas com evento
+    tempos = pd.DatetimeIndex(df['open_time'])
+    anos, meses = tempos.year.to_numpy(), tempos.month.to_numpy()
+    if len(df) <= inicio:
+        return
+    chave_mes = anos * 12 + meses
+    primeiras_do_mes = inicio + np.r_[0, np.flatnonzero(np.diff(chave_mes[inicio:])) + 1]
+
+    # (vela, ordem, evento, percentual): a virada do mês vem antes do trade na mesma vela
+    eventos = [(int(i), 0, 'mes', None) for i in primeiras_do_mes]
+    for trade, no_alvo in zip(trades, saidas_no_alvo):
+        eventos.append((trade[0], 1, 'entrada', None))
+        eventos.append((trade[1], 1, 'alvo' if no_alvo else 'stop', trade[6]))
+    eventos += [(i, 1, 'entrada', None) for i in entradas_sem_saida]
+
+    for i, _, evento, percentual in sorted(eventos, key=lambda evento: evento[:2]):
+        ano, mes = int(anos[i]), int(meses[i])
+        resultados.initialize_month(ano, mes)
+        if evento == 'entrada':
+            resultados.update_on_trade_open(ano, mes)
+        elif evento == 'alvo':
+            resultados.update_on_gain(ano, mes, percentual)
+        elif evento == 'stop':
+            resultados.update_on_loss(ano, mes, -percentual)
+
+
+def comparar_backtests(df):
+    """
+    Roda o loop de backtesting.py e a versão vetorizada nas mesmas velas e confere
+    se os trades e os resultados mensais batem.
+    """
+    resultados_loop = ResultsManager(saldo, taxa_corretora, setup)
+    inicio = time.perf_counter()
+    trades_loop = executar_backtest(df, resultados_loop, imprimir=False)
+    tempo_loop = time.perf_counter() - inicio
+
+    resultados_vetorizado = ResultsManager(saldo, taxa_corretora, setup)
+    inicio = time.perf_counter()
+    trades_vetorizado = executar_backtest_vetorizado(df, resultados_vetorizado)
+    tempo_vetorizado = time.perf_counter() - inicio
+
+    iguais = (len(trades_loop) == len(trades_vetorizado) and
+              all(a[:3] == b[:3] and np.allclose(a[3:], b[3:], equal_nan=True)
+                  for a, b in zip(trades_loop, trades_vetorizado)) and
+              resultados_loop.results == resultados_vetorizado.results)
+
+    print(f'{len(df)} velas, {len(trades_loop)} trades no loop, {len(trades_vetorizado)} no vetorizado.', flush=True)
+    print(f'Loop: {tempo_loop:.3f}s | Vetorizado: {tempo_vetorizado:.3f}s '
+          f'({tempo_loop / max(tempo_vetorizado, 1e-9):.0f}x)', flush=True)
+    print('Trades iguais.' if iguais else 'Trades DIFERENTES!', flush=True)
+    return iguais
+
+
+if __name__ == "__main__":
+    # python backtesting_vetorizado.py [quantidade de velas] — o loop é O(n²), então
+    # por padrão compara só as últimas 5000 velas
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    df = carregar_velas_backtest()
+    comparar_backtests(df.iloc[-quantidade:].reset_index(drop=True))
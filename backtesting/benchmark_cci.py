@@ -0,0 +1,37 @@
+import sys
+import time
+import numpy as np
+import pandas as pd
+from indicadores_osciladores import desvio_medio_absoluto, calcula_cci
+
+# Compara o desvio médio absoluto do CCI com rolling().apply(lambda) e com o kernel vetorizado.
+# python benchmark_cci.py [quantidade de velas]
+
+def medir(funcao, repeticoes=3):
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+if __name__ == "__main__":
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    periodo = 20
+    rng = np.random.default_rng(0)
+    fechamento = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, quantidade)))
+    maxima = fechamento * (1 + rng.random(quantidade) * 0.01)
+    minima = fechamento * (1 - rng.random(quantidade) * 0.01)
+    tp = pd.Series((maxima + minima + fechamento) / 3)
+
+    tempo_apply, mad_apply = medir(lambda: tp.rolling(periodo).apply(lambda x: np.mean(np.abs(x - np.mean(x)))), 1)
+    tempo_vetorizado, mad_vetorizado = medir(lambda: desvio_medio_absoluto(tp, periodo))
+    tempo_cci, cci = medir(lambda: calcula_cci(maxima, minima, fechamento, periodo))
+    cci_apply = (tp - tp.rolling(periodo).mean()) / (0.015 * mad_apply)
+
+    print(f'{quantidade} velas, período {periodo}', flush=True)
+    print(f'rolling().apply(lambda): {tempo_apply * 1000:.1f} ms', flush=True)
+    print(f'desvio_medio_absoluto:   {tempo_vetorizado * 1000:.1f} ms ({tempo_apply / tempo_vetorizado:.0f}x)', flush=True)
+    print(f'calcula_cci completo:    {tempo_cci * 1000:.1f} ms', flush=True)
+    print(f'Diferença máxima: MAD {np.nanmax(np.abs(mad_vetorizado - mad_apply)):.2e}, '
+          f'CCI {np.nanmax(np.abs(cci - cci_apply)):.2e}', flush=True)
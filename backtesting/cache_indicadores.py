@@ -0,0 +1,103 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# Cache dos indicadores calculados sobre as velas. Numa volta do bot as mesmas velas passam
+# por busca_velas, calcular_indicadores_quantitativos, FeatureEngineer e MLPredictor; com
+# o cache, o que já foi calculado para aquelas velas não é refeito em nenhum desses lugares.
+#
+# A chave é (cripto, tempo gráfico, impressão digital das velas, indicador, parâmetros).
+# As velas fechadas não mudam, então a impressão digital só olha a primeira vela, a última
+# vela fechada e os valores da última vela (a que ainda está aberta).
+
+
+class CacheIndicadores:
+    """Cache LRU: guarda até `max_itens` resultados e descarta o usado há mais tempo."""
+
+    def __init__(self, max_itens=256):
+        self.max_itens = max_itens
+        self.itens = OrderedDict()
+        self.acertos = 0
+        self.erros = 0
+        self.lock = threading.Lock()
+
+    def obter(self, chave, calcular):
+        with self.lock:
+            if chave in self.itens:
+                self.itens.move_to_end(chave)
+                self.acertos += 1
+                return self.itens[chave]
+            self.erros += 1
+
+        # Calcula fora do lock, para uma thread não esperar o indicador da outra
+        valor = _somente_leitura(calcular())
+        with self.lock:
+            self.itens[chave] = valor
+            self.itens.move_to_end(chave)
+            while len(self.itens) > self.max_itens:
+                self.itens.popitem(last=False)
+        return valor
+
+    def limpar(self):
+        with self.lock:
+            self.itens.clear()
+            self.acertos = self.erros = 0
+
+    def __len__(self):
+        return len(self.itens)
+
+
+def _somente_leitura(valor):
+    # O mesmo resultado é devolvido para todo mundo, então ninguém pode alterá-lo no lugar.
+    # Só arrays do NumPy (soltos ou em dicts/tuplas) são congelados; quem guarda um
+    # DataFrame precisa devolver uma cópia (ver FeatureEngineer.engineer_all_features)
+    if isinstance(valor, np.ndarray):
+        valor.setflags(write=False)
+    elif isinstance(valor, dict):
+        for item in valor.values():
+            _somente_leitura(item)
+    elif isinstance(valor, tuple):
+        for item in valor:
+            _somente_leitura(item)
+    return valor
+
+
+cache_indicadores = CacheIndicadores()
+
+
+def marcar_velas(df, cripto, tempo_grafico):
+    # Guarda de onde vieram as velas; os attrs acompanham as cópias do DataFrame
+    df.attrs['cripto'] = cripto
+    df.attrs['tempo_grafico'] = str(tempo_grafico)
+    return df
+
+
+def impressao_digital(df):
+    """
+    Identifica a série de velas: (cripto, tempo gráfico, quantidade, primeira vela, última
+    vela fechada, hash da última vela). Retorna None se as velas não foram marcadas com
+    marcar_velas, e aí nada é guardado no cache.
+    """
+    cripto, tempo_grafico = df.attrs.get('cripto'), df.attrs.get('tempo_grafico')
+    if cripto is None or tempo_grafico is None or len(df) < 2:
+        return None
+    tempos = df['open_time'] if 'open_time' in df.columns else df['tempo_abertura']
+    # Hash de todas as colunas da última vela: pega a vela aberta mudando de preço e
+    # colunas sobrescritas (ex.: RSI recalculado com outro método)
+    ultima_vela = int(pd.util.hash_pandas_object(df.iloc[-1:], index=False).iloc[0])
+    return (cripto, tempo_grafico, len(df), tempos.iloc[0], tempos.iloc[-2], ultima_vela)
+
+
+def em_cache(df, nome, parametros, calcular, cache=None):
+    """
+    Retorna calcular() para as velas `df`, reaproveitando o resultado se o mesmo
+    indicador com os mesmos parâmetros já foi calculado para essas velas.
+    `parametros` precisa ser hashable (ex.: tupla).
+    """
+    impressao = impressao_digital(df)
+    if impressao is None:
+        return calcular()
+    if cache is None:
+        cache = cache_indicadores
+    return cache.obter((*impressao, nome, parametros), calcular)
@@ -1,17 +1,105 @@
 import os
-import json
-
-def obter_caminho_velas(cripto, tempo_grafico, start, end, pasta='dados_historicos'):
-    os.makedirs(pasta, exist_ok=True)
-    nome_arquivo = f'{cripto}_{tempo_grafico}m_{start}-{end}.json'
-    return os.path.join(pasta, nome_arquivo)
-
-def carregar_velas_json(caminho_arquivo):
-    if os.path.exists(caminho_arquivo):
-        with open(caminho_arquivo, 'r') as f:
-            return json.load(f)
-    return None
-
-def salvar_velas_json(caminho_arquivo, velas):
-    with open(caminho_arquivo, 'w') as f:
-        json.dump(velas, f)
\ No newline at end of file
+import glob
+import numpy as np
+import pandas as pd
+
+# Uma vela por linha: tempo em ms (int64) e OHLCV/turnover em float64.
+# Gravadas em arquivos .npy por mês em dados_historicos/<cripto>/<tempo_grafico>m/<AAAA-MM>.npy
+DTYPE_VELAS = np.dtype([
+    ('tempo_abertura', 'i8'),
+    ('abertura', 'f8'),
+    ('maxima', 'f8'),
+    ('minima', 'f8'),
+    ('fechamento', 'f8'),
+    ('volume', 'f8'),
+    ('turnover', 'f8'),
+])
+
+def obter_pasta_velas(cripto, tempo_grafico, pasta='dados_historicos'):
+    caminho = os.path.join(pasta, cripto, f'{tempo_grafico}m')
+    os.makedirs(caminho, exist_ok=True)
+    return caminho
+
+def velas_para_array(velas):
+    # Converte as listas cruas da Bybit (strings) para o array tipado
+    array = np.empty(len(velas), dtype=DTYPE_VELAS)
+    if len(velas):
+        colunas = np.asarray(velas).T
+        array['tempo_abertura'] = colunas[0].astype(np.int64)
+        for i, nome in enumerate(DTYPE_VELAS.names[1:], start=1):
+            array[nome] = colunas[i].astype(np.float64)
+    return array
+
+def velas_para_dataframe(velas):
+    df = pd.DataFrame(velas)
+    if df.empty:
+        df = pd.DataFrame(columns=DTYPE_VELAS.names)
+    df['tempo_abertura'] = pd.to_datetime(df['tempo_abertura'].astype(np.int64), unit='ms')
+    return df
+
+def _mes_da_vela(tempos):
+    return tempos.astype('datetime64[ms]').astype('datetime64[M]')
+
+def _carregar_particao(caminho_arquivo):
+    return np.load(caminho_arquivo, mmap_mode='r')
+
+def _gravar_particao(caminho_arquivo, velas):
+    # Grava em arquivo temporário e troca, para não deixar partição corrompida
+    caminho_temporario = caminho_arquivo + '.tmp'
+    with open(caminho_temporario, 'wb') as f:
+        np.save(f, velas)
+    os.replace(caminho_temporario, caminho_arquivo)
+
+def salvar_velas(cripto, tempo_grafico, velas, pasta='dados_historicos'):
+    """
+    Acrescenta velas ao armazenamento. Aceita as listas cruas da Bybit ou um array
+    com DTYPE_VELAS; velas já gravadas com o mesmo tempo de abertura são mantidas.
+    Só as partições (meses) que recebem velas novas são regravadas.
+    """
+    if not isinstance(velas, np.ndarray):
+        velas = velas_para_array(velas)
+    if not len(velas):
+        return 0
+
+    pasta_velas = obter_pasta_velas(cripto, tempo_grafico, pasta)
+    meses = _mes_da_vela(velas['tempo_abertura'])
+    novas = 0
+    for mes in np.unique(meses):
+        caminho_arquivo = os.path.join(pasta_velas, f'{mes}.npy')
+        velas_do_mes = velas[meses == mes]
+        if os.path.exists(caminho_arquivo):
+            existentes = np.load(caminho_arquivo)
+            velas_do_mes = velas_do_mes[~np.isin(velas_do_mes['tempo_abertura'], existentes['tempo_abertura'])]
+            if not len(velas_do_mes):
+                continue
+            velas_do_mes = np.concatenate([existentes, velas_do_mes])
+            quantidade_anterior = len(existentes)
+        else:
+            quantidade_anterior = 0
+        _, indices = np.unique(velas_do_mes['tempo_abertura'], return_index=True)
+        velas_do_mes = velas_do_mes[indices]
+        _gravar_particao(caminho_arquivo, velas_do_mes)
+        novas += len(velas_do_mes) - quantidade_anterior
+    return novas
+
+def carregar_velas(cripto, tempo_grafico, inicio_ms=None, fim_ms=None, pasta='dados_historicos'):
+    """
+    Retorna as velas gravadas com tempo de abertura em [inicio_ms, fim_ms], ordenadas,
+    como array com DTYPE_VELAS. Só lê as partições que cruzam o intervalo.
+    """
+    pasta_velas = os.path.join(pasta, cripto, f'{tempo_grafico}m')
+    arquivos = sorted(glob.glob(os.path.join(pasta_velas, '*.npy')))
+    if inicio_ms is not None:
+        primeiro_mes = str(_mes_da_vela(np.int64(inicio_ms)))
+        arquivos = [a for a in arquivos if os.path.basename(a)[:-4] >= primeiro_mes]
+    if fim_ms is not None:
+        ultimo_mes = str(_mes_da_vela(np.int64(fim_ms)))
+        arquivos = [a for a in arquivos if os.path.basename(a)[:-4] <= ultimo_mes]
+    if not arquivos:
+        return np.empty(0, dtype=DTYPE_VELAS)
+
+    velas = np.concatenate([_carregar_particao(a) for a in arquivos])
+    tempos = velas['tempo_abertura']
+    inicio = 0 if inicio_ms is None else np.searchsorted(tempos, inicio_ms, side='left')
+    fim = len(velas) if fim_ms is None else np.searchsorted(tempos, fim_ms, side='right')
+    return velas[inicio:fim]
@@ -0,0 +1,214 @@
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from estado_trade import EstadoDeTrade
+
+# Espelho local da conta: posições, ordens abertas, execuções e saldo mantidos pelos streams
+# privados da Bybit (position, order, execution, wallet), para tem_trade_aberto e
+# saldo_da_conta responderem da memória em vez de uma chamada assinada ao REST a cada volta
+# do loop. De tempos em tempos o REST confere tudo (reconciliação), e se o WebSocket cair as
+# consultas voltam para o REST até ele reconectar.
+
+
+def _preco(valor):
+    # A Bybit manda '' quando não há preço (sem posição, sem stop/alvo)
+    return float(valor) if valor not in ('', None) else 0
+
+
+class EspelhoDaConta:
+    """
+    Uso:
+        espelho = EspelhoDaConta(cliente).iniciar()       # cria o WebSocket privado
+        estado, entrada, stop, alvo = espelho.tem_trade_aberto('BTCUSDT')
+        saldo = espelho.saldo_da_conta()
+
+    `ao_mudar_posicao(simbolo)` é chamado a cada mudança de posição vinda do stream.
+    """
+
+    def __init__(self, cliente, websocket=None, intervalo_reconciliacao=60, moeda='USDT', ao_mudar_posicao=None):
+        self.cliente = cliente
+        self.websocket = websocket
+        self.intervalo_reconciliacao = intervalo_reconciliacao
+        self.moeda = moeda
+        self.ao_mudar_posicao = ao_mudar_posicao
+
+        self.lock = threading.Lock()
+        # simbolo -> {positionIdx: dados da posição}
+        self.posicoes = {}
+        self.ordens = {}
+        self.execucoes = deque(maxlen=1000)
+        # orderLinkId -> perf_counter da primeira mensagem da ordem (latência em ordens.py)
+        self.chegada_ordens = OrderedDict()
+        self.saldo = None
+        self.ultima_reconciliacao = None
+        self.divergencias = 0
+        self.consultas_rest = 0
+        # simbolo -> (seq da posição quando a entrada foi aceita, prazo): entrada enviada que
+        # o position_stream ainda não confirmou. Enquanto isso a posição vem do REST
+        self.pendentes = {}
+        self._parar = threading.Event()
+
+    def iniciar(self):
+        if self.websocket is None:
+            from pybit.unified_trading import WebSocket
+            self.websocket = WebSocket(testnet=False, channel_type='private',
+                                       api_key=os.getenv('BYBIT_API_KEY'), api_secret=os.getenv('BYBIT_API_SECRET'))
+        # Assina antes da foto do REST, para nada que mude no meio ficar de fora
+        self.websocket.position_stream(self._ao_receber_posicao)
+        self.websocket.order_stream(self._ao_receber_ordem)
+        self.websocket.execution_stream(self._ao_receber_execucao)
+        self.websocket.wallet_stream(self._ao_receber_carteira)
+        self.reconciliar()
+        threading.Thread(target=self._reconciliar_periodicamente, daemon=True).start()
+        return self
+
+    def parar(self):
+        self._parar.set()
+
+    def conectado(self):
+        return self.websocket is not None and self.websocket.is_connected()
+
+    # ===== Streams =====
+
+    def _atualizar_posicao(self, dados, reconciliando=False):
+        if dados.get('category', 'linear') != 'linear':
+            return False
+        simbolo, indice = dados['symbol'], int(dados.get('positionIdx', 0))
+        with self.lock:
+            atual = self.posicoes.setdefault(simbolo, {}).get(indice)
+            # A foto do REST não pode voltar uma posição que o stream já atualizou
+            if atual is not None and int(dados.get('seq', 0) or 0) < int(atual.get('seq', 0) or 0):
+                return False
+            if reconciliando and atual is not None and self._resumo(atual) != self._resumo(dados):
+                self.divergencias += 1
+            self.posicoes[simbolo][indice] = dados
+            pendente = self.pendentes.get(simbolo)
+            if pendente is not None and dados.get('side') and int(dados.get('seq', 0) or 0) > pendente[0]:
+                del self.pendentes[simbolo]
+        return True
+
+    def marcar_pendente(self, cripto, prazo=30):
+        """
+        Entrada aceita pela corretora (ver ordens.py): até a posição nova chegar (seq maior
+        que o atual) ou `prazo` segundos passarem, tem_trade_aberto consulta o REST, para não
+        responder a posição fechada anterior logo depois da entrada
+        """
+        with self.lock:
+            por_indice = self.posicoes.get(cripto) or {}
+            seq = max((int(dados.get('seq', 0) or 0) for dados in por_indice.values()), default=0)
+            self.pendentes[cripto] = (seq, time.time() + prazo)
+
+    def _ao_receber_posicao(self, mensagem):
+        for dados in mensagem['data']:
+            if self._atualizar_posicao(dados) and self.ao_mudar_posicao is not None:
+                self.ao_mudar_posicao(dados['symbol'])
+
+    def _ao_receber_ordem(self, mensagem):
+        chegada = time.perf_counter()
+        with self.lock:
+            for ordem in mensagem['data']:
+                if ordem.get('orderLinkId') and ordem['orderLinkId'] not in self.chegada_ordens:
+                    self.chegada_ordens[ordem['orderLinkId']] = chegada
+                    if len(self.chegada_ordens) > 1000:
+                        self.chegada_ordens.popitem(last=False)
+                if ordem['orderStatus'] in ('New', 'PartiallyFilled', 'Untriggered'):
+                    self.ordens[ordem['orderId']] = ordem
+                else:
+                    self.ordens.pop(ordem['orderId'], None)
+
+    def _ao_receber_execucao(self, mensagem):
+        with self.lock:
+            self.execucoes.extend(mensagem['data'])
+
+    def _ao_receber_carteira(self, mensagem):
+        for conta in mensagem['data']:
+            for moeda in conta.get('coin', []):
+                if moeda['coin'] == self.moeda:
+                    with self.lock:
+                        self.saldo = float(moeda['walletBalance'])
+
+    # ===== Reconciliação com o REST =====
+
+    @staticmethod
+    def _resumo(dados):
+        # O que importa para o bot; o stream manda entryPrice e o REST avgPrice
+        return (dados.get('side'), dados.get('size'), _preco(dados.get('avgPrice', dados.get('entryPrice'))),
+                _preco(dados.get('stopLoss')), _preco(dados.get('takeProfit')))
+
+    def reconciliar(self):
+        # Foto completa do REST: posições e ordens em USDT e o saldo
+        self.consultas_rest += 3
+        posicoes = self.cliente.get_positions(category='linear', settleCoin=self.moeda, recv_window=50000)
+        vistas = set()
+        for dados in posicoes['result']['list']:
+            self._atualizar_posicao({'category': 'linear', **dados}, reconciliando=True)
+            vistas.add((dados['symbol'], int(dados.get('positionIdx', 0))))
+
+        # O REST só lista posições abertas: as que sumiram foram fechadas
+        with self.lock:
+            for simbolo, por_indice in self.posicoes.items():
+                for indice, dados in por_indice.items():
+                    if (simbolo, indice) not in vistas and dados.get('side'):
+                        self.divergencias += 1
+                        por_indice[indice] = {**dados, 'side': '', 'size': '0', 'avgPrice': '',
+                                              'stopLoss': '', 'takeProfit': ''}
+
+        ordens = self.cliente.get_open_orders(category='linear', settleCoin=self.moeda)
+        carteira = self.cliente.get_wallet_balance(accountType='UNIFIED', coin=self.moeda)
+        with self.lock:
+            self.ordens = {ordem['orderId']: ordem for ordem in ordens['result']['list']}
+            self.saldo = float(carteira['result']['list'][0]['coin'][0]['walletBalance'])
+            self.ultima_reconciliacao = time.time()
+
+    def _reconciliar_periodicamente(self):
+        while not self._parar.wait(self.intervalo_reconciliacao):
+            try:
+                self.reconciliar()
+            except Exception as e:
+                print(f'Erro ao reconciliar a conta com o REST: {e}', flush=True)
+
+    # ===== Consultas =====
+
+    def _posicao_rest(self, cripto):
+        self.consultas_rest += 1
+        resposta = self.cliente.get_positions(category='linear', symbol=cripto, recv_window=50000)
+        dados = resposta['result']['list'][0]
+        self._atualizar_posicao({'category': 'linear', **dados})
+        return dados
+
+    def _dados_posicao(self, cripto):
+        with self.lock:
+            pendente = self.pendentes.get(cripto)
+            if pendente is not None and time.time() > pendente[1]:
+                del self.pendentes[cripto]
+                pendente = None
+        if pendente is None and self.conectado():
+            with self.lock:
+                por_indice = self.posicoes.get(cripto)
+                if por_indice:
+                    return por_indice[min(por_indice)]
+        # Símbolo sem posição na foto, entrada pendente ou WebSocket fora do ar
+        return self._posicao_rest(cripto)
+
+    def tem_trade_aberto(self, cripto):
+        """Mesmo retorno de funcoes_bybit.tem_trade_aberto: (estado, entrada, stop, alvo)"""
+        dados = self._dados_posicao(cripto)
+        estado = {'Buy': EstadoDeTrade.COMPRADO, 'Sell': EstadoDeTrade.VENDIDO}.get(dados.get('side'),
+                                                                                    EstadoDeTrade.DE_FORA)
+        return (estado, _preco(dados.get('avgPrice', dados.get('entryPrice'))),
+                _preco(dados.get('stopLoss')), _preco(dados.get('takeProfit')))
+
+    def tamanho_da_posicao(self, cripto):
+        return _preco(self._dados_posicao(cripto).get('size'))
+
+    def saldo_da_conta(self):
+        if self.conectado() and self.saldo is not None:
+            return self.saldo
+        self.consultas_rest += 1
+        resposta = self.cliente.get_wallet_balance(accountType='UNIFIED', coin=self.moeda)
+        return float(resposta['result']['list'][0]['coin'][0]['walletBalance'])
+
+    def ordens_abertas(self, cripto=None):
+        with self.lock:
+            return [ordem for ordem in self.ordens.values() if cripto is None or ordem['symbol'] == cripto]
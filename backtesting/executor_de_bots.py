@@ -0,0 +1,322 @@
+import json
+import os
+import queue
+import sys
+import time
+from dotenv import load_dotenv
+from estado_trade import EstadoDeTrade
+from funcoes_bybit import (cliente, tem_trade_aberto, saldo_da_conta, quantidade_minima_para_operar,
+                           abre_compra_com_parcial, abre_venda_com_parcial, stop_breakeven_compra,
+                           stop_breakeven_venda, set_leverage, usar_espelho_da_conta)
+from indicadores_osciladores import calcula_atr
+from utilidades import quantidade_cripto_para_operar
+from velas_ao_vivo import VelasAoVivo
+
+# Vários bots num processo só, no lugar de um processo por live_trading_scalp_*: um
+# WebSocket público para as velas de todos, um privado para as posições e o saldo, o mesmo cliente
+# HTTP de funcoes_bybit (uma sessão com pool de conexões) e um loop que avalia cada bot
+# quando as velas dele mudam. O erro de um bot não derruba os outros.
+#
+# python executor_de_bots.py [configuracoes.json] — lista de dicts com os parâmetros de BotScalp
+
+load_dotenv()
+
+# As mesmas configurações dos live_trading_scalp_*
+CONFIGURACOES = [
+    {'cripto': 'BTCUSDT', 'tempo_grafico': '5', 'risco_retorno': 2.8, 'alavancagem': 20,
+     'periodo_atr': 20, 'variante': 'bollinger'},
+    {'cripto': 'SOLUSDT', 'tempo_grafico': '60', 'risco_retorno': 3.1, 'alavancagem': 2},
+    {'cripto': 'XRPUSDT', 'tempo_grafico': '60', 'risco_retorno': 3.1, 'alavancagem': 2},
+    {'cripto': '1000PEPEUSDT', 'tempo_grafico': '60', 'risco_retorno': 4.1, 'alavancagem': 2},
+]
+
+
+class BotScalp:
+    """
+    A lógica de um live_trading_scalp_* para uma configuração. variante='agressiva' é a
+    entrada dos scripts SOLANA/XRPUSDT/NEWTUSDT (RSI, volume e EMAs, stop a 4 ATR);
+    'bollinger' é a do BTCUSDT (RSI rápido e saída das Bandas de Bollinger).
+    """
+
+    def __init__(self, cripto, tempo_grafico, emas=(9, 21), qtd_velas_stop=17, risco_retorno=3.1,
+                 alavancagem=2, periodo_atr=40, variante='agressiva', configurar_alavancagem=None):
+        if variante not in ('agressiva', 'bollinger'):
+            raise ValueError(f'Variante desconhecida: {variante}')
+        self.cripto = cripto
+        self.tempo_grafico = str(tempo_grafico)
+        self.emas = list(emas)
+        self.qtd_velas_stop = qtd_velas_stop
+        self.risco_retorno = risco_retorno
+        self.alavancagem = alavancagem
+        self.periodo_atr = periodo_atr
+        self.variante = variante
+        # O script do BTCUSDT configurava a alavancagem na corretora; os outros não
+        self.configurar_alavancagem = variante == 'bollinger' if configurar_alavancagem is None else configurar_alavancagem
+
+        self.estado_de_trade = EstadoDeTrade.DE_FORA
+        self.preco_entrada = self.preco_stop = self.preco_alvo = 0.0
+        self.vela_fechou_trade = None
+        self.velas = None
+        self.ultimo_df = None
+
+    def __str__(self):
+        return f'{self.cripto} {self.tempo_grafico}m ({self.variante})'
+
+    def _log(self, mensagem):
+        print(f'[{self.cripto}] {mensagem}', flush=True)
+
+    def iniciar(self):
+        if self.configurar_alavancagem:
+            set_leverage(cliente, self.cripto, self.alavancagem)
+        self.estado_de_trade, self.preco_entrada, self.preco_stop, self.preco_alvo = tem_trade_aberto(self.cripto)
+        # Carrega os instrumentos agora, não na primeira entrada
+        quantidade_minima_para_operar(self.cripto)
+        self._log(f'Estado de trade: {self.estado_de_trade}, entrada: {self.preco_entrada}, '
+                  f'stop: {self.preco_stop}, alvo: {self.preco_alvo}')
+
+    def _indicadores(self, df):
+        colunas = {'ATR': calcula_atr(df['high'], df['low'], df['close'], self.periodo_atr)}
+        if self.variante == 'bollinger':
+            meio = df['close'].rolling(window=20).mean()
+            desvio = df['close'].rolling(window=20).std()
+            colunas['BB_Upper'] = meio + desvio * 2
+            colunas['BB_Lower'] = meio - desvio * 2
+            colunas['BB_Width'] = (colunas['BB_Upper'] - colunas['BB_Lower']) / meio
+            delta = df['close'].diff()
+            ganho = (delta.where(delta > 0, 0)).ewm(span=3).mean()
+            perda = (-delta.where(delta < 0, 0)).ewm(span=3).mean()
+            colunas['RSI_Fast'] = 100 - (100 / (1 + ganho / perda))
+        # assign: o DataFrame das velas é dividido com outros bots do mesmo símbolo
+        return df.assign(**colunas)
+
+    def _sinal(self, df):
+        # (estado, preço de entrada, stop) da entrada da vela atual, ou None
+        rapida, lenta = f'EMA_{self.emas[0]}', f'EMA_{self.emas[1]}'
+        if self.variante == 'agressiva':
+            atr_atual = df['ATR'].iloc[-1]
+            if (df['RSI'].iloc[-2] < 30 and
+                    df['volume'].iloc[-1] > df['Volume_EMA_20'].iloc[-1] and
+                    df['high'].iloc[-1] > df['high'].iloc[-2] and
+                    df[rapida].iloc[-2] > df[lenta].iloc[-2] > df['EMA_200'].iloc[-2]):
+                preco_entrada = df['high'].iloc[-2]
+                return EstadoDeTrade.COMPRADO, preco_entrada, preco_entrada - atr_atual * 4
+            if (df['RSI'].iloc[-2] > 70 and
+                    df['volume'].iloc[-1] > df['Volume_EMA_20'].iloc[-1] and
+                    df['low'].iloc[-1] < df['low'].iloc[-2] and
+                    df[rapida].iloc[-2] < df[lenta].iloc[-2] < df['EMA_200'].iloc[-2]):
+                preco_entrada = df['low'].iloc[-2]
+                return EstadoDeTrade.VENDIDO, preco_entrada, preco_entrada + atr_atual * 4
+            return None
+
+        if (df['RSI_Fast'].iloc[-2] < 20 and
+                df['RSI_Fast'].iloc[-1] > df['RSI_Fast'].iloc[-2] and
+                df['close'].iloc[-2] <= df['BB_Lower'].iloc[-2] and
+                df['close'].iloc[-1] > df['BB_Lower'].iloc[-1] and
+                df['volume'].iloc[-1] > df['Volume_EMA_20'].iloc[-1] * 1.2 and
+                df['BB_Width'].iloc[-1] > 0.02 and
+                df[rapida].iloc[-2] > df[lenta].iloc[-2]):
+            return EstadoDeTrade.COMPRADO, df['close'].iloc[-1], df['BB_Lower'].iloc[-1] * 0.999
+        if (df['RSI_Fast'].iloc[-2] > 80 and
+                df['RSI_Fast'].iloc[-1] < df['RSI_Fast'].iloc[-2] and
+                df['close'].iloc[-2] >= df['BB_Upper'].iloc[-2] and
+                df['close'].iloc[-1] < df['BB_Upper'].iloc[-1] and
+                df['volume'].iloc[-1] > df['Volume_EMA_20'].iloc[-1] * 1.2 and
+                df['BB_Width'].iloc[-1] > 0.02 and
+                df[rapida].iloc[-2] < df[lenta].iloc[-2]):
+            return EstadoDeTrade.VENDIDO, df['close'].iloc[-1], df['BB_Upper'].iloc[-1] * 1.001
+        return None
+
+    def _fechou(self, df, mensagem):
+        self.estado_de_trade = EstadoDeTrade.DE_FORA
+        self.vela_fechou_trade = df['open_time'].iloc[-1]
+        self._log(mensagem)
+        print('-' * 10, flush=True)
+
+    def avaliar(self, df):
+        """Uma volta do loop do script com as velas atuais"""
+        if df.empty or len(df) < self.qtd_velas_stop + 2:
+            return
+        df = self._indicadores(df)
+        comprado = self.estado_de_trade == EstadoDeTrade.COMPRADO
+
+        if self.estado_de_trade in (EstadoDeTrade.COMPRADO, EstadoDeTrade.VENDIDO):
+            _, _, self.preco_stop, self.preco_alvo = tem_trade_aberto(self.cripto)
+            preco_atual = df['close'].iloc[-1]
+            if comprado:
+                stop_breakeven_compra(self.cripto, self.preco_entrada, self.preco_entrada * 1.005,
+                                      self.estado_de_trade, preco_atual)
+                bateu_alvo = df['high'].iloc[-1] >= self.preco_alvo
+                bateu_stop = df['low'].iloc[-1] <= self.preco_stop
+            else:
+                stop_breakeven_venda(self.cripto, self.preco_entrada, self.preco_entrada * 0.995,
+                                     self.estado_de_trade, preco_atual)
+                bateu_alvo = df['low'].iloc[-1] <= self.preco_alvo
+                bateu_stop = df['high'].iloc[-1] >= self.preco_stop
+
+            vela = df['open_time'].iloc[-1]
+            if bateu_alvo:
+                self._fechou(df, f'Bateu alvo na vela que abriu {vela}, no preço de {self.preco_alvo}')
+            elif bateu_stop:
+                self._fechou(df, f'Bateu stop na vela que abriu {vela}, no preço de {self.preco_stop}')
+            elif tem_trade_aberto(self.cripto)[0] == EstadoDeTrade.DE_FORA:
+                self._fechou(df, 'Trade fechado manualmente na corretora')
+            return
+
+        if df['open_time'].iloc[-1] == self.vela_fechou_trade:
+            return
+        sinal = self._sinal(df)
+        if sinal is None:
+            return
+
+        estado, preco_entrada, preco_stop = sinal
+        atr_atual = df['ATR'].iloc[-1]
+        risco = preco_entrada - preco_stop if estado == EstadoDeTrade.COMPRADO else preco_stop - preco_entrada
+        if risco < atr_atual:
+            self._log(f"Stop de {'compra' if estado == EstadoDeTrade.COMPRADO else 'venda'} "
+                      f"muito curto comparado ao ATR, ignorando entrada.")
+            return
+
+        saldo = saldo_da_conta() * self.alavancagem
+        qtd_cripto_para_operar = quantidade_cripto_para_operar(saldo, quantidade_minima_para_operar(self.cripto),
+                                                               df['close'].iloc[-1])
+        if estado == EstadoDeTrade.COMPRADO:
+            preco_alvo = preco_entrada + risco * self.risco_retorno
+            abre_compra_com_parcial(self.cripto, qtd_cripto_para_operar, preco_stop, preco_alvo, preco_entrada)
+        else:
+            preco_alvo = preco_entrada - risco * self.risco_retorno
+            abre_venda_com_parcial(self.cripto, qtd_cripto_para_operar, preco_stop, preco_alvo, preco_entrada)
+        self.estado_de_trade = estado
+        self.preco_entrada, self.preco_stop, self.preco_alvo = preco_entrada, preco_stop, preco_alvo
+        self._log(f"Entrou na {'compra' if estado == EstadoDeTrade.COMPRADO else 'venda'} da vela que abriu "
+                  f"{df['open_time'].iloc[-1]}, Preço de entrada: {preco_entrada}, Stop: {preco_stop}, Alvo: {preco_alvo}")
+        print('-' * 10, flush=True)
+
+
+class ExecutorDeBots:
+    """
+    Roda vários bots (objetos com cripto, tempo_grafico, emas, iniciar() e avaliar(df))
+    num loop só. Bots com as mesmas velas dividem o mesmo VelasAoVivo. Um bot que erra
+    `max_erros_seguidos` vezes seguidas fica `pausa` segundos sem ser avaliado.
+    """
+
+    def __init__(self, bots, max_erros_seguidos=5, pausa=60):
+        self.bots = bots
+        self.max_erros_seguidos = max_erros_seguidos
+        self.pausa = pausa
+        self.fila = queue.Queue()
+        self.websocket_publico = None
+        self.websocket_privado = None
+        self.velas = {}
+        self.bots_por_velas = {}
+        self.erros_seguidos = {id(bot): 0 for bot in bots}
+        self.pausado_ate = {id(bot): 0.0 for bot in bots}
+        # Só avalia um bot depois de ele ler a posição real (bot.iniciar); senão ele começaria
+        # DE_FORA e poderia abrir uma segunda posição
+        self.iniciados = set()
+        # id(bot) -> (bot, quando tentar de novo) dos bots cujas velas não aqueceram
+        self.sem_velas = {}
+
+    def iniciar(self):
+        from pybit.unified_trading import WebSocket
+        self.websocket_publico = WebSocket(testnet=False, channel_type='linear')
+        api_key, api_secret = os.getenv('BYBIT_API_KEY'), os.getenv('BYBIT_API_SECRET')
+        if api_key and api_secret:
+            # Posição mudou na corretora (alvo, stop, fechada à mão): avalia o bot na hora
+            # e o espelho da conta responde posição e saldo de todos os bots sem ir ao REST
+            self.websocket_privado = WebSocket(testnet=False, channel_type='private',
+                                               api_key=api_key, api_secret=api_secret)
+            usar_espelho_da_conta(self.websocket_privado, ao_mudar_posicao=self._ao_mudar_posicao)
+
+        for bot in self.bots:
+            if self._conectar_velas(bot):
+                self._iniciar_bot(bot)
+        ativos = sum(len(bots) for bots in self.bots_por_velas.values())
+        print(f'{ativos}/{len(self.bots)} bots, {len(self.velas)} séries de velas num processo', flush=True)
+        return self
+
+    def _conectar_velas(self, bot):
+        try:
+            chave = (bot.cripto, bot.tempo_grafico, tuple(bot.emas))
+            if chave not in self.velas:
+                velas = VelasAoVivo(bot.cripto, bot.tempo_grafico, bot.emas,
+                                    websocket=self.websocket_publico, fila=self.fila).iniciar()
+                self.velas[chave] = velas
+                self.bots_por_velas[id(velas)] = []
+            bot.velas = self.velas[chave]
+            self.bots_por_velas[id(bot.velas)].append(bot)
+            self.sem_velas.pop(id(bot), None)
+            return True
+        except Exception as e:
+            # Sem velas o bot não roda, mas os outros seguem; tenta de novo depois da pausa
+            print(f'Erro ao buscar as velas de {bot}, tentando de novo em {self.pausa}s: {e}', flush=True)
+            self.sem_velas[id(bot)] = (bot, time.time() + self.pausa)
+            return False
+
+    def _iniciar_bot(self, bot):
+        try:
+            bot.iniciar()
+            self.iniciados.add(id(bot))
+            return True
+        except Exception as e:
+            print(f'Erro ao iniciar {bot}, tentando de novo em {self.pausa}s: {e}', flush=True)
+            self.pausado_ate[id(bot)] = time.time() + self.pausa
+            return False
+
+    def _ao_mudar_posicao(self, simbolo):
+        for velas in self.velas.values():
+            if velas.cripto == simbolo:
+                self.fila.put(velas)
+
+    def _avaliar(self, bot, df):
+        if df is None:
+            df = bot.ultimo_df
+        bot.ultimo_df = df
+        if df is None or time.time() < self.pausado_ate[id(bot)]:
+            return
+        if id(bot) not in self.iniciados and not self._iniciar_bot(bot):
+            return
+        try:
+            bot.avaliar(df)
+            self.erros_seguidos[id(bot)] = 0
+        except Exception as e:
+            self.erros_seguidos[id(bot)] += 1
+            print(f'Erro em {bot}: {e}', flush=True)
+            if self.erros_seguidos[id(bot)] >= self.max_erros_seguidos:
+                print(f'{bot} pausado por {self.pausa}s depois de {self.erros_seguidos[id(bot)]} erros seguidos', flush=True)
+                self.pausado_ate[id(bot)] = time.time() + self.pausa
+                self.erros_seguidos[id(bot)] = 0
+
+    def executar_uma_vez(self, timeout=60):
+        # Junta tudo que chegou na fila e avalia cada série de velas uma vez
+        for bot, tentar_em in list(self.sem_velas.values()):
+            if time.time() >= tentar_em and self._conectar_velas(bot):
+                self._iniciar_bot(bot)
+        try:
+            pendentes = [self.fila.get(timeout=timeout)]
+        except queue.Empty:
+            return False
+        while True:
+            try:
+                pendentes.append(self.fila.get_nowait())
+            except queue.Empty:
+                break
+        for velas in dict.fromkeys(pendentes):
+            df = velas.esperar_atualizacao(timeout=0)
+            for bot in self.bots_por_velas[id(velas)]:
+                self._avaliar(bot, df)
+        return True
+
+    def executar(self):
+        while True:
+            if not self.executar_uma_vez():
+                print('Nenhuma atualização das velas em 60s', flush=True)
+
+
+def carregar_configuracoes(caminho):
+    with open(caminho, 'r') as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    configuracoes = carregar_configuracoes(sys.argv[1]) if len(sys.argv) > 1 else CONFIGURACOES
+    ExecutorDeBots([BotScalp(**configuracao) for configuracao in configuracoes]).iniciar().executar()
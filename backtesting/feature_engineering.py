@@ -8,50 +8,149 @@ import pandas as pd
 import numpy as np
 from sklearn.preprocessing import RobustScaler
 from sklearn.ensemble import RandomForestRegressor
+from scipy.signal import lfilter
 from ta import volatility, trend, momentum
 from funcoes_bybit import busca_velas
-from typing import List
+from indicadores_osciladores import calcula_cci
+from cache_indicadores import em_cache
+from typing import Dict, List, Optional
 import warnings
 warnings.filterwarnings('ignore')
 
+def _ema(values: np.ndarray, span: int) -> np.ndarray:
+    """ewm(span, adjust=False).mean() começando no primeiro valor, como o _ema do ta"""
+    alpha = 2 / (span + 1)
+    return lfilter([alpha], [1, alpha - 1], values, zi=[(1 - alpha) * values[0]])[0]
+
+
+class DtypePolicy:
+    """
+    Tipos do frame de features: float_dtype para as features contínuas, flag_dtype para os
+    indicadores 0/1 (hh_10, is_green, ...), count_dtype para as contagens (green_streak_3)
+    e colunas de texto viram número ou código de categoria. Targets e open_time não mudam.
+    Com report_memory=True, o FeatureEngineer guarda (e imprime) a memória a cada etapa.
+    """
+    
+    def __init__(self, float_dtype: str = 'float32', flag_dtype: str = 'int8',
+                 count_dtype: str = 'int8', report_memory: bool = False):
+        self.float_dtype = np.dtype(float_dtype)
+        self.flag_dtype = np.dtype(flag_dtype)
+        self.count_dtype = np.dtype(count_dtype)
+        self.report_memory = report_memory
+    
+    def key(self) -> tuple:
+        return (self.float_dtype.str, self.flag_dtype.str, self.count_dtype.str)
+    
+    def apply(self, df: pd.DataFrame, skip: List[str] = (), counts: List[str] = ()) -> pd.DataFrame:
+        """Converte as colunas de `df`; `counts` só são convertidas se não tiverem NaN"""
+        converted = {}
+        for col in df.columns:
+            if col in skip:
+                continue
+            values = df[col]
+            if col in counts and not values.isna().any():
+                converted[col] = values.astype(self.count_dtype)
+            elif pd.api.types.is_bool_dtype(values) or pd.api.types.is_integer_dtype(values):
+                converted[col] = values.astype(self.flag_dtype)
+            elif pd.api.types.is_float_dtype(values):
+                if values.dtype != self.float_dtype:
+                    converted[col] = values.astype(self.float_dtype)
+            elif values.dtype == object or isinstance(values.dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(values):
+                # turnover vem da Bybit como texto; o que não for número vira código de categoria
+                numeric = pd.to_numeric(values, errors='coerce')
+                if numeric.notna().sum() == values.notna().sum():
+                    converted[col] = numeric.astype(self.float_dtype)
+                else:
+                    codes = values.astype('category').cat.codes
+                    converted[col] = pd.to_numeric(codes, downcast='integer')
+        if not converted:
+            return df
+        return df.assign(**converted)
+
+
 class FeatureEngineer:
     """Pipeline de Feature Engineering para dados de trading"""
     
-    def __init__(self, lookback_periods: List[int] = [5, 10, 20, 50]):
+    target_columns = ['target_return', 'target_direction', 'target_price']
+    
+    # Features que são soma acumulada desde a primeira vela do DataFrame
+    cumulative_features = ['pvt', 'obv']
+    
+    # Contagens de velas (rolling sum de flags): inteiras, mas com NaN até a janela encher
+    count_feature_prefixes = ('green_streak_', 'red_streak_')
+    
+    def __init__(self, lookback_periods: List[int] = [5, 10, 20, 50], ewm_warmup: int = 300,
+                 dtype_policy: Optional[DtypePolicy] = None):
         self.lookback_periods = lookback_periods
         self.scaler = RobustScaler()
         self.feature_names = []
         
+        # Sem política, tudo fica em float64/int64 como o pandas gera
+        self.dtype_policy = dtype_policy
+        self.memory_report = []
+        
+        # Modo incremental (engineer_incremental): frame já calculado e a última vela vista.
+        # ewm_warmup é quantas velas antes das novas entram no recálculo para as features com
+        # média exponencial (MACD, ATR do ta) convergirem: (1 - 2/27)^300 ≈ 1e-10
+        self.ewm_warmup = ewm_warmup
+        self._incremental_frame = None
+        self._incremental_key = None
+        self._last_candle_hash = None
+        
+    def _join_features(self, df: pd.DataFrame, features: dict) -> pd.DataFrame:
+        """Junta as features novas ao DataFrame de uma vez (inserir coluna a coluna num frame largo custa mais que o cálculo)"""
+        new_features = pd.DataFrame(features, index=df.index)
+        if self.dtype_policy is not None:
+            # As somas acumuladas continuam em float64 até o fim, para o modo incremental
+            # poder continuar a soma sem perder precisão
+            new_features = self.dtype_policy.apply(new_features, skip=self.target_columns + self.cumulative_features)
+        return pd.concat([df.drop(columns=new_features.columns.intersection(df.columns)), new_features], axis=1)
+    
+    def _apply_final_dtypes(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Aplica a política nas colunas de entrada e nas que ficaram para o fim (depois do dropna)"""
+        if self.dtype_policy is None:
+            return df
+        counts = [col for col in df.columns if col.startswith(self.count_feature_prefixes)]
+        return self.dtype_policy.apply(df, skip=self.target_columns + ['open_time'], counts=counts)
+    
+    def _record_memory(self, stage: str, df: pd.DataFrame, verbose: bool):
+        if self.dtype_policy is None or not self.dtype_policy.report_memory:
+            return
+        memory_mb = df.memory_usage(deep=True).sum() / 1024 ** 2
+        self.memory_report.append({'stage': stage, 'columns': df.shape[1], 'rows': df.shape[0], 'memory_mb': memory_mb})
+        if verbose:
+            print(f"  {stage}: {memory_mb:.2f} MB ({df.shape[1]} colunas)")
+    
     def create_price_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Cria features baseadas em preços"""
-        df_features = df.copy()
+        features = {}
         
         # Returns em diferentes períodos
         for period in self.lookback_periods:
-            df_features[f'return_{period}'] = df['close'].pct_change(period)
-            df_features[f'log_return_{period}'] = np.log(df['close'] / df['close'].shift(period))
+            features[f'return_{period}'] = df['close'].pct_change(period)
+            features[f'log_return_{period}'] = np.log(df['close'] / df['close'].shift(period))
             
         # Volatilidade realizada
         for period in self.lookback_periods:
-            df_features[f'volatility_{period}'] = df['close'].pct_change().rolling(period).std()
+            features[f'volatility_{period}'] = df['close'].pct_change().rolling(period).std()
             
         # Price position dentro de ranges
         for period in self.lookback_periods:
             high_roll = df['high'].rolling(period).max()
             low_roll = df['low'].rolling(period).min()
-            df_features[f'price_position_{period}'] = (df['close'] - low_roll) / (high_roll - low_roll)
+            features[f'price_position_{period}'] = (df['close'] - low_roll) / (high_roll - low_roll)
             
         # RSI divergence
         if 'RSI' in df.columns:
-            df_features['rsi_ma_5'] = df['RSI'].rolling(5).mean()
-            df_features['rsi_ma_14'] = df['RSI'].rolling(14).mean()
-            df_features['rsi_divergence'] = df['RSI'] - df_features['rsi_ma_14']
+            features['rsi_ma_5'] = df['RSI'].rolling(5).mean()
+            features['rsi_ma_14'] = df['RSI'].rolling(14).mean()
+            features['rsi_divergence'] = df['RSI'] - features['rsi_ma_14']
         
-        return df_features
+        return self._join_features(df, features)
     
     def create_ema_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Cria features baseadas nas EMAs existentes"""
-        df_features = df.copy()
+        features = {}
         
         # Assume que temos EMA_9, EMA_21, EMA_200 do sistema original
         ema_cols = [col for col in df.columns if col.startswith('EMA_')]
@@ -61,181 +160,173 @@ class FeatureEngineer:
             ema_fast = ema_cols[0]  # EMA menor
             ema_slow = ema_cols[1]  # EMA maior
             
-            df_features['ema_ratio'] = df[ema_fast] / df[ema_slow]
-            df_features['ema_distance'] = (df[ema_fast] - df[ema_slow]) / df['close']
-            df_features['price_above_ema_fast'] = (df['close'] > df[ema_fast]).astype(int)
-            df_features['price_above_ema_slow'] = (df['close'] > df[ema_slow]).astype(int)
+            features['ema_ratio'] = df[ema_fast] / df[ema_slow]
+            features['ema_distance'] = (df[ema_fast] - df[ema_slow]) / df['close']
+            features['price_above_ema_fast'] = (df['close'] > df[ema_fast]).astype(int)
+            features['price_above_ema_slow'] = (df['close'] > df[ema_slow]).astype(int)
             
             # EMA slope (momentum)
             for ema_col in ema_cols:
-                df_features[f'{ema_col}_slope_5'] = df[ema_col].diff(5) / 5
-                df_features[f'{ema_col}_slope_10'] = df[ema_col].diff(10) / 10
+                features[f'{ema_col}_slope_5'] = df[ema_col].diff(5) / 5
+                features[f'{ema_col}_slope_10'] = df[ema_col].diff(10) / 10
                 
             # Distance from EMAs
             for ema_col in ema_cols:
-                df_features[f'distance_from_{ema_col}'] = (df['close'] - df[ema_col]) / df['close']
+                features[f'distance_from_{ema_col}'] = (df['close'] - df[ema_col]) / df['close']
         
-        return df_features
+        return self._join_features(df, features)
     
     def create_volume_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Cria features baseadas em volume"""
-        df_features = df.copy()
+        features = {}
         
         # Volume ratios
         if 'Volume_EMA_20' in df.columns:
-            df_features['volume_ratio'] = df['volume'] / df['Volume_EMA_20']
-            df_features['volume_above_avg'] = (df['volume'] > df['Volume_EMA_20']).astype(int)
+            features['volume_ratio'] = df['volume'] / df['Volume_EMA_20']
+            features['volume_above_avg'] = (df['volume'] > df['Volume_EMA_20']).astype(int)
         
         # Volume-Price Analysis
         for period in [5, 10, 20]:
-            df_features[f'volume_sma_{period}'] = df['volume'].rolling(period).mean()
-            df_features[f'volume_ratio_{period}'] = df['volume'] / df_features[f'volume_sma_{period}']
+            features[f'volume_sma_{period}'] = df['volume'].rolling(period).mean()
+            features[f'volume_ratio_{period}'] = df['volume'] / features[f'volume_sma_{period}']
             
         # Price-Volume Trend
-        df_features['pvt'] = ((df['close'] - df['close'].shift(1)) / df['close'].shift(1) * df['volume']).cumsum()
+        features['pvt'] = ((df['close'] - df['close'].shift(1)) / df['close'].shift(1) * df['volume']).cumsum()
         
         # On-Balance Volume
-        df_features['obv'] = (df['volume'] * np.where(df['close'] > df['close'].shift(1), 1, 
+        features['obv'] = (df['volume'] * np.where(df['close'] > df['close'].shift(1), 1, 
                                                     np.where(df['close'] < df['close'].shift(1), -1, 0))).cumsum()
         
-        return df_features
+        return self._join_features(df, features)
     
     def create_technical_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Cria features técnicas avançadas usando biblioteca ta"""
-        df_features = df.copy()
+        features = {}
         
         try:
             # Bollinger Bands
-            df_features['bb_upper'] = volatility.bollinger_hband(df['close'])
-            df_features['bb_lower'] = volatility.bollinger_lband(df['close'])
-            df_features['bb_middle'] = volatility.bollinger_mavg(df['close'])
-            df_features['bb_width'] = (df_features['bb_upper'] - df_features['bb_lower']) / df_features['bb_middle']
-            df_features['bb_position'] = (df['close'] - df_features['bb_lower']) / (df_features['bb_upper'] - df_features['bb_lower'])
+            features['bb_upper'] = volatility.bollinger_hband(df['close'])
+            features['bb_lower'] = volatility.bollinger_lband(df['close'])
+            features['bb_middle'] = volatility.bollinger_mavg(df['close'])
+            features['bb_width'] = (features['bb_upper'] - features['bb_lower']) / features['bb_middle']
+            features['bb_position'] = (df['close'] - features['bb_lower']) / (features['bb_upper'] - features['bb_lower'])
         except:
             # Manual Bollinger Bands if ta functions don't work
             period = 20
             rolling_mean = df['close'].rolling(period).mean()
             rolling_std = df['close'].rolling(period).std()
-            df_features['bb_upper'] = rolling_mean + (rolling_std * 2)
-            df_features['bb_lower'] = rolling_mean - (rolling_std * 2)
-            df_features['bb_middle'] = rolling_mean
-            df_features['bb_width'] = (df_features['bb_upper'] - df_features['bb_lower']) / df_features['bb_middle']
-            df_features['bb_position'] = (df['close'] - df_features['bb_lower']) / (df_features['bb_upper'] - df_features['bb_lower'])
+            features['bb_upper'] = rolling_mean + (rolling_std * 2)
+            features['bb_lower'] = rolling_mean - (rolling_std * 2)
+            features['bb_middle'] = rolling_mean
+            features['bb_width'] = (features['bb_upper'] - features['bb_lower']) / features['bb_middle']
+            features['bb_position'] = (df['close'] - features['bb_lower']) / (features['bb_upper'] - features['bb_lower'])
         
         try:
             # MACD
-            df_features['macd'] = trend.macd(df['close'])
-            df_features['macd_signal'] = trend.macd_signal(df['close'])
-            df_features['macd_histogram'] = trend.macd_diff(df['close'])
+            features['macd'] = trend.macd(df['close'])
+            features['macd_signal'] = trend.macd_signal(df['close'])
+            features['macd_histogram'] = trend.macd_diff(df['close'])
         except:
             # Manual MACD
             ema_12 = df['close'].ewm(span=12).mean()
             ema_26 = df['close'].ewm(span=26).mean()
-            df_features['macd'] = ema_12 - ema_26
-            df_features['macd_signal'] = df_features['macd'].ewm(span=9).mean()
-            df_features['macd_histogram'] = df_features['macd'] - df_features['macd_signal']
+            features['macd'] = ema_12 - ema_26
+            features['macd_signal'] = features['macd'].ewm(span=9).mean()
+            features['macd_histogram'] = features['macd'] - features['macd_signal']
         
         try:
             # Stochastic
-            df_features['stoch_k'] = momentum.stoch(df['high'], df['low'], df['close'])
-            df_features['stoch_d'] = momentum.stoch_signal(df['high'], df['low'], df['close'])
+            features['stoch_k'] = momentum.stoch(df['high'], df['low'], df['close'])
+            features['stoch_d'] = momentum.stoch_signal(df['high'], df['low'], df['close'])
         except:
             # Manual Stochastic
             period = 14
             low_min = df['low'].rolling(period).min()
             high_max = df['high'].rolling(period).max()
-            df_features['stoch_k'] = 100 * (df['close'] - low_min) / (high_max - low_min)
-            df_features['stoch_d'] = df_features['stoch_k'].rolling(3).mean()
+            features['stoch_k'] = 100 * (df['close'] - low_min) / (high_max - low_min)
+            features['stoch_d'] = features['stoch_k'].rolling(3).mean()
         
         try:
             # ATR
-            df_features['atr'] = volatility.average_true_range(df['high'], df['low'], df['close'])
+            features['atr'] = volatility.average_true_range(df['high'], df['low'], df['close'])
         except:
             # Manual ATR
             high_low = df['high'] - df['low']
             high_close = np.abs(df['high'] - df['close'].shift())
             low_close = np.abs(df['low'] - df['close'].shift())
             true_range = pd.Series(np.maximum(high_low, np.maximum(high_close, low_close)), index=df.index)
-            df_features['atr'] = true_range.rolling(14).mean()
+            features['atr'] = true_range.rolling(14).mean()
         
-        df_features['atr_ratio'] = df_features['atr'] / df['close']
+        features['atr_ratio'] = features['atr'] / df['close']
         
         try:
             # Williams %R
-            df_features['williams_r'] = momentum.williams_r(df['high'], df['low'], df['close'])
+            features['williams_r'] = momentum.williams_r(df['high'], df['low'], df['close'])
         except:
             # Manual Williams %R
             period = 14
             high_max = df['high'].rolling(period).max()
             low_min = df['low'].rolling(period).min()
-            df_features['williams_r'] = -100 * (high_max - df['close']) / (high_max - low_min)
+            features['williams_r'] = -100 * (high_max - df['close']) / (high_max - low_min)
         
-        try:
-            # CCI
-            df_features['cci'] = trend.cci(df['high'], df['low'], df['close'])
-        except:
-            # Manual CCI
-            period = 20
-            typical_price = (df['high'] + df['low'] + df['close']) / 3
-            sma_tp = typical_price.rolling(period).mean()
-            mad = typical_price.rolling(period).apply(lambda x: np.mean(np.abs(x - x.mean())))
-            df_features['cci'] = (typical_price - sma_tp) / (0.015 * mad)
+        # CCI (mesma fórmula do trend.cci do ta, que calcula o desvio médio com rolling().apply)
+        features['cci'] = calcula_cci(df['high'], df['low'], df['close'], 20)
         
-        return df_features
+        return self._join_features(df, features)
     
     def create_pattern_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Cria features baseadas em padrões de candles"""
-        df_features = df.copy()
+        features = {}
         
         # Tamanho do corpo da vela
-        df_features['body_size'] = abs(df['close'] - df['open']) / df['close']
+        features['body_size'] = abs(df['close'] - df['open']) / df['close']
         
         # Tamanho das sombras
-        df_features['upper_shadow'] = (df['high'] - np.maximum(df['open'], df['close'])) / df['close']
-        df_features['lower_shadow'] = (np.minimum(df['open'], df['close']) - df['low']) / df['close']
+        features['upper_shadow'] = (df['high'] - np.maximum(df['open'], df['close'])) / df['close']
+        features['lower_shadow'] = (np.minimum(df['open'], df['close']) - df['low']) / df['close']
         
         # Tipo da vela
-        df_features['is_green'] = (df['close'] > df['open']).astype(int)
-        df_features['is_doji'] = (abs(df['close'] - df['open']) / df['close'] < 0.001).astype(int)
+        features['is_green'] = (df['close'] > df['open']).astype(int)
+        features['is_doji'] = (abs(df['close'] - df['open']) / df['close'] < 0.001).astype(int)
         
         # Gaps
-        df_features['gap_up'] = (df['low'] > df['high'].shift(1)).astype(int)
-        df_features['gap_down'] = (df['high'] < df['low'].shift(1)).astype(int)
+        features['gap_up'] = (df['low'] > df['high'].shift(1)).astype(int)
+        features['gap_down'] = (df['high'] < df['low'].shift(1)).astype(int)
         
         # Sequências de velas
         for period in [3, 5, 7]:
-            df_features[f'green_streak_{period}'] = df_features['is_green'].rolling(period).sum()
-            df_features[f'red_streak_{period}'] = (1 - df_features['is_green']).rolling(period).sum()
+            features[f'green_streak_{period}'] = features['is_green'].rolling(period).sum()
+            features[f'red_streak_{period}'] = (1 - features['is_green']).rolling(period).sum()
         
-        return df_features
+        return self._join_features(df, features)
     
     def create_market_structure_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Cria features de estrutura de mercado"""
-        df_features = df.copy()
+        features = {}
         
         # Higher Highs / Lower Lows
         for period in [10, 20, 50]:
-            df_features[f'hh_{period}'] = (df['high'] > df['high'].rolling(period).max().shift(1)).astype(int)
-            df_features[f'll_{period}'] = (df['low'] < df['low'].rolling(period).min().shift(1)).astype(int)
-            df_features[f'hl_{period}'] = (df['low'] > df['low'].rolling(period).min().shift(1)).astype(int)
-            df_features[f'lh_{period}'] = (df['high'] < df['high'].rolling(period).max().shift(1)).astype(int)
+            features[f'hh_{period}'] = (df['high'] > df['high'].rolling(period).max().shift(1)).astype(int)
+            features[f'll_{period}'] = (df['low'] < df['low'].rolling(period).min().shift(1)).astype(int)
+            features[f'hl_{period}'] = (df['low'] > df['low'].rolling(period).min().shift(1)).astype(int)
+            features[f'lh_{period}'] = (df['high'] < df['high'].rolling(period).max().shift(1)).astype(int)
         
         # Support/Resistance levels (simplified)
         for period in [20, 50]:
-            df_features[f'resistance_{period}'] = df['high'].rolling(period).max()
-            df_features[f'support_{period}'] = df['low'].rolling(period).min()
-            df_features[f'distance_to_resistance_{period}'] = (df_features[f'resistance_{period}'] - df['close']) / df['close']
-            df_features[f'distance_to_support_{period}'] = (df['close'] - df_features[f'support_{period}']) / df['close']
+            features[f'resistance_{period}'] = df['high'].rolling(period).max()
+            features[f'support_{period}'] = df['low'].rolling(period).min()
+            features[f'distance_to_resistance_{period}'] = (features[f'resistance_{period}'] - df['close']) / df['close']
+            features[f'distance_to_support_{period}'] = (df['close'] - features[f'support_{period}']) / df['close']
         
-        return df_features
+        return self._join_features(df, features)
     
     def create_lag_features(self, df: pd.DataFrame, target_col: str = 'close') -> pd.DataFrame:
         """Cria features de lag (valores passados)"""
-        df_features = df.copy()
+        features = {}
         
         # Lags do preço
         for lag in [1, 2, 3, 5, 10]:
-            df_features[f'{target_col}_lag_{lag}'] = df[target_col].shift(lag)
+            features[f'{target_col}_lag_{lag}'] = df[target_col].shift(lag)
             
         # Lags dos indicadores principais
         key_indicators = ['RSI', 'volume_ratio'] + [col for col in df.columns if col.startswith('EMA_')]
@@ -243,64 +334,326 @@ class FeatureEngineer:
         for indicator in key_indicators:
             if indicator in df.columns:
                 for lag in [1, 2, 3]:
-                    df_features[f'{indicator}_lag_{lag}'] = df[indicator].shift(lag)
+                    features[f'{indicator}_lag_{lag}'] = df[indicator].shift(lag)
         
-        return df_features
+        return self._join_features(df, features)
     
     def create_target_variable(self, df: pd.DataFrame, forecast_horizon: int = 1) -> pd.DataFrame:
         """Cria variável target para predição"""
-        df_target = df.copy()
+        features = {}
         
         # Target: retorno futuro
-        df_target['target_return'] = df['close'].pct_change(forecast_horizon).shift(-forecast_horizon)
+        features['target_return'] = df['close'].pct_change(forecast_horizon).shift(-forecast_horizon)
         
         # Target: direção do movimento (classificação)
-        df_target['target_direction'] = (df_target['target_return'] > 0).astype(int)
+        features['target_direction'] = (features['target_return'] > 0).astype(int)
         
         # Target: preço futuro
-        df_target['target_price'] = df['close'].shift(-forecast_horizon)
+        features['target_price'] = df['close'].shift(-forecast_horizon)
         
-        return df_target
+        return self._join_features(df, features)
     
     def engineer_all_features(self, df: pd.DataFrame, forecast_horizon: int = 1) -> pd.DataFrame:
-        """Pipeline completo de feature engineering"""
+        """
+        Pipeline completo de feature engineering. Se as velas vieram de busca_velas, o
+        resultado fica no cache_indicadores: as mesmas velas não passam pelo pipeline de
+        novo (ex.: o bot e o QuantitativeAnalyzer analisando as mesmas velas).
+        """
+        policy_key = self.dtype_policy.key() if self.dtype_policy is not None else None
+        df_cache = em_cache(df, 'features', (forecast_horizon, tuple(self.lookback_periods), policy_key),
+                            lambda: self._engineer_all_features(df, forecast_horizon))
+        # O DataFrame do cache é de todos: cada chamada recebe uma cópia para alterar à vontade
+        df_clean = df_cache.copy()
+
+        # Salvar nomes das features
+        self.feature_names = [col for col in df_clean.columns if col not in self.target_columns + ['open_time']]
+        return df_clean
+
+    def _apply_stages(self, df: pd.DataFrame, forecast_horizon: int, verbose: bool = True) -> pd.DataFrame:
+        """Aplica todas as etapas, sem remover as linhas com NaN"""
+        stages = [
+            (self.create_price_features, "Price features"),
+            (self.create_ema_features, "EMA features"),
+            (self.create_volume_features, "Volume features"),
+            (self.create_technical_features, "Technical features"),
+            (self.create_pattern_features, "Pattern features"),
+            (self.create_market_structure_features, "Market structure features"),
+            (self.create_lag_features, "Lag features"),
+            (lambda df: self.create_target_variable(df, forecast_horizon), "Target variables"),
+        ]
+        df_engineered = df
+        self.memory_report = []
+        self._record_memory("Input", df_engineered, verbose)
+        for stage, name in stages:
+            df_engineered = stage(df_engineered)
+            if verbose:
+                print(f"✓ {name} criadas")
+            self._record_memory(name, df_engineered, verbose)
+        return df_engineered
+    
+    def _context_size(self) -> int:
+        """Velas antes da primeira vela nova necessárias para recalcular as features dela"""
+        # Maior janela móvel (lookbacks, estrutura de 50 velas + shift) mais os lags de 10 velas
+        finite_lookback = max(max(self.lookback_periods), 50) + 1 + 10
+        return max(finite_lookback, self.ewm_warmup)
+    
+    def _engineer_all_features(self, df: pd.DataFrame, forecast_horizon: int) -> pd.DataFrame:
         print("Iniciando feature engineering...")
         
         # Aplicar todas as transformações
-        df_engineered = self.create_price_features(df)
-        print("✓ Price features criadas")
-        
-        df_engineered = self.create_ema_features(df_engineered)
-        print("✓ EMA features criadas")
-        
-        df_engineered = self.create_volume_features(df_engineered)
-        print("✓ Volume features criadas")
-        
-        df_engineered = self.create_technical_features(df_engineered)
-        print("✓ Technical features criadas")
+        df_engineered = self._apply_stages(df, forecast_horizon)
         
-        df_engineered = self.create_pattern_features(df_engineered)
-        print("✓ Pattern features criadas")
-        
-        df_engineered = self.create_market_structure_features(df_engineered)
-        print("✓ Market structure features criadas")
+        # Remover linhas com NaN
+        df_clean = self._apply_final_dtypes(df_engineered.dropna())
+        self._record_memory("Final", df_clean, verbose=True)
         
-        df_engineered = self.create_lag_features(df_engineered)
-        print("✓ Lag features criadas")
+        quantidade_features = len([col for col in df_clean.columns if col not in self.target_columns + ['open_time']])
+        print(f"Feature engineering concluído: {quantidade_features} features criadas")
+        print(f"Dataset shape: {df_clean.shape}")
         
-        df_engineered = self.create_target_variable(df_engineered, forecast_horizon)
-        print("✓ Target variables criadas")
+        return df_clean
+    
+    def engineer_incremental(self, df: pd.DataFrame, forecast_horizon: int = 1) -> pd.DataFrame:
+        """
+        Mesmo resultado de engineer_all_features para as últimas velas, recalculando só as
+        velas novas (e a última, que pode ter mudado enquanto estava aberta), ou a partir da
+        primeira vela guardada cujas colunas de entrada mudaram. Para uso ao vivo,
+        chamado a cada volta com as velas de busca_velas: guarda o frame calculado e só refaz
+        a cauda, com o contexto que as janelas móveis precisam (ver _context_size).
+        
+        As features acumuladas (pvt, obv) são rebaseadas na primeira vela de `df`, como no
+        cálculo em lote. A diferença para o lote fica nas primeiras velas da janela, que aqui
+        têm valores (vindos do histórico) onde o lote teria NaN.
+        """
+        start = self._first_changed_row(df, forecast_horizon)
+        if not start:
+            frame = self._apply_stages(df, forecast_horizon, verbose=False)
+        elif start == len(df):
+            # Nenhuma vela mudou desde a última chamada
+            frame = self._incremental_frame
+        else:
+            # Alinhadas pelo tempo de abertura: o frame guardado pode começar antes de `df`
+            stored = self._incremental_frame
+            offset = int(np.searchsorted(stored['open_time'].to_numpy(), df['open_time'].iloc[0]))
+            stored = stored.iloc[offset:offset + start]
+            
+            tail_start = max(start - self._context_size(), 0)
+            tail = self._apply_stages(df.iloc[tail_start:], forecast_horizon, verbose=False)
+            for col in self.cumulative_features:
+                # A soma da cauda começa do zero; continua a partir do valor guardado
+                base = stored[col].iloc[tail_start]
+                if not np.isnan(base):
+                    tail[col] = tail[col] + base
+            frame = pd.concat([stored, tail.iloc[start - tail_start:]])
+            
+            if offset:
+                # Como no lote, a soma começa na primeira vela de `df` (pvt começa em NaN)
+                for col in self.cumulative_features:
+                    first_value = frame[col].iloc[0]
+                    frame[col] = frame[col] - (0 if np.isnan(first_value) else first_value)
+                frame.iloc[0, frame.columns.get_loc('pvt')] = np.nan
+            frame.index = df.index
+        
+        self._incremental_frame = frame
+        self._incremental_key = (forecast_horizon, list(df.columns))
+        self._last_candle_hash = int(pd.util.hash_pandas_object(df.iloc[-1:], index=False).iloc[0])
+        
+        df_clean = self._apply_final_dtypes(frame.dropna())
+        self.feature_names = [col for col in df_clean.columns if col not in self.target_columns + ['open_time']]
+        return df_clean
+    
+    def _first_changed_row(self, df: pd.DataFrame, forecast_horizon: int) -> Optional[int]:
+        """
+        Posição em `df` da primeira vela que precisa ser recalculada, ou None se não dá para
+        aproveitar o frame guardado (primeira chamada, outras colunas ou velas que não
+        continuam as anteriores).
+        """
+        if self._incremental_frame is None or self._incremental_key != (forecast_horizon, list(df.columns)):
+            return None
+        stored_times = self._incremental_frame['open_time'].to_numpy()
+        new_times = df['open_time'].to_numpy()
+        if new_times[0] < stored_times[0]:
+            return None
+        
+        # A última vela guardada pode ter sido a vela aberta
+        last = int(np.searchsorted(new_times, stored_times[-1]))
+        offset = int(np.searchsorted(stored_times, new_times[0]))
+        overlap = stored_times[offset:]
+        if last >= len(new_times) or len(overlap) != last + 1 or not np.array_equal(overlap, new_times[:last + 1]):
+            return None
+        
+        # Colunas de entrada que quem chama recalcula sobre a janela (ex.: EMA_200) mudam
+        # velas já guardadas: refaz a partir da primeira que não bate
+        inputs = [col for col in df.columns if col != 'open_time']
+        stored_inputs = self._incremental_frame[inputs].iloc[offset:offset + last].to_numpy()
+        new_inputs = df[inputs].iloc[:last].to_numpy()
+        same = (stored_inputs == new_inputs) | (pd.isna(stored_inputs) & pd.isna(new_inputs))
+        changed = ~same.all(axis=1)
+        if changed.any():
+            last = int(np.argmax(changed))
+        elif last == len(df) - 1:
+            candle_hash = int(pd.util.hash_pandas_object(df.iloc[-1:], index=False).iloc[0])
+            if candle_hash == self._last_candle_hash and offset == 0:
+                return len(df)
+        # O target das `forecast_horizon` velas anteriores olha para a frente
+        return max(last - forecast_horizon, 0)
+    
+    def latest_features(self, df: pd.DataFrame, row: int = -1) -> Optional[Dict[str, float]]:
+        """
+        Features de uma única vela (`row`), calculadas só com as velas anteriores que as
+        janelas precisam, sem passar o histórico inteiro pelo pipeline. Mesmas fórmulas das
+        create_* (com o ta: Bollinger com ddof=0, MACD e ATR de Wilder); as médias
+        exponenciais começam ewm_warmup velas antes, como no modo incremental.
+        
+        Retorna None se não há velas suficientes antes de `row` ou se alguma coluna de
+        entrada não é numérica; aí o chamador usa o pipeline completo.
+        """
+        t = row % len(df)
+        start = t - self._context_size()
+        if start < 0:
+            return None
+        
+        # As colunas de entrada também são features; uma linha só, sem converter colunas inteiras
+        features = {}
+        try:
+            for col, value in df.iloc[t].items():
+                if col != 'open_time':
+                    features[col] = float(value)
+        except (TypeError, ValueError):
+            return None
         
-        # Remover linhas com NaN
-        df_clean = df_engineered.dropna()
+        ema_cols = [col for col in df.columns if col.startswith('EMA_')]
+        needed = ['open', 'high', 'low', 'close', 'volume'] + ema_cols + [col for col in ('RSI', 'Volume_EMA_20') if col in df.columns]
+        columns = {col: df[col].to_numpy() for col in needed}
+        o, h, l, c, v = (np.asarray(columns[col][start:t + 1], dtype=np.float64)
+                         for col in ('open', 'high', 'low', 'close', 'volume'))
+        i = len(c) - 1
         
-        # Salvar nomes das features
-        self.feature_names = [col for col in df_clean.columns if col not in ['target_return', 'target_direction', 'target_price', 'open_time']]
+        # Price features
+        for period in self.lookback_periods:
+            features[f'return_{period}'] = c[i] / c[i - period] - 1
+            features[f'log_return_{period}'] = np.log(c[i] / c[i - period])
+        for period in self.lookback_periods:
+            returns = c[i - period + 1:] / c[i - period:i] - 1
+            features[f'volatility_{period}'] = returns.std(ddof=1)
+        for period in self.lookback_periods:
+            low_roll, high_roll = l[i - period + 1:].min(), h[i - period + 1:].max()
+            features[f'price_position_{period}'] = (c[i] - low_roll) / (high_roll - low_roll)
+        if 'RSI' in columns:
+            rsi = np.asarray(columns['RSI'][t - 13:t + 1], dtype=np.float64)
+            features['rsi_ma_5'] = rsi[-5:].mean()
+            features['rsi_ma_14'] = rsi.mean()
+            features['rsi_divergence'] = rsi[-1] - features['rsi_ma_14']
+        
+        # EMA features
+        emas = {col: np.asarray(columns[col][t - 13:t + 1], dtype=np.float64) for col in ema_cols}
+        slopes = {}
+        if len(ema_cols) >= 2:
+            ema_fast, ema_slow = emas[ema_cols[0]][-1], emas[ema_cols[1]][-1]
+            features['ema_ratio'] = ema_fast / ema_slow
+            features['ema_distance'] = (ema_fast - ema_slow) / c[i]
+            features['price_above_ema_fast'] = float(c[i] > ema_fast)
+            features['price_above_ema_slow'] = float(c[i] > ema_slow)
+            for col in ema_cols:
+                # Inclinação nas 4 últimas velas, para os lags das features EMA_*_slope_*
+                slopes[f'{col}_slope_5'] = (emas[col][-4:] - emas[col][-9:-5]) / 5
+                slopes[f'{col}_slope_10'] = (emas[col][-4:] - emas[col][-14:-10]) / 10
+                features[f'{col}_slope_5'] = slopes[f'{col}_slope_5'][-1]
+                features[f'{col}_slope_10'] = slopes[f'{col}_slope_10'][-1]
+            for col in ema_cols:
+                features[f'distance_from_{col}'] = (c[i] - emas[col][-1]) / c[i]
+        
+        # Volume features
+        volume_ratio = None
+        if 'Volume_EMA_20' in columns:
+            volume_ema = np.asarray(columns['Volume_EMA_20'][t - 3:t + 1], dtype=np.float64)
+            volume_ratio = v[-4:] / volume_ema
+            features['volume_ratio'] = volume_ratio[-1]
+            features['volume_above_avg'] = float(v[i] > volume_ema[-1])
+        for period in [5, 10, 20]:
+            features[f'volume_sma_{period}'] = v[i - period + 1:].mean()
+            features[f'volume_ratio_{period}'] = v[i] / features[f'volume_sma_{period}']
+        # pvt e obv somam desde a primeira vela do DataFrame
+        close_all = np.asarray(columns['close'][:t + 1], dtype=np.float64)
+        volume_all = np.asarray(columns['volume'][:t + 1], dtype=np.float64)
+        features['pvt'] = np.cumsum((close_all[1:] - close_all[:-1]) / close_all[:-1] * volume_all[1:])[-1]
+        features['obv'] = np.cumsum(volume_all * np.sign(np.r_[0.0, np.diff(close_all)]))[-1]
+        
+        # Technical features (mesmas fórmulas do ta)
+        window = c[i - 19:]
+        bb_middle, bb_std = window.mean(), window.std(ddof=0)
+        features['bb_upper'] = bb_middle + 2 * bb_std
+        features['bb_lower'] = bb_middle - 2 * bb_std
+        features['bb_middle'] = bb_middle
+        features['bb_width'] = (features['bb_upper'] - features['bb_lower']) / bb_middle
+        features['bb_position'] = (c[i] - features['bb_lower']) / (features['bb_upper'] - features['bb_lower'])
+        
+        macd = _ema(c, 12) - _ema(c, 26)
+        macd_signal = _ema(macd, 9)
+        features['macd'] = macd[-1]
+        features['macd_signal'] = macd_signal[-1]
+        features['macd_histogram'] = macd[-1] - macd_signal[-1]
+        
+        stoch_k = np.array([100 * (c[j] - l[j - 13:j + 1].min()) / (h[j - 13:j + 1].max() - l[j - 13:j + 1].min())
+                            for j in (i - 2, i - 1, i)])
+        features['stoch_k'] = stoch_k[-1]
+        features['stoch_d'] = stoch_k.mean()
+        
+        true_range = np.maximum(h[1:] - l[1:], np.maximum(np.abs(h[1:] - c[:-1]), np.abs(l[1:] - c[:-1])))
+        # ATR de Wilder: média dos 14 primeiros e depois atr = (13 * atr + tr) / 14
+        atr_seed = true_range[:14].mean()
+        features['atr'] = lfilter([1 / 14], [1, -13 / 14], true_range[14:], zi=[13 / 14 * atr_seed])[0][-1]
+        features['atr_ratio'] = features['atr'] / c[i]
+        
+        highest_high, lowest_low = h[i - 13:].max(), l[i - 13:].min()
+        features['williams_r'] = -100 * (highest_high - c[i]) / (highest_high - lowest_low)
+        
+        typical_price = (h[i - 19:] + l[i - 19:] + c[i - 19:]) / 3
+        mean_tp = typical_price.mean()
+        features['cci'] = (typical_price[-1] - mean_tp) / (0.015 * np.abs(typical_price - mean_tp).mean())
+        
+        # Pattern features
+        features['body_size'] = abs(c[i] - o[i]) / c[i]
+        features['upper_shadow'] = (h[i] - max(o[i], c[i])) / c[i]
+        features['lower_shadow'] = (min(o[i], c[i]) - l[i]) / c[i]
+        is_green = c[i - 6:] > o[i - 6:]
+        features['is_green'] = float(is_green[-1])
+        features['is_doji'] = float(abs(c[i] - o[i]) / c[i] < 0.001)
+        features['gap_up'] = float(l[i] > h[i - 1])
+        features['gap_down'] = float(h[i] < l[i - 1])
+        for period in [3, 5, 7]:
+            features[f'green_streak_{period}'] = float(is_green[-period:].sum())
+            features[f'red_streak_{period}'] = float(period - is_green[-period:].sum())
         
-        print(f"Feature engineering concluído: {len(self.feature_names)} features criadas")
-        print(f"Dataset shape: {df_clean.shape}")
+        # Market structure features
+        for period in [10, 20, 50]:
+            previous_high, previous_low = h[i - period:i].max(), l[i - period:i].min()
+            features[f'hh_{period}'] = float(h[i] > previous_high)
+            features[f'll_{period}'] = float(l[i] < previous_low)
+            features[f'hl_{period}'] = float(l[i] > previous_low)
+            features[f'lh_{period}'] = float(h[i] < previous_high)
+        for period in [20, 50]:
+            features[f'resistance_{period}'] = h[i - period + 1:].max()
+            features[f'support_{period}'] = l[i - period + 1:].min()
+            features[f'distance_to_resistance_{period}'] = (features[f'resistance_{period}'] - c[i]) / c[i]
+            features[f'distance_to_support_{period}'] = (c[i] - features[f'support_{period}']) / c[i]
         
-        return df_clean
+        # Lag features
+        for lag in [1, 2, 3, 5, 10]:
+            features[f'close_lag_{lag}'] = c[i - lag]
+        lagged = {}
+        if 'RSI' in columns:
+            lagged['RSI'] = rsi[-4:]
+        if volume_ratio is not None:
+            lagged['volume_ratio'] = volume_ratio
+        for col in ema_cols:
+            lagged[col] = emas[col][-4:]
+        lagged.update(slopes)
+        for indicator, values in lagged.items():
+            for lag in [1, 2, 3]:
+                features[f'{indicator}_lag_{lag}'] = values[-1 - lag]
+        
+        return features
     
     def get_feature_importance(self, X: pd.DataFrame, y: pd.Series) -> pd.DataFrame:
         """Calcula importância das features usando Random Forest"""
@@ -5,7 +5,11 @@ from estado_trade import EstadoDeTrade
 from dotenv import load_dotenv
 import os   
 from utilidades import ajusta_start_time
-from data_loader import obter_caminho_velas, carregar_velas_json, salvar_velas_json
+from data_loader import velas_para_dataframe
+from historico_velas import atualizar_velas
+from cache_indicadores import em_cache, marcar_velas
+from instrumentos import RegistroDeInstrumentos
+from ordens import PipelineDeOrdens
 
 
 
@@ -16,6 +20,29 @@ SECRET_KEY = os.getenv('BYBIT_API_SECRET')
 
 cliente = HTTP(api_key=API_KEY, api_secret=SECRET_KEY)
 
+# Lote mínimo, passo e tick dos instrumentos, carregados uma vez e guardados por 1h
+instrumentos = RegistroDeInstrumentos(cliente)
+
+# Entrada e parcial num place_batch_order só (abre_compra_com_parcial/abre_venda_com_parcial)
+ordens = PipelineDeOrdens(cliente, instrumentos)
+
+# Espelho da conta (espelho_conta.EspelhoDaConta): quando ativo, tem_trade_aberto e
+# saldo_da_conta respondem da memória em vez de ir ao REST
+espelho = None
+
+def usar_espelho_da_conta(websocket=None, intervalo_reconciliacao=60, ao_mudar_posicao=None):
+    global espelho
+    from espelho_conta import EspelhoDaConta
+    try:
+        espelho = EspelhoDaConta(cliente, websocket=websocket, intervalo_reconciliacao=intervalo_reconciliacao,
+                                 ao_mudar_posicao=ao_mudar_posicao).iniciar()
+        ordens.espelho = espelho
+        print('Posições e saldo pelos streams privados', flush=True)
+    except Exception as e:
+        espelho = None
+        print(f'Erro ao iniciar o espelho da conta, seguindo pelo REST: {e}', flush=True)
+    return espelho
+
 def busca_velas(cripto, tempo_grafico, emas):
     resposta = cliente.get_kline(symbol=cripto, interval=tempo_grafico, limit=1000) 
     velas_sem_estrutura = resposta['result']['list'][::-1]  
@@ -30,24 +57,37 @@ def busca_velas(cripto, tempo_grafico, emas):
     df['close'] = df['close'].astype(float)
     df['volume'] = df['volume'].astype(float)
     
+    return adiciona_indicadores(df, cripto, tempo_grafico, emas)
+
+def adiciona_indicadores(df, cripto, tempo_grafico, emas):
+    # Colunas de indicadores de busca_velas (EMAs, RSI, Volume_EMA_20) para velas de outra fonte
+    marcar_velas(df, cripto, tempo_grafico)
+    # Mesmas velas (mesma vela aberta) de uma busca anterior: reaproveita os indicadores
+    indicadores = em_cache(df, 'busca_velas', tuple(emas), lambda: _indicadores_busca_velas(df, emas))
+    return df.assign(**indicadores)
+
+def _indicadores_busca_velas(df, emas):
     ema_rapida = emas[0]
     ema_lenta = emas[1]
-    df[f'EMA_{ema_rapida}'] = df['close'].ewm(span=ema_rapida, adjust=False).mean()
-    df[f'EMA_{ema_lenta}'] = df['close'].ewm(span=ema_lenta, adjust=False).mean()
-    df['EMA_200'] = df['close'].ewm(span=200, adjust=False).mean()
-    
+    indicadores = {
+        f'EMA_{ema_rapida}': df['close'].ewm(span=ema_rapida, adjust=False).mean().to_numpy(),
+        f'EMA_{ema_lenta}': df['close'].ewm(span=ema_lenta, adjust=False).mean().to_numpy(),
+        'EMA_200': df['close'].ewm(span=200, adjust=False).mean().to_numpy(),
+    }
+
     #Calcular RSI
     delta = df['close'].diff()
     gain = (delta.where(delta > 0, 0)).ewm(span=14).mean()  # type: ignore
     loss = (-delta.where(delta < 0, 0)).ewm(span=14).mean()  # type: ignore
     rs = gain / loss
-    df['RSI'] = 100 - (100 / (1 + rs))
-    
-    df['Volume_EMA_20'] = df['volume'].ewm(span=20, adjust=False).mean()
-    
-    return df
+    indicadores['RSI'] = (100 - (100 / (1 + rs))).to_numpy()
+
+    indicadores['Volume_EMA_20'] = df['volume'].ewm(span=20, adjust=False).mean().to_numpy()
+    return indicadores
 
 def tem_trade_aberto(cripto):
+    if espelho is not None:
+        return espelho.tem_trade_aberto(cripto)
     resposta = cliente.get_positions(category='linear', symbol=cripto, recv_window=50000)
     dados = resposta['result']['list'][0]  # type: ignore
 
@@ -79,15 +119,22 @@ def tem_trade_aberto(cripto):
 
     return estado_de_trade, preco_entrada, preco_stop, preco_alvo
 
+def tamanho_da_posicao(cripto):
+    if espelho is not None:
+        return espelho.tamanho_da_posicao(cripto)
+    resposta = cliente.get_positions(category='linear', symbol=cripto, recv_window=50000)
+    tamanho = resposta['result']['list'][0]['size']  # type: ignore
+    return float(tamanho) if tamanho != '' else 0.0
+
 def saldo_da_conta():
+    if espelho is not None:
+        return espelho.saldo_da_conta()
     resposta = cliente.get_wallet_balance(accountType='UNIFIED', coin='USDT')
     saldo_em_usdt = resposta['result']['list'][0]['coin'][0]['walletBalance']  # type: ignore
     return float(saldo_em_usdt)
 
 def quantidade_minima_para_operar(cripto):
-    resposta = cliente.get_instruments_info(category='linear', symbol=cripto)
-    quantidade_minima_para_operar = resposta['result']['list'][0]['lotSizeFilter']['minOrderQty']  # type: ignore
-    return float(quantidade_minima_para_operar)
+    return instrumentos.quantidade_minima(cripto)
 
 
 def abre_compra(cripto, qtd_cripto_para_operar, preco_stop, preco_alvo):
@@ -121,6 +168,14 @@ def abre_venda(cripto, qtd_cripto_para_operar, preco_stop, preco_alvo):
         takeProfit=preco_alvo
     )
     
+def abre_compra_com_parcial(cripto, qtd_cripto_para_operar, preco_stop, preco_alvo, preco_entrada):
+    # abre_compra + abre_parcial_compra numa ida só ao REST
+    return ordens.entrar(cripto, 'Buy', qtd_cripto_para_operar, preco_stop, preco_alvo, preco_entrada)
+
+def abre_venda_com_parcial(cripto, qtd_cripto_para_operar, preco_stop, preco_alvo, preco_entrada):
+    # abre_venda + abre_parcial_venda numa ida só ao REST
+    return ordens.entrar(cripto, 'Sell', qtd_cripto_para_operar, preco_stop, preco_alvo, preco_entrada)
+
 def set_leverage(cliente, symbol, leverage):
     try:
         # Primeiro tenta configurar a alavancagem
@@ -148,29 +203,9 @@ def carregar_dados_historicos(cripto, tempo_grafico, emas, start, end, pular_vel
     start_timestamp = int(pd.to_datetime(start_ajustado).timestamp() * 1000)
     end_timestamp =  int(pd.to_datetime(end).timestamp() * 1000)
 
-    caminho_arquivo = obter_caminho_velas(cripto, tempo_grafico, start, end)
-    velas_sem_estrutura = carregar_velas_json(caminho_arquivo)
-
-    if velas_sem_estrutura is None:
-        velas_sem_estrutura = []
+    velas = atualizar_velas(cliente, cripto, tempo_grafico, start_timestamp, end_timestamp - 1)
 
-        while start_timestamp < end_timestamp:
-            resposta = cliente.get_kline(symbol=cripto, interval=tempo_grafico, limit=1000, start=start_timestamp)
-            velas_sem_estrutura += resposta['result']['list'][::-1]
-            start_timestamp = int(velas_sem_estrutura[-1][0]) + 1000
-
-        salvar_velas_json(caminho_arquivo, velas_sem_estrutura)
-
-    colunas = ['tempo_abertura', 'abertura', 'maxima', 'minima', 'fechamento', 'volume', 'turnover']
-
-    df = pd.DataFrame(velas_sem_estrutura, columns=colunas)
-
-    df['tempo_abertura'] = pd.to_datetime(df['tempo_abertura'].astype(np.int64), unit='ms')
-    df['abertura'] = df['abertura'].astype(float)
-    df['maxima'] = df['maxima'].astype(float)
-    df['minima'] = df['minima'].astype(float)
-    df['fechamento'] = df['fechamento'].astype(float)
-    df['volume'] = df['volume'].astype(float)
+    df = velas_para_dataframe(velas)
 
     ema_rapida = emas[0]
     ema_lenta = emas[1]
@@ -210,8 +245,8 @@ def abre_parcial_compra(cripto, quantidade_total, preco_entrada):
         preco_parcial = preco_entrada * 1.005
 
         # Calculando 50% da posição
-        quantidade_parcial = round(quantidade_total * 0.5, 3)  # Ajusta para 3 casas decimais por segurança
-        qtd_minima = quantidade_minima_para_operar(cripto)
+        quantidade_parcial = instrumentos.arredondar_quantidade(cripto, quantidade_total * 0.5)  # No passo do instrumento
+        qtd_minima = instrumentos.instrumento(cripto)['qtd_minima']
         quantidade_parcial = max(quantidade_parcial, qtd_minima)
         # Cria a ordem de Take Profit para os 50% da mão
         print(f'Criando ordem de take profit para 50% da mão em {preco_parcial}', flush=True)
@@ -221,13 +256,15 @@ def abre_parcial_compra(cripto, quantidade_total, preco_entrada):
             side="Sell",
             orderType="Limit",
             qty=quantidade_parcial,
-            price=round(preco_parcial, 4),
+            price=instrumentos.arredondar_preco(cripto, preco_parcial),
             timeInForce="GTC",
             reduceOnly=True
         )
 
     except Exception as e:
         print(f'Erro ao configurar ordem parcial ou stop break even: {e}', flush=True)
+        # Passo ou tick podem ter mudado: recarrega o instrumento na próxima ordem
+        instrumentos.invalidar(cripto)
 
 
 def abre_parcial_venda(cripto, quantidade_total, preco_entrada):
@@ -240,8 +277,8 @@ def abre_parcial_venda(cripto, quantidade_total, preco_entrada):
         preco_parcial = preco_entrada * 0.995
 
         # Calculando 50% da posição
-        quantidade_parcial = round(quantidade_total * 0.5, 3)  # Ajuste para 3 casas decimais
-        qtd_minima = quantidade_minima_para_operar(cripto)
+        quantidade_parcial = instrumentos.arredondar_quantidade(cripto, quantidade_total * 0.5)  # No passo do instrumento
+        qtd_minima = instrumentos.instrumento(cripto)['qtd_minima']
         quantidade_parcial = max(quantidade_parcial, qtd_minima)
         # Criar ordem de Take Profit para os 50% da mão
         print(f'Criando ordem de take profit para 50% da mão em {preco_parcial}', flush=True)
@@ -251,13 +288,14 @@ def abre_parcial_venda(cripto, quantidade_total, preco_entrada):
             side="Buy",  # Estamos vendidos, então a saída parcial é uma COMPRA
             orderType="Limit",
             qty=quantidade_parcial,
-            price=round(preco_parcial, 4),
+            price=instrumentos.arredondar_preco(cripto, preco_parcial),
             timeInForce="GTC",
             reduceOnly=True
         )
 
     except Exception as e:
         print(f'Erro ao configurar ordem parcial ou stop break even na venda: {e}', flush=True)
+        instrumentos.invalidar(cripto)
 
 def stop_breakeven_compra(cripto, preco_entrada, preco_parcial, estado_trade, preco_atual):
     try:
@@ -0,0 +1,186 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from data_loader import carregar_velas, salvar_velas, obter_pasta_velas
+
+LIMITE_VELAS_POR_REQUISICAO = 1000
+
+
+def intervalo_em_ms(tempo_grafico):
+    tempo_grafico = str(tempo_grafico)
+    if tempo_grafico.isdigit():
+        return int(tempo_grafico) * 60 * 1000
+    if tempo_grafico == 'D':
+        return 24 * 60 * 60 * 1000
+    if tempo_grafico == 'W':
+        return 7 * 24 * 60 * 60 * 1000
+    # 'M' não tem duração fixa, então não dá para dividir em janelas
+    raise ValueError(f'Tempo gráfico sem duração fixa: {tempo_grafico}')
+
+
+def dividir_em_janelas(inicio_ms, fim_ms, tempo_grafico, limite=LIMITE_VELAS_POR_REQUISICAO):
+    # Cada janela cobre no máximo `limite` velas, ou seja, uma requisição
+    tamanho_janela = intervalo_em_ms(tempo_grafico) * limite
+    janelas = []
+    while inicio_ms <= fim_ms:
+        janelas.append((inicio_ms, min(inicio_ms + tamanho_janela - 1, fim_ms)))
+        inicio_ms += tamanho_janela
+    return janelas
+
+
+def mesclar_velas(*listas_de_velas):
+    # Remove duplicadas pelo tempo de abertura e ordena da mais antiga para a mais nova
+    velas_por_tempo = {}
+    for velas in listas_de_velas:
+        for vela in velas:
+            velas_por_tempo[int(vela[0])] = vela
+    return [velas_por_tempo[tempo] for tempo in sorted(velas_por_tempo)]
+
+
+def detectar_lacunas(velas, tempo_grafico):
+    # Retorna (inicio_ms, fim_ms) de cada trecho de velas faltando
+    passo = intervalo_em_ms(tempo_grafico)
+    lacunas = []
+    for anterior, atual in zip(velas, velas[1:]):
+        tempo_anterior, tempo_atual = int(anterior[0]), int(atual[0])
+        if tempo_atual - tempo_anterior > passo:
+            lacunas.append((tempo_anterior + passo, tempo_atual - passo))
+    return lacunas
+
+
+class _LimitadorRequisicoes:
+    # Espaça as requisições entre as threads para não passar do limite por IP
+    def __init__(self, max_por_segundo):
+        self.intervalo = 1 / max_por_segundo
+        self.proxima = time.monotonic()
+        self.lock = threading.Lock()
+
+    def aguardar(self):
+        with self.lock:
+            agora = time.monotonic()
+            espera = self.proxima - agora
+            self.proxima = max(agora, self.proxima) + self.intervalo
+        if espera > 0:
+            time.sleep(espera)
+
+
+def _baixar_janelas(cliente, cripto, tempo_grafico, janelas, max_workers, max_requisicoes_por_segundo):
+    limitador = _LimitadorRequisicoes(max_requisicoes_por_segundo)
+
+    def buscar_janela(janela):
+        limitador.aguardar()
+        resposta = cliente.get_kline(symbol=cripto, interval=tempo_grafico,
+                                     start=janela[0], end=janela[1],
+                                     limit=LIMITE_VELAS_POR_REQUISICAO)
+        return resposta['result']['list']
+
+    if not janelas:
+        return []
+    print(f'Baixando {len(janelas)} janelas de velas de {cripto} ({tempo_grafico}m)...', flush=True)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(buscar_janela, janelas))
+
+
+def baixar_velas(cliente, cripto, tempo_grafico, inicio_ms, fim_ms, velas_existentes=None,
+                 max_workers=8, max_requisicoes_por_segundo=50):
+    """
+    Baixa as velas de [inicio_ms, fim_ms] em janelas de 1000 velas buscadas em paralelo.
+
+    Se `velas_existentes` for passado, só busca o que vem depois da última vela
+    salva e devolve tudo mesclado. As velas voltam no formato cru da Bybit
+    ([tempo, abertura, máxima, mínima, fechamento, volume, turnover]), ordenadas
+    e sem duplicadas.
+    """
+    velas_existentes = velas_existentes or []
+    if velas_existentes:
+        ultima_vela = max(int(vela[0]) for vela in velas_existentes)
+        inicio_ms = max(inicio_ms, ultima_vela + intervalo_em_ms(tempo_grafico))
+
+    janelas = dividir_em_janelas(inicio_ms, fim_ms, tempo_grafico)
+    velas_baixadas = _baixar_janelas(cliente, cripto, tempo_grafico, janelas,
+                                     max_workers, max_requisicoes_por_segundo)
+
+    velas = mesclar_velas(velas_existentes, *velas_baixadas)
+
+    lacunas = detectar_lacunas(velas, tempo_grafico)
+    if lacunas:
+        faltando = sum((fim - inicio) // intervalo_em_ms(tempo_grafico) + 1 for inicio, fim in lacunas)
+        print(f'Atenção: {len(lacunas)} lacunas nas velas de {cripto}, {faltando} velas faltando.', flush=True)
+
+    return velas
+
+
+def _caminho_vazios(cripto, tempo_grafico, pasta):
+    return os.path.join(obter_pasta_velas(cripto, tempo_grafico, pasta), 'vazios.json')
+
+
+def _carregar_vazios(cripto, tempo_grafico, pasta):
+    # Trechos que a Bybit já respondeu sem velas (antes da listagem, manutenção)
+    caminho = _caminho_vazios(cripto, tempo_grafico, pasta)
+    if os.path.exists(caminho):
+        with open(caminho, 'r') as f:
+            return [tuple(trecho) for trecho in json.load(f)]
+    return []
+
+
+def _salvar_vazios(cripto, tempo_grafico, vazios, pasta):
+    with open(_caminho_vazios(cripto, tempo_grafico, pasta), 'w') as f:
+        json.dump(sorted(vazios), f)
+
+
+def trechos_faltando(tempos, inicio_ms, fim_ms, tempo_grafico, vazios=()):
+    # Início, buracos e fim que não estão no armazenamento, sem os trechos já sabidos vazios
+    passo = intervalo_em_ms(tempo_grafico)
+    if not len(tempos):
+        trechos = [(inicio_ms, fim_ms)]
+    else:
+        buracos = np.flatnonzero(np.diff(tempos) > passo)
+        trechos = [(inicio_ms, int(tempos[0]) - passo)]
+        trechos += [(int(tempos[i]) + passo, int(tempos[i + 1]) - passo) for i in buracos]
+        trechos.append((int(tempos[-1]) + passo, fim_ms))
+    trechos = [(inicio, fim) for inicio, fim in trechos if inicio <= fim]
+    return [trecho for trecho in trechos
+            if not any(vazio[0] <= trecho[0] and trecho[1] <= vazio[1] for vazio in vazios)]
+
+
+def atualizar_velas(cliente, cripto, tempo_grafico, inicio_ms, fim_ms, pasta='dados_historicos',
+                    max_workers=8, max_requisicoes_por_segundo=50):
+    """
+    Garante que o armazenamento de `cripto`/`tempo_grafico` cobre [inicio_ms, fim_ms],
+    baixando só o que falta (início, buracos e o fim mais recente), e retorna as velas
+    do intervalo como array (ver data_loader.DTYPE_VELAS).
+    """
+    # Só velas já fechadas vão para o armazenamento
+    fim_ms = min(fim_ms, int(time.time() * 1000) - intervalo_em_ms(tempo_grafico))
+
+    velas = carregar_velas(cripto, tempo_grafico, inicio_ms, fim_ms, pasta)
+    vazios = _carregar_vazios(cripto, tempo_grafico, pasta)
+    trechos = trechos_faltando(velas['tempo_abertura'], inicio_ms, fim_ms, tempo_grafico, vazios)
+    velas_locais = len(velas)
+
+    janelas = [janela for inicio, fim in trechos
+               for janela in dividir_em_janelas(inicio, fim, tempo_grafico)]
+    velas_baixadas = _baixar_janelas(cliente, cripto, tempo_grafico, janelas,
+                                     max_workers, max_requisicoes_por_segundo)
+
+    baixadas = 0
+    if janelas:
+        # A Bybit pode devolver velas fora da janela pedida; só grava o que está no intervalo
+        velas_novas = [vela for vela in mesclar_velas(*velas_baixadas)
+                       if inicio_ms <= int(vela[0]) <= fim_ms]
+        baixadas = salvar_velas(cripto, tempo_grafico, velas_novas, pasta)
+        velas = carregar_velas(cripto, tempo_grafico, inicio_ms, fim_ms, pasta)
+
+        # O que continuar faltando depois de baixar não existe na corretora. O fim fica
+        # de fora, porque ainda pode ganhar velas novas
+        ainda_faltando = [trecho for trecho in
+                          trechos_faltando(velas['tempo_abertura'], inicio_ms, fim_ms, tempo_grafico, vazios)
+                          if trecho[1] < fim_ms]
+        if ainda_faltando:
+            _salvar_vazios(cripto, tempo_grafico, vazios + ainda_faltando, pasta)
+
+    print(f'{cripto} ({tempo_grafico}m): {velas_locais} velas locais, {baixadas} baixadas.', flush=True)
+    return velas
@@ -0,0 +1,457 @@
+import math
+from collections import deque
+
+# Indicadores incrementais: cada um guarda o estado e atualiza em tempo constante a cada
+# vela, em vez de recalcular as 1000 velas a cada volta do loop. Os valores batem com as
+# fórmulas do pandas usadas em funcoes_bybit.busca_velas e nos live_trading_*.
+#
+# atualizar(..., revisar=True) troca a última vela (a vela aberta mudou de preço) em vez de
+# acrescentar uma nova. aquecer(dados) passa o histórico de uma vez para começar já quente.
+
+NAN = float('nan')
+
+# Os DataFrames dos live_trading_* usam os nomes da Bybit em inglês
+COLUNAS_EM_INGLES = {
+    'open_time': 'tempo_abertura',
+    'open': 'abertura',
+    'high': 'maxima',
+    'low': 'minima',
+    'close': 'fechamento',
+    'volume': 'volume',
+    'turnover': 'turnover',
+}
+
+
+def _colunas(dados):
+    return {COLUNAS_EM_INGLES.get(nome, nome): list(dados[nome]) for nome in dados.keys()}
+
+
+class _Ema:
+    # ewm(span, adjust=False) ou, com ajustada=True, ewm(span) (adjust=True do pandas)
+    def __init__(self, periodo, ajustada=False):
+        self.alfa = 2 / (periodo + 1)
+        self.ajustada = ajustada
+        self.numerador = self.denominador = None
+        self._anterior = (None, None)
+
+    def atualizar(self, x, revisar=False):
+        if revisar:
+            numerador, denominador = self._anterior
+        else:
+            self._anterior = numerador, denominador = self.numerador, self.denominador
+        if numerador is None:
+            self.numerador, self.denominador = x, 1.0
+        elif self.ajustada:
+            self.numerador = x + (1 - self.alfa) * numerador
+            self.denominador = 1 + (1 - self.alfa) * denominador
+        else:
+            self.numerador = self.alfa * x + (1 - self.alfa) * numerador
+        return self.valor
+
+    @property
+    def valor(self):
+        if self.numerador is None:
+            return NAN
+        return self.numerador / self.denominador if self.ajustada else self.numerador
+
+
+class _Janela:
+    # Janela móvel com soma e soma dos quadrados, como rolling(periodo) do pandas:
+    # o resultado é NaN até a janela encher ou se houver NaN dentro dela
+    def __init__(self, periodo):
+        self.periodo = periodo
+        self.valores = deque()
+        self.nans = 0
+        self.soma = 0.0
+        self.soma_quadrados = 0.0
+        # Somas deslocadas pelo primeiro valor, para não perder precisão na variância
+        self.referencia = None
+
+    def _somar(self, x, sinal):
+        if x != x:
+            self.nans += sinal
+            return
+        if self.referencia is None:
+            self.referencia = x
+        desvio = x - self.referencia
+        self.soma += sinal * desvio
+        self.soma_quadrados += sinal * desvio * desvio
+
+    def atualizar(self, x, revisar=False):
+        if revisar and self.valores:
+            self._somar(self.valores[-1], -1)
+            self.valores[-1] = x
+        else:
+            self.valores.append(x)
+            if len(self.valores) > self.periodo:
+                self._somar(self.valores.popleft(), -1)
+        self._somar(x, 1)
+
+    @property
+    def cheia(self):
+        return len(self.valores) == self.periodo and not self.nans
+
+    @property
+    def total(self):
+        if not self.cheia:
+            return NAN
+        return self.soma + self.referencia * self.periodo
+
+    @property
+    def media(self):
+        if not self.cheia:
+            return NAN
+        return self.soma / self.periodo + self.referencia
+
+    @property
+    def desvio_padrao(self):
+        # Amostral (ddof=1), como rolling().std()
+        if not self.cheia or self.periodo < 2:
+            return NAN
+        variancia = (self.soma_quadrados - self.soma * self.soma / self.periodo) / (self.periodo - 1)
+        return math.sqrt(max(variancia, 0.0))
+
+
+class _Extremo:
+    # Máximo (ou mínimo) da janela móvel, como rolling(periodo).max()/.min(): deque
+    # monotônica com os candidatos (índice, valor), o melhor na frente. NaN até a janela
+    # encher ou se houver NaN dentro dela. Revisar desfaz a última vela e aplica de novo.
+    def __init__(self, periodo, maior=True):
+        self.periodo = periodo
+        self.maior = maior
+        self.valores = deque()
+        self.nans = 0
+        self.candidatos = deque()
+        self.indice = -1
+        self._desfazer = None
+
+    def _domina(self, x, y):
+        return x >= y if self.maior else x <= y
+
+    def _desfazer_ultima(self):
+        x, saiu, removidos, expirado = self._desfazer
+        if x == x:
+            self.candidatos.pop()
+        self.candidatos.extend(reversed(removidos))
+        if expirado is not None:
+            self.candidatos.appendleft(expirado)
+        self.valores.pop()
+        if x != x:
+            self.nans -= 1
+        if saiu is not None:
+            self.valores.appendleft(saiu)
+            if saiu != saiu:
+                self.nans += 1
+        self.indice -= 1
+
+    def atualizar(self, x, revisar=False):
+        if revisar and self._desfazer is not None:
+            self._desfazer_ultima()
+        self.indice += 1
+        self.valores.append(x)
+        if x != x:
+            self.nans += 1
+        saiu = None
+        if len(self.valores) > self.periodo:
+            saiu = self.valores.popleft()
+            if saiu != saiu:
+                self.nans -= 1
+
+        removidos = []
+        if x == x:
+            while self.candidatos and self._domina(x, self.candidatos[-1][1]):
+                removidos.append(self.candidatos.pop())
+            self.candidatos.append((self.indice, x))
+        # Os índices andam de um em um: no máximo um candidato sai da janela por vela
+        expirado = None
+        if self.candidatos and self.candidatos[0][0] <= self.indice - self.periodo:
+            expirado = self.candidatos.popleft()
+        self._desfazer = (x, saiu, removidos, expirado)
+
+    @property
+    def valor(self):
+        if len(self.valores) < self.periodo or self.nans or not self.candidatos:
+            return NAN
+        return self.candidatos[0][1]
+
+
+class _Indicador:
+    campos = ('maxima', 'minima', 'fechamento', 'volume')
+
+    def aquecer(self, dados):
+        """
+        Passa o histórico (DataFrame ou dict de arrays com as colunas de
+        data_loader.DTYPE_VELAS) e retorna o valor da última vela.
+        """
+        colunas = _colunas(dados)
+        valor = NAN
+        for valores in zip(*(colunas[campo] for campo in self.campos)):
+            valor = self.atualizar(*valores)
+        return valor
+
+
+class _UltimosDois:
+    # Guarda o valor da vela anterior para poder revisar a última
+    def __init__(self):
+        self.anterior = self.atual = NAN
+
+    def atualizar(self, x, revisar=False):
+        if not revisar:
+            self.anterior = self.atual
+        self.atual = x
+        return self.anterior
+
+
+class EMA(_Indicador):
+    """ewm(span=periodo, adjust=False).mean() de `campo`."""
+
+    def __init__(self, periodo, campo='fechamento', ajustada=False):
+        self.campos = (campo,)
+        self.ema = _Ema(periodo, ajustada)
+
+    def atualizar(self, x, revisar=False):
+        return self.ema.atualizar(x, revisar)
+
+    @property
+    def valor(self):
+        return self.ema.valor
+
+
+class RSI(_Indicador):
+    """
+    RSI com médias móveis simples (calcula_rsi e os live_trading_*) ou, com
+    metodo='ewm', com ewm(span=periodo) como em funcoes_bybit.busca_velas.
+    """
+
+    campos = ('fechamento',)
+
+    def __init__(self, periodo=14, metodo='sma'):
+        self.fechamentos = _UltimosDois()
+        if metodo == 'ewm':
+            self.ganhos, self.perdas = _Ema(periodo, ajustada=True), _Ema(periodo, ajustada=True)
+            self._media = lambda media: media.valor
+        else:
+            self.ganhos, self.perdas = _Janela(periodo), _Janela(periodo)
+            self._media = lambda janela: janela.media
+        self.valor = NAN
+
+    def atualizar(self, fechamento, revisar=False):
+        anterior = self.fechamentos.atualizar(fechamento, revisar)
+        # Na primeira vela o diff é NaN, e where(delta > 0, 0) vira 0
+        delta = fechamento - anterior
+        self.ganhos.atualizar(delta if delta > 0 else 0.0, revisar)
+        self.perdas.atualizar(-delta if delta < 0 else 0.0, revisar)
+        ganho, perda = self._media(self.ganhos), self._media(self.perdas)
+        if perda == 0:
+            rs = math.inf if ganho > 0 else NAN
+        else:
+            rs = ganho / perda
+        self.valor = 100 - (100 / (1 + rs)) if rs == rs else NAN
+        return self.valor
+
+
+class ATR(_Indicador):
+    """Média móvel simples do true range, como calcular_atr."""
+
+    campos = ('maxima', 'minima', 'fechamento')
+
+    def __init__(self, periodo=14):
+        self.fechamentos = _UltimosDois()
+        self.true_range = _Janela(periodo)
+        self.tr = NAN
+
+    def atualizar(self, maxima, minima, fechamento, revisar=False):
+        anterior = self.fechamentos.atualizar(fechamento, revisar)
+        self.tr = maxima - minima
+        if anterior == anterior:
+            self.tr = max(self.tr, abs(maxima - anterior), abs(minima - anterior))
+        self.true_range.atualizar(self.tr, revisar)
+        return self.valor
+
+    @property
+    def valor(self):
+        return self.true_range.media
+
+
+class ADX(_Indicador):
+    """
+    ADX como calcular_adx dos live_trading_*: DI pela soma móvel do +DM/-DM sobre a
+    soma móvel do ATR, e ADX como média móvel simples do DX.
+    """
+
+    campos = ('maxima', 'minima', 'fechamento')
+
+    def __init__(self, periodo=14, periodo_atr=None):
+        self.atr = ATR(periodo_atr or periodo)
+        self.maximas = _UltimosDois()
+        self.minimas = _UltimosDois()
+        self.soma_mais = _Janela(periodo)
+        self.soma_menos = _Janela(periodo)
+        self.soma_atr = _Janela(periodo)
+        self.dx = _Janela(periodo)
+        self.mais_di = self.menos_di = NAN
+
+    def atualizar(self, maxima, minima, fechamento, revisar=False):
+        atr = self.atr.atualizar(maxima, minima, fechamento, revisar)
+        # Mesma conta do original: as duas diferenças são diff() (atual - anterior)
+        diferenca_maxima = maxima - self.maximas.atualizar(maxima, revisar)
+        diferenca_minima = minima - self.minimas.atualizar(minima, revisar)
+        mais_dm = diferenca_maxima if diferenca_maxima > diferenca_minima and diferenca_maxima > 0 else 0.0
+        menos_dm = diferenca_minima if diferenca_minima > diferenca_maxima and diferenca_minima > 0 else 0.0
+
+        self.soma_mais.atualizar(mais_dm, revisar)
+        self.soma_menos.atualizar(menos_dm, revisar)
+        self.soma_atr.atualizar(atr, revisar)
+        soma_atr = self.soma_atr.total
+        self.mais_di = 100 * (self.soma_mais.total / soma_atr) if soma_atr else NAN
+        self.menos_di = 100 * (self.soma_menos.total / soma_atr) if soma_atr else NAN
+        soma_di = self.mais_di + self.menos_di
+        dx = 100 * abs(self.mais_di - self.menos_di) / soma_di if soma_di else NAN
+        self.dx.atualizar(dx, revisar)
+        return self.valor
+
+    @property
+    def valor(self):
+        return self.dx.media
+
+
+class CCI(_Indicador):
+    """
+    CCI com desvio médio absoluto, como calcular_cci. O desvio médio precisa percorrer
+    a janela, então custa `periodo` operações por vela, independente do histórico.
+    """
+
+    campos = ('maxima', 'minima', 'fechamento')
+
+    def __init__(self, periodo=20):
+        self.preco_tipico = _Janela(periodo)
+        self.valor = NAN
+
+    def atualizar(self, maxima, minima, fechamento, revisar=False):
+        tipico = (maxima + minima + fechamento) / 3
+        self.preco_tipico.atualizar(tipico, revisar)
+        media = self.preco_tipico.media
+        if media != media:
+            self.valor = NAN
+            return self.valor
+        valores = self.preco_tipico.valores
+        media_exata = math.fsum(valores) / len(valores)
+        desvio_medio = math.fsum(abs(x - media_exata) for x in valores) / len(valores)
+        self.valor = (tipico - media) / (0.015 * desvio_medio) if desvio_medio else NAN
+        return self.valor
+
+
+class VWAP(_Indicador):
+    """VWAP móvel: soma(fechamento * volume) / soma(volume) nas últimas `periodo` velas."""
+
+    campos = ('fechamento', 'volume')
+
+    def __init__(self, periodo=20):
+        self.numerador = _Janela(periodo)
+        self.volume = _Janela(periodo)
+
+    def atualizar(self, fechamento, volume, revisar=False):
+        self.numerador.atualizar(fechamento * volume, revisar)
+        self.volume.atualizar(volume, revisar)
+        return self.valor
+
+    @property
+    def valor(self):
+        volume = self.volume.total
+        return self.numerador.total / volume if volume else NAN
+
+
+class Bollinger(_Indicador):
+    """Bandas de Bollinger como calcular_bollinger_bands: (meio, superior, inferior, largura)."""
+
+    campos = ('fechamento',)
+
+    def __init__(self, periodo=20, desvio=2):
+        self.janela = _Janela(periodo)
+        self.desvio = desvio
+
+    def atualizar(self, fechamento, revisar=False):
+        self.janela.atualizar(fechamento, revisar)
+        return self.valor
+
+    @property
+    def valor(self):
+        meio = self.janela.media
+        distancia = self.janela.desvio_padrao * self.desvio
+        superior, inferior = meio + distancia, meio - distancia
+        return meio, superior, inferior, (superior - inferior) / meio
+
+
+class Momentum(_Indicador):
+    """fechamento / fechamento de `periodo` velas atrás * 100, como calcula_momentum."""
+
+    campos = ('fechamento',)
+
+    def __init__(self, periodo=10):
+        self.fechamentos = deque(maxlen=periodo + 1)
+
+    def atualizar(self, fechamento, revisar=False):
+        if revisar and self.fechamentos:
+            self.fechamentos[-1] = fechamento
+        else:
+            self.fechamentos.append(fechamento)
+        return self.valor
+
+    @property
+    def valor(self):
+        if len(self.fechamentos) < self.fechamentos.maxlen or not self.fechamentos[0]:
+            return NAN
+        return self.fechamentos[-1] / self.fechamentos[0] * 100
+
+
+class WilliamsR(_Indicador):
+    """
+    Williams %R como calcula_williams_r. Máxima e mínima da janela por deque monotônica:
+    custo constante amortizado por vela (revisar a vela aberta pode custar até `periodo`).
+    """
+
+    campos = ('maxima', 'minima', 'fechamento')
+
+    def __init__(self, periodo=14):
+        self.maior_maxima = _Extremo(periodo, maior=True)
+        self.menor_minima = _Extremo(periodo, maior=False)
+        self.valor = NAN
+
+    def atualizar(self, maxima, minima, fechamento, revisar=False):
+        self.maior_maxima.atualizar(maxima, revisar)
+        self.menor_minima.atualizar(minima, revisar)
+        maior, menor = self.maior_maxima.valor, self.menor_minima.valor
+        amplitude = maior - menor
+        # Amplitude zero ou NaN: o NumPy dá NaN (0/0) em calcula_williams_r
+        self.valor = -100 * ((maior - fechamento) / amplitude) if amplitude else NAN
+        return self.valor
+
+
+class IndicadoresIncrementais:
+    """
+    Agrupa indicadores por nome e decide sozinho se a vela é nova ou revisão da
+    última pelo tempo de abertura. Exemplo:
+
+        indicadores = IndicadoresIncrementais({'EMA_9': EMA(9), 'RSI': RSI(14), 'ATR': ATR(14)})
+        indicadores.aquecer(df)
+        valores = indicadores.atualizar(vela)   # vela com tempo_abertura, maxima, ...
+    """
+
+    def __init__(self, indicadores):
+        self.indicadores = indicadores
+        self.ultimo_tempo = None
+        self.valores = {}
+
+    def atualizar(self, vela):
+        revisar = vela['tempo_abertura'] == self.ultimo_tempo
+        self.ultimo_tempo = vela['tempo_abertura']
+        for nome, indicador in self.indicadores.items():
+            self.valores[nome] = indicador.atualizar(*(vela[campo] for campo in indicador.campos),
+                                                     revisar=revisar)
+        return self.valores
+
+    def aquecer(self, dados):
+        colunas = _colunas(dados)
+        for i in range(len(colunas['tempo_abertura'])):
+            self.atualizar({campo: valores[i] for campo, valores in colunas.items()})
+        return self.valores
@@ -1,7 +1,166 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
 # função para calcular RSI
 def calcula_rsi(df, periodo=14):
     delta = df['fechamento'].diff()
     gain = (delta.where(delta > 0, 0)).rolling(window=periodo).mean()
     loss = (-delta.where(delta < 0, 0)).rolling(window=periodo).mean()
     rs = gain / loss
-    return 100 - (100 / (1 + rs))
\ No newline at end of file
+    return 100 - (100 / (1 + rs))
+
+# Desvio médio absoluto em janela móvel, igual a
+# rolling(periodo).apply(lambda x: np.mean(np.abs(x - np.mean(x)))), sem uma chamada Python por janela
+def desvio_medio_absoluto(valores, periodo=20, bloco=65536):
+    valores = np.asarray(valores, dtype=np.float64)
+    resultado = np.full(len(valores), np.nan)
+    if len(valores) < periodo:
+        return resultado
+    janelas = sliding_window_view(valores, periodo)
+    # Em blocos, para a matriz temporária (linhas x período) não crescer com o histórico
+    for inicio in range(0, len(janelas), bloco):
+        parte = janelas[inicio:inicio + bloco]
+        media = parte.mean(axis=1, keepdims=True)
+        resultado[inicio + periodo - 1:inicio + periodo - 1 + len(parte)] = np.abs(parte - media).mean(axis=1)
+    return resultado
+
+# função para calcular CCI
+def calcula_cci(maxima, minima, fechamento, periodo=20, preco_tipico=None):
+    if preco_tipico is None:
+        preco_tipico = (np.asarray(maxima, dtype=np.float64) + np.asarray(minima, dtype=np.float64) +
+                        np.asarray(fechamento, dtype=np.float64)) / 3
+    janelas = sliding_window_view(preco_tipico, periodo) if len(preco_tipico) >= periodo else None
+    media = np.full(len(preco_tipico), np.nan)
+    if janelas is not None:
+        media[periodo - 1:] = janelas.mean(axis=1)
+    return (preco_tipico - media) / (0.015 * desvio_medio_absoluto(preco_tipico, periodo))
+
+# Indicadores dos live_trading_*, com as mesmas fórmulas de lá, retornando arrays em vez
+# de gravar colunas auxiliares no DataFrame. As janelas seguem rolling(periodo) do pandas:
+# NaN até a janela encher ou enquanto houver NaN dentro dela.
+def _array(valores):
+    return np.asarray(valores, dtype=np.float64)
+
+def _janela_movel(valores, periodo, funcao):
+    resultado = np.full(len(valores), np.nan)
+    if len(valores) >= periodo:
+        resultado[periodo - 1:] = funcao(sliding_window_view(valores, periodo), axis=1)
+    return resultado
+
+def _anterior(valores, deslocamento=1):
+    # Como shift(deslocamento)
+    resultado = np.full(len(valores), np.nan)
+    if len(valores) > deslocamento:
+        resultado[deslocamento:] = valores[:-deslocamento]
+    return resultado
+
+def true_range(maxima, minima, fechamento):
+    maxima, minima = _array(maxima), _array(minima)
+    fechamento_anterior = _anterior(_array(fechamento))
+    # fmax ignora o NaN da primeira vela, como max(axis=1) do pandas
+    return np.fmax(maxima - minima, np.fmax(np.abs(maxima - fechamento_anterior),
+                                            np.abs(minima - fechamento_anterior)))
+
+def calcula_atr(maxima, minima, fechamento, periodo=14, tr=None):
+    if tr is None:
+        tr = true_range(maxima, minima, fechamento)
+    return _janela_movel(tr, periodo, np.mean)
+
+def calcula_adx(maxima, minima, fechamento, periodo=14, atr=None):
+    # DI pela soma móvel do +DM/-DM sobre a soma móvel do ATR; o ADX é a média móvel do DX
+    maxima, minima = _array(maxima), _array(minima)
+    if atr is None:
+        atr = calcula_atr(maxima, minima, fechamento, periodo)
+    diferenca_maxima = maxima - _anterior(maxima)
+    diferenca_minima = minima - _anterior(minima)
+    mais_dm = np.where((diferenca_maxima > diferenca_minima) & (diferenca_maxima > 0), diferenca_maxima, 0.0)
+    menos_dm = np.where((diferenca_minima > diferenca_maxima) & (diferenca_minima > 0), diferenca_minima, 0.0)
+
+    soma_atr = _janela_movel(atr, periodo, np.sum)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mais_di = 100 * (_janela_movel(mais_dm, periodo, np.sum) / soma_atr)
+        menos_di = 100 * (_janela_movel(menos_dm, periodo, np.sum) / soma_atr)
+        dx = 100 * np.abs(mais_di - menos_di) / (mais_di + menos_di)
+    return _janela_movel(dx, periodo, np.mean)
+
+def preco_tipico(maxima, minima, fechamento):
+    return (_array(maxima) + _array(minima) + _array(fechamento)) / 3
+
+def calcula_vwap(fechamento, volume, periodo=20):
+    fechamento, volume = _array(fechamento), _array(volume)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return _janela_movel(fechamento * volume, periodo, np.sum) / _janela_movel(volume, periodo, np.sum)
+
+def calcula_momentum(fechamento, periodo=10):
+    fechamento = _array(fechamento)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return fechamento / _anterior(fechamento, periodo) * 100
+
+def calcula_williams_r(maxima, minima, fechamento, periodo=14):
+    maior_maxima = _janela_movel(_array(maxima), periodo, np.max)
+    menor_minima = _janela_movel(_array(minima), periodo, np.min)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return -100 * ((maior_maxima - _array(fechamento)) / (maior_maxima - menor_minima))
+
+# Nomes das colunas como nos DataFrames dos live_trading_* (Bybit, em inglês) e no
+# armazenamento de velas (data_loader.DTYPE_VELAS)
+_NOMES_DAS_COLUNAS = {
+    'maxima': ('high', 'maxima'),
+    'minima': ('low', 'minima'),
+    'fechamento': ('close', 'fechamento'),
+    'volume': ('volume',),
+}
+
+def _coluna(velas, campo):
+    for nome in _NOMES_DAS_COLUNAS[campo]:
+        if nome in velas.keys():
+            return _array(velas[nome])
+    raise KeyError(f'Velas sem a coluna {campo}')
+
+def calcula_indicadores(velas, pedidos):
+    """
+    Calcula de uma vez os indicadores pedidos, no formato {'ATR': 14, 'ADX': 14, 'CCI': 20,
+    'VWAP': 20, 'Momentum': 10, 'Williams_R': 14} (nome: período), e retorna {nome: array}.
+
+    `velas` é um DataFrame ou dict de arrays com as colunas em inglês (high, low, close,
+    volume) ou como em data_loader.DTYPE_VELAS. O true range e o preço típico são
+    calculados uma vez só, e o ADX reaproveita o ATR pedido, como nos live_trading_*.
+    """
+    colunas = {}
+    intermediarios = {}
+
+    def coluna(campo):
+        if campo not in colunas:
+            colunas[campo] = _coluna(velas, campo)
+        return colunas[campo]
+
+    def intermediario(chave, calcular):
+        if chave not in intermediarios:
+            intermediarios[chave] = calcular()
+        return intermediarios[chave]
+
+    def atr(periodo):
+        tr = intermediario('true_range', lambda: true_range(coluna('maxima'), coluna('minima'), coluna('fechamento')))
+        return intermediario(('ATR', periodo), lambda: calcula_atr(None, None, None, periodo, tr=tr))
+
+    def adx(periodo):
+        # O ADX usa o ATR já calculado; sem ATR pedido, usa o do mesmo período
+        return calcula_adx(coluna('maxima'), coluna('minima'), coluna('fechamento'), periodo,
+                           atr=atr(pedidos.get('ATR', periodo)))
+
+    def cci(periodo):
+        tipico = intermediario('preco_tipico', lambda: preco_tipico(coluna('maxima'), coluna('minima'), coluna('fechamento')))
+        return calcula_cci(None, None, None, periodo, preco_tipico=tipico)
+
+    calculos = {
+        'ATR': atr,
+        'ADX': adx,
+        'CCI': cci,
+        'VWAP': lambda periodo: calcula_vwap(coluna('fechamento'), coluna('volume'), periodo),
+        'Momentum': lambda periodo: calcula_momentum(coluna('fechamento'), periodo),
+        'Williams_R': lambda periodo: calcula_williams_r(coluna('maxima'), coluna('minima'), coluna('fechamento'), periodo),
+    }
+    desconhecidos = set(pedidos) - set(calculos)
+    if desconhecidos:
+        raise ValueError(f'Indicadores desconhecidos: {sorted(desconhecidos)}')
+    return {nome: calculos[nome](periodo) for nome, periodo in pedidos.items()}
@@ -0,0 +1,111 @@
+import threading
+import time
+from decimal import Decimal, ROUND_DOWN, ROUND_HALF_UP
+
+# Dados dos instrumentos da Bybit (quantidade mínima, passo da quantidade, tick do preço)
+# carregados de uma vez por categoria (paginado) e guardados por `ttl` segundos, para
+# dimensionar ordens sem chamar get_instruments_info a cada entrada. Se a atualização
+# falhar, segue com os dados que já tem; invalidar() força a recarga (ex.: ordem recusada
+# por quantidade ou preço fora do passo).
+
+
+class RegistroDeInstrumentos:
+    """
+    Uso:
+        instrumentos = RegistroDeInstrumentos(cliente)
+        instrumentos.quantidade_minima('BTCUSDT')             # 0.001
+        instrumentos.arredondar_quantidade('BTCUSDT', 0.0127)  # Decimal('0.012')
+        instrumentos.arredondar_preco('BTCUSDT', 60123.456)    # Decimal('60123.5')
+
+    Nada é buscado até a primeira consulta de uma categoria ('linear' ou 'spot').
+    """
+
+    def __init__(self, cliente, ttl=3600):
+        self.cliente = cliente
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        # categoria -> {simbolo: dados}
+        self.instrumentos = {}
+        self.carregado_em = {}
+        self.requisicoes_rest = 0
+
+    @staticmethod
+    def _dados(instrumento):
+        lote, preco = instrumento['lotSizeFilter'], instrumento['priceFilter']
+        # Spot não tem qtyStep: o passo da quantidade é a basePrecision
+        passo = lote.get('qtyStep') or lote.get('basePrecision') or lote['minOrderQty']
+        return {
+            'qtd_minima': Decimal(lote['minOrderQty']),
+            'qtd_maxima': Decimal(lote['maxOrderQty']),
+            'passo_qtd': Decimal(passo),
+            'tick': Decimal(preco['tickSize']),
+            'status': instrumento.get('status'),
+        }
+
+    def carregar(self, categoria='linear'):
+        """Busca todos os instrumentos da categoria (todas as páginas) e troca o cache"""
+        instrumentos, cursor = {}, None
+        while True:
+            parametros = {'category': categoria, 'limit': 1000}
+            if cursor:
+                parametros['cursor'] = cursor
+            self.requisicoes_rest += 1
+            resultado = self.cliente.get_instruments_info(**parametros)['result']
+            for instrumento in resultado['list']:
+                instrumentos[instrumento['symbol']] = self._dados(instrumento)
+            cursor = resultado.get('nextPageCursor')
+            if not cursor or not resultado['list']:
+                break
+        with self.lock:
+            self.instrumentos[categoria] = instrumentos
+            self.carregado_em[categoria] = time.time()
+        return len(instrumentos)
+
+    def _buscar_simbolo(self, simbolo, categoria):
+        # Símbolo listado depois da última carga
+        self.requisicoes_rest += 1
+        lista = self.cliente.get_instruments_info(category=categoria, symbol=simbolo)['result']['list']
+        if not lista:
+            raise KeyError(f'Instrumento desconhecido: {simbolo} ({categoria})')
+        dados = self._dados(lista[0])
+        with self.lock:
+            self.instrumentos.setdefault(categoria, {})[simbolo] = dados
+        return dados
+
+    def instrumento(self, simbolo, categoria='linear'):
+        with self.lock:
+            carregado_em = self.carregado_em.get(categoria)
+            dados = self.instrumentos.get(categoria, {}).get(simbolo)
+        if carregado_em is None or time.time() - carregado_em > self.ttl:
+            try:
+                self.carregar(categoria)
+            except Exception as e:
+                if dados is None:
+                    raise
+                print(f'Erro ao atualizar os instrumentos {categoria}, usando os dados em cache: {e}', flush=True)
+            with self.lock:
+                dados = self.instrumentos.get(categoria, {}).get(simbolo, dados)
+        if dados is None:
+            dados = self._buscar_simbolo(simbolo, categoria)
+        return dados
+
+    def invalidar(self, simbolo=None, categoria='linear'):
+        """Força a recarga na próxima consulta (de um símbolo ou da categoria inteira)"""
+        with self.lock:
+            if simbolo is None:
+                self.carregado_em.pop(categoria, None)
+            else:
+                self.instrumentos.get(categoria, {}).pop(simbolo, None)
+
+    def quantidade_minima(self, simbolo, categoria='linear'):
+        return float(self.instrumento(simbolo, categoria)['qtd_minima'])
+
+    def arredondar_quantidade(self, simbolo, quantidade, categoria='linear'):
+        """Quantidade para baixo no passo do instrumento (Decimal, como quantidade_cripto_para_operar)"""
+        passo = self.instrumento(simbolo, categoria)['passo_qtd']
+        return (Decimal(str(quantidade)) / passo).to_integral_value(rounding=ROUND_DOWN) * passo
+
+    def arredondar_preco(self, simbolo, preco, categoria='linear'):
+        """Preço no tick mais próximo do instrumento"""
+        tick = self.instrumento(simbolo, categoria)['tick']
+        return (Decimal(str(preco)) / tick).to_integral_value(rounding=ROUND_HALF_UP) * tick
@@ -2,6 +2,8 @@ from pybit.unified_trading import HTTP
 from estado_trade import EstadoDeTrade
 from funcoes_bybit import busca_velas, tem_trade_aberto, saldo_da_conta, quantidade_minima_para_operar, abre_compra, abre_venda, abre_parcial_venda, abre_parcial_compra, stop_breakeven_compra, stop_breakeven_venda
 from utilidades import quantidade_cripto_para_operar
+from indicadores_osciladores import calcula_indicadores
+from cache_indicadores import em_cache
 import time
 from dotenv import load_dotenv
 import os
@@ -61,31 +63,6 @@ print(f'Volume Threshold: {volume_threshold}x', flush=True)
 print(f'Detecção de Reversões: {min_velas_consecutivas}-{max_velas_consecutivas} velas consecutivas', flush=True)
 
 # ===== INDICADORES QUANTITATIVOS PARA REVERSÕES =====
-def calcular_atr(df, periodo=14):
-    """Calcula Average True Range otimizado"""
-    df['high_low'] = df['high'] - df['low']
-    df['high_close'] = abs(df['high'] - df['close'].shift())
-    df['low_close'] = abs(df['low'] - df['close'].shift())
-    df['tr'] = df[['high_low', 'high_close', 'low_close']].max(axis=1)
-    df['ATR'] = df['tr'].rolling(window=periodo).mean()
-    return df
-
-def calcular_adx(df, periodo=14):
-    """Calcula Average Directional Index - força da tendência"""
-    df['high_diff'] = df['high'].diff()
-    df['low_diff'] = df['low'].diff()
-    
-    df['plus_dm'] = np.where((df['high_diff'] > df['low_diff']) & (df['high_diff'] > 0), df['high_diff'], 0)
-    df['minus_dm'] = np.where((df['low_diff'] > df['high_diff']) & (df['low_diff'] > 0), df['low_diff'], 0)
-    
-    df['plus_di'] = 100 * (df['plus_dm'].rolling(window=periodo).sum() / df['ATR'].rolling(window=periodo).sum())
-    df['minus_di'] = 100 * (df['minus_dm'].rolling(window=periodo).sum() / df['ATR'].rolling(window=periodo).sum())
-    
-    df['dx'] = 100 * abs(df['plus_di'] - df['minus_di']) / (df['plus_di'] + df['minus_di'])
-    df['ADX'] = df['dx'].rolling(window=periodo).mean()
-    
-    return df
-
 def contar_velas_consecutivas(df):
     """Conta velas consecutivas verdes (compra) ou vermelhas (venda) para reversões"""
     if len(df) < 10:
@@ -152,8 +129,9 @@ def calcular_indicadores_quantitativos(df):
         df['Volume_EMA_20'] = df['volume'].ewm(span=volume_ma_periodo, adjust=False).mean()
         
         # Indicadores para detecção de reversões
-        df = calcular_atr(df, 14)
-        df = calcular_adx(df, adx_periodo)
+        pedidos = {'ATR': 14, 'ADX': adx_periodo}
+        df = df.assign(**em_cache(df, 'calcula_indicadores', tuple(pedidos.items()),
+                                  lambda: calcula_indicadores(df, pedidos)))
         
         return df
         
@@ -2,6 +2,8 @@ from pybit.unified_trading import HTTP
 from estado_trade import EstadoDeTrade
 from funcoes_bybit import busca_velas, tem_trade_aberto, saldo_da_conta, quantidade_minima_para_operar, abre_compra, abre_venda, abre_parcial_venda, abre_parcial_compra, stop_breakeven_compra, stop_breakeven_venda
 from utilidades import quantidade_cripto_para_operar
+from indicadores_osciladores import calcula_indicadores
+from cache_indicadores import em_cache
 import time
 from dotenv import load_dotenv
 import os
@@ -55,59 +57,6 @@ print(f'Timeframe Principal: {tf_principal}', flush=True)
 print(f'Timeframe Confirmação: {tf_confirmacao}', flush=True)
 print(f'Score Mínimo para Entrada: {score_minimo_entrada}/{score_maximo}', flush=True)
 
-# ===== INDICADORES QUANTITATIVOS APRIMORADOS =====
-def calcular_atr(df, periodo=14):
-    """Calcula Average True Range otimizado"""
-    df['high_low'] = df['high'] - df['low']
-    df['high_close'] = abs(df['high'] - df['close'].shift())
-    df['low_close'] = abs(df['low'] - df['close'].shift())
-    df['tr'] = df[['high_low', 'high_close', 'low_close']].max(axis=1)
-    df['ATR'] = df['tr'].rolling(window=periodo).mean()
-    return df
-
-def calcular_adx(df, periodo=14):
-    """Calcula Average Directional Index - força da tendência"""
-    df['high_diff'] = df['high'].diff()
-    df['low_diff'] = df['low'].diff()
-    
-    df['plus_dm'] = np.where((df['high_diff'] > df['low_diff']) & (df['high_diff'] > 0), df['high_diff'], 0)
-    df['minus_dm'] = np.where((df['low_diff'] > df['high_diff']) & (df['low_diff'] > 0), df['low_diff'], 0)
-    
-    df['plus_di'] = 100 * (df['plus_dm'].rolling(window=periodo).sum() / df['ATR'].rolling(window=periodo).sum())
-    df['minus_di'] = 100 * (df['minus_dm'].rolling(window=periodo).sum() / df['ATR'].rolling(window=periodo).sum())
-    
-    df['dx'] = 100 * abs(df['plus_di'] - df['minus_di']) / (df['plus_di'] + df['minus_di'])
-    df['ADX'] = df['dx'].rolling(window=periodo).mean()
-    
-    return df
-
-def calcular_cci(df, periodo=20):
-    """Calcula Commodity Channel Index - identificação de extremos"""
-    tp = (df['high'] + df['low'] + df['close']) / 3
-    sma_tp = tp.rolling(window=periodo).mean()
-    mad = tp.rolling(window=periodo).apply(lambda x: np.mean(np.abs(x - np.mean(x))))
-    df['CCI'] = (tp - sma_tp) / (0.015 * mad)
-    return df
-
-def calcular_vwap(df, periodo=20):
-    """Calcula Volume Weighted Average Price - preço médio ponderado por volume"""
-    df['vwap_num'] = (df['close'] * df['volume']).rolling(window=periodo).sum()
-    df['vwap_den'] = df['volume'].rolling(window=periodo).sum()
-    df['VWAP'] = df['vwap_num'] / df['vwap_den']
-    return df
-
-def calcular_momentum(df, periodo=10):
-    """Calcula Momentum - velocidade da mudança de preço"""
-    df['Momentum'] = df['close'] / df['close'].shift(periodo) * 100
-    return df
-
-def calcular_williams_r(df, periodo=14):
-    """Calcula Williams %R - oscilador de momentum"""
-    highest_high = df['high'].rolling(window=periodo).max()
-    lowest_low = df['low'].rolling(window=periodo).min()
-    df['Williams_R'] = -100 * ((highest_high - df['close']) / (highest_high - lowest_low))
-    return df
-
 def buscar_dados_multi_timeframe(cripto, tf_principal, tf_confirmacao, emas):
     """Busca dados em múltiplos timeframes para análise confirmatória"""
     try:
@@ -150,12 +99,10 @@ def calcular_indicadores_quantitativos(df):
         df['Volume_EMA_20'] = df['volume'].ewm(span=volume_ma_periodo, adjust=False).mean()
         
         # Novos indicadores quantitativos
-        df = calcular_atr(df, 14)
-        df = calcular_adx(df, adx_periodo)
-        df = calcular_cci(df, cci_periodo)
-        df = calcular_vwap(df, vwap_periodo)
-        df = calcular_momentum(df, 10)
-        df = calcular_williams_r(df, 14)
+        pedidos = {'ATR': 14, 'ADX': adx_periodo, 'CCI': cci_periodo,
+                   'VWAP': vwap_periodo, 'Momentum': 10, 'Williams_R': 14}
+        df = df.assign(**em_cache(df, 'calcula_indicadores', tuple(pedidos.items()),
+                                  lambda: calcula_indicadores(df, pedidos)))
         
         return df
         
@@ -2,13 +2,15 @@ from pybit.unified_trading import HTTP
 from estado_trade import EstadoDeTrade
 from funcoes_bybit import busca_velas, tem_trade_aberto, saldo_da_conta, quantidade_minima_para_operar, abre_compra, abre_venda, abre_parcial_venda, abre_parcial_compra, stop_breakeven_compra, stop_breakeven_venda
 from utilidades import quantidade_cripto_para_operar
-from ml_predictor import MLPredictor
+from indicadores_osciladores import calcula_indicadores
+from cache_indicadores import em_cache
+from ml_predictor import MLPredictor, BackgroundTrainer
+from model_registry import ModelRegistry
 import time
 from dotenv import load_dotenv
 import os
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
 
 load_dotenv()
 
@@ -73,61 +75,19 @@ print(f'Filtro de Sequências: máx {max_velas_sequencia_permitido} velas')
 print('=' * 60)
 
 # ===== INICIALIZAR ML PREDICTOR =====
-ml_predictor = MLPredictor(forecast_horizon=1)
-ultimo_treinamento_ml = None
-
-# ===== INDICADORES QUANTITATIVOS =====
-def calcular_atr(df, periodo=14):
-    """Calcula Average True Range otimizado"""
-    df['high_low'] = df['high'] - df['low']
-    df['high_close'] = abs(df['high'] - df['close'].shift())
-    df['low_close'] = abs(df['low'] - df['close'].shift())
-    df['tr'] = df[['high_low', 'high_close', 'low_close']].max(axis=1)
-    df['ATR'] = df['tr'].rolling(window=periodo).mean()
-    return df
-
-def calcular_adx(df, periodo=14):
-    """Calcula Average Directional Index"""
-    df['high_diff'] = df['high'].diff()
-    df['low_diff'] = df['low'].diff()
-
-    df['plus_dm'] = np.where((df['high_diff'] > df['low_diff']) & (df['high_diff'] > 0), df['high_diff'], 0)
-    df['minus_dm'] = np.where((df['low_diff'] > df['high_diff']) & (df['low_diff'] > 0), df['low_diff'], 0)
-
-    df['plus_di'] = 100 * (df['plus_dm'].rolling(window=periodo).sum() / df['ATR'].rolling(window=periodo).sum())
-    df['minus_di'] = 100 * (df['minus_dm'].rolling(window=periodo).sum() / df['ATR'].rolling(window=periodo).sum())
-
-    df['dx'] = 100 * abs(df['plus_di'] - df['minus_di']) / (df['plus_di'] + df['minus_di'])
-    df['ADX'] = df['dx'].rolling(window=periodo).mean()
-
-    return df
-
-def calcular_cci(df, periodo=20):
-    """Calcula Commodity Channel Index"""
-    tp = (df['high'] + df['low'] + df['close']) / 3
-    sma_tp = tp.rolling(window=periodo).mean()
-    mad = tp.rolling(window=periodo).apply(lambda x: np.mean(np.abs(x - np.mean(x))))
-    df['CCI'] = (tp - sma_tp) / (0.015 * mad)
-    return df
-
-def calcular_vwap(df, periodo=20):
-    """Calcula Volume Weighted Average Price"""
-    df['vwap_num'] = (df['close'] * df['volume']).rolling(window=periodo).sum()
-    df['vwap_den'] = df['volume'].rolling(window=periodo).sum()
-    df['VWAP'] = df['vwap_num'] / df['vwap_den']
-    return df
-
-def calcular_momentum(df, periodo=10):
-    """Calcula Momentum"""
-    df['Momentum'] = df['close'] / df['close'].shift(periodo) * 100
-    return df
-
-def calcular_williams_r(df, periodo=14):
-    """Calcula Williams %R"""
-    highest_high = df['high'].rolling(window=periodo).max()
-    lowest_low = df['low'].rolling(window=periodo).min()
-    df['Williams_R'] = -100 * ((highest_high - df['close']) / (highest_high - lowest_low))
-    return df
+# Sem pool de processos (o retreino roda numa thread do bot, e fork com threads ativas pode
+# travar); o paralelismo fica nos modelos que aceitam n_jobs
+ml_predictor = MLPredictor(forecast_horizon=1, max_workers=1, n_jobs=-1)
+registro_modelos = ModelRegistry()
+
+# Começa prevendo com os últimos modelos salvos; o treino em segundo plano atualiza
+modelos_salvos = registro_modelos.load_latest(cripto, tf_principal, ml_predictor.forecast_horizon)
+if modelos_salvos is not None:
+    ml_predictor.hot_swap(modelos_salvos)
+
+# Treina numa thread e só troca o modelo ativo se o novo for melhor nas velas recentes
+treinador_ml = BackgroundTrainer(ml_predictor, model_name='random_forest', retrain_hours=ml_retrain_hours,
+                                 registry=registro_modelos, symbol=cripto, timeframe=tf_principal)
 
 # ===== NOVO: ANÁLISE CONTEXTUAL DE SEQUÊNCIAS =====
 def analisar_sequencia_velas(df, lookback=10):
@@ -210,42 +170,13 @@ def analisar_sequencia_velas(df, lookback=10):
 
 # ===== NOVO: INTEGRAÇÃO ML =====
 def treinar_ml_predictor(df_principal, force=False):
-    """Treina o ML Predictor (ou retreina se passou tempo suficiente)"""
-    global ultimo_treinamento_ml
-
-    # Verificar se precisa retreinar
-    agora = datetime.now()
-    if ultimo_treinamento_ml is not None and not force:
-        tempo_desde_ultimo = (agora - ultimo_treinamento_ml).total_seconds() / 3600
-        if tempo_desde_ultimo < ml_retrain_hours:
-            return False  # Não precisa retreinar ainda
-
-    try:
-        print("\n🧠 Treinando modelo ML...")
-
-        # Preparar dados
-        X_train, X_test, y_train, y_test = ml_predictor.prepare_data(df_principal)
-
-        # Treinar modelos
-        training_results = ml_predictor.train_models(X_train, y_train)
-
-        # Avaliar modelos
-        evaluation_results = ml_predictor.evaluate_models(X_test, y_test, training_results)
-
-        # Obter melhor modelo
-        best_model_name, best_result = ml_predictor.get_best_model(evaluation_results)
-
-        if best_model_name:
-            print(f"✓ Melhor modelo: {best_model_name} (R²: {best_result['r2']:.4f}, Dir Acc: {best_result['direction_accuracy']:.2%})")
-            ultimo_treinamento_ml = agora
-            return True
-        else:
-            print("✗ Nenhum modelo válido treinado")
-            return False
-
-    except Exception as e:
-        print(f"⚠️ Erro ao treinar ML: {e}")
-        return False
+    """
+    Inicia o treino do ML Predictor em segundo plano (ou o retreino, se passou tempo
+    suficiente) e retorna na hora. Retorna True se já há um modelo pronto para prever.
+    """
+    if treinador_ml.maybe_retrain(df_principal, force=force):
+        print("🧠 Treino do ML iniciado em segundo plano", flush=True)
+    return ml_predictor.is_trained()
 
 def obter_previsao_ml(df_principal, model_name='random_forest'):
     """Obtém previsão do ML para a próxima vela"""
@@ -407,12 +338,10 @@ def calcular_indicadores_quantitativos(df):
         df['Volume_EMA_20'] = df['volume'].ewm(span=volume_ma_periodo, adjust=False).mean()
 
         # Indicadores avançados
-        df = calcular_atr(df, 14)
-        df = calcular_adx(df, adx_periodo)
-        df = calcular_cci(df, cci_periodo)
-        df = calcular_vwap(df, vwap_periodo)
-        df = calcular_momentum(df, 10)
-        df = calcular_williams_r(df, 14)
+        pedidos = {'ATR': 14, 'ADX': adx_periodo, 'CCI': cci_periodo,
+                   'VWAP': vwap_periodo, 'Momentum': 10, 'Williams_R': 14}
+        df = df.assign(**em_cache(df, 'calcula_indicadores', tuple(pedidos.items()),
+                                  lambda: calcula_indicadores(df, pedidos)))
 
         return df
 
@@ -600,11 +529,9 @@ def main():
                 time.sleep(30)
                 continue
 
-            # Treinar ML se necessário (primeira vez ou retreino)
-            if not ml_treinado or ultimo_treinamento_ml is None:
-                ml_treinado = treinar_ml_predictor(df_principal, force=True)
-            else:
-                treinar_ml_predictor(df_principal, force=False)
+            # Treinar ML se necessário (primeira vez ou retreino), sem esperar o treino:
+            # até o primeiro modelo ficar pronto, as entradas usam só os scores sem ML
+            ml_treinado = treinar_ml_predictor(df_principal)
 
             # ===== GESTÃO DE POSIÇÕES ABERTAS =====
             if estado_de_trade == EstadoDeTrade.COMPRADO:
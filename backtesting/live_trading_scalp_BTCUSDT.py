@@ -1,7 +1,8 @@
 from pybit.unified_trading import HTTP
 from estado_trade import EstadoDeTrade
-from funcoes_bybit import busca_velas, tem_trade_aberto, saldo_da_conta, quantidade_minima_para_operar, abre_compra, abre_venda, abre_parcial_venda, abre_parcial_compra, stop_breakeven_compra, stop_breakeven_venda, set_leverage
+from funcoes_bybit import tem_trade_aberto, saldo_da_conta, usar_espelho_da_conta, quantidade_minima_para_operar, abre_compra_com_parcial, abre_venda_com_parcial, stop_breakeven_compra, stop_breakeven_venda, set_leverage
 from utilidades import quantidade_cripto_para_operar
+from velas_ao_vivo import VelasAoVivo
 import time
 from dotenv import load_dotenv
 import os
@@ -60,6 +61,11 @@ print(f'EMAs: {emas}', flush=True)
 # Configurar alavancagem
 set_leverage(cliente, cripto, alavancagem)
 
+# Posição e saldo pelos streams privados: o loop não vai mais ao REST a cada volta
+usar_espelho_da_conta()
+# Instrumentos carregados antes do loop: dimensionar a ordem não vai mais ao REST
+quantidade_minima_para_operar(cripto)
+
 for tentativa in range(5):
     try:
         estado_de_trade, preco_entrada, preco_stop, preco_alvo = tem_trade_aberto(cripto)
@@ -79,9 +85,16 @@ for tentativa in range(5):
 
 vela_fechou_trade = None
 
+# Velas pelo kline_stream: REST só para aquecer o histórico e reparar lacunas
+velas_ao_vivo = VelasAoVivo(cripto, tempo_grafico, emas).iniciar()
+
 while True:
     try:
-        df = busca_velas(cripto, tempo_grafico, emas)
+        # O loop roda a cada atualização da vela, logo que ela chega pelo WebSocket
+        df = velas_ao_vivo.esperar_atualizacao(timeout=60)
+        if df is None:
+            print('Nenhuma atualização das velas em 60s', flush=True)
+            continue
         if df.empty:
             print('DataFrame vazio')
             continue
@@ -175,11 +188,10 @@ while True:
                     print("Stop de compra muito curto comparado ao ATR, ignorando entrada.")
                 else:
                     preco_alvo = ((preco_entrada - preco_stop) * risco_retorno) + preco_entrada
-                    abre_compra(cripto, qtd_cripto_para_operar, preco_stop, preco_alvo)
+                    abre_compra_com_parcial(cripto, qtd_cripto_para_operar, preco_stop, preco_alvo, preco_entrada)
                     print(f"Entrou na compra AGRESSIVA da vela que abriu {df['open_time'].iloc[-1]}, Preço de entrada: {preco_entrada}, Stop: {preco_stop}, Alvo: {preco_alvo}")
                     estado_de_trade = EstadoDeTrade.COMPRADO
                     print('-' * 10)
-                    abre_parcial_compra(cripto, qtd_cripto_para_operar, preco_entrada)
 
 
             # ======= VENDA OTIMIZADA (Scalping Avançado) =======
@@ -199,11 +211,10 @@ while True:
                     print("Stop de venda muito curto comparado ao ATR, ignorando entrada.")
                 else:
                     preco_alvo = preco_entrada - ((preco_stop - preco_entrada) * risco_retorno)
-                    abre_venda(cripto, qtd_cripto_para_operar, preco_stop, preco_alvo)
+                    abre_venda_com_parcial(cripto, qtd_cripto_para_operar, preco_stop, preco_alvo, preco_entrada)
                     print(f"Entrou na venda AGRESSIVA da vela que abriu {df['open_time'].iloc[-1]}, Preço de entrada: {preco_entrada}, Stop: {preco_stop}, Alvo: {preco_alvo}")
                     estado_de_trade = EstadoDeTrade.VENDIDO
                     print('-' * 10)
-                    abre_parcial_venda(cripto, qtd_cripto_para_operar, preco_entrada)
 
 
     except ConnectionError as ce:
@@ -212,5 +223,3 @@ while True:
         print(f'Erro de valor: {ve}', flush=True)
     except Exception as e:
         print(f'Erro desconhecido: {e}', flush=True)
-
-    time.sleep(0.25)
@@ -12,14 +12,17 @@ from typing import Optional
 # Importar nossos módulos
 from feature_engineering import FeatureEngineer
 from ml_predictor import MLPredictor
+from model_registry import ModelRegistry
 from funcoes_bybit import busca_velas
 
 class TradingMLSystem:
     """Sistema principal de ML para trading"""
     
-    def __init__(self):
+    def __init__(self, registry: Optional[ModelRegistry] = None):
         self.feature_engineer = FeatureEngineer()
         self.ml_predictor = MLPredictor()
+        # Modelos salvos por símbolo/timeframe: a próxima análise carrega em vez de treinar
+        self.registry = registry if registry is not None else ModelRegistry()
         
     def analyze_crypto(self, symbol: str, timeframe: str = '60', emas: list = [9, 21]):
         """Análise completa de uma criptomoeda"""
@@ -40,11 +43,11 @@ class TradingMLSystem:
             
             # 3. Preparar dados para ML
             print("\n Preparando modelos ML...")
-            X_train, X_test, y_train, y_test = self.ml_predictor.prepare_data(df)
             
-            # 4. Treinar e avaliar modelos
+            # 4. Treinar (ou carregar os modelos salvos) e avaliar modelos
             print("\n Treinando modelos...")
-            training_results = self.ml_predictor.train_models(X_train, y_train)
+            X_train, X_test, y_train, y_test, training_results = self.ml_predictor.fit_or_load(
+                df, symbol, timeframe, self.registry)
             evaluation_results = self.ml_predictor.evaluate_models(X_test, y_test, training_results)
             
             # 5. Selecionar melhor modelo
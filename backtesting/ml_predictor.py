@@ -4,33 +4,74 @@ ML Predictor para Trading Quantitativo
 Sistema de predição de preços usando múltiplos algoritmos de machine learning
 """
 
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
+from sklearn.base import clone
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor, VotingRegressor
 from sklearn.linear_model import LinearRegression, Ridge, Lasso
 from sklearn.svm import SVR
 from sklearn.preprocessing import RobustScaler
-from sklearn.model_selection import cross_val_score
+from sklearn.model_selection import KFold
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-from feature_engineering import FeatureEngineer
+from feature_engineering import FeatureEngineer, DtypePolicy
 from funcoes_bybit import busca_velas
 from typing import Dict, List, Tuple, Optional
 import warnings
 warnings.filterwarnings('ignore')
 
+def _fit_task(model, X: np.ndarray, y: np.ndarray, train_index: Optional[np.ndarray] = None,
+              test_index: Optional[np.ndarray] = None):
+    """
+    Tarefa do pool de treino: sem índices treina o modelo em todo o X e o devolve treinado;
+    com índices treina um fold do cross-validation e devolve o R² no fold de teste.
+    Retorna também o início e o fim (time.time) para medir o tempo de cada modelo.
+    """
+    start = time.time()
+    if train_index is None:
+        model.fit(X, y)
+        result = model
+    else:
+        # Fold que falha vira NaN, como o error_score do cross_val_score
+        try:
+            model.fit(X[train_index], y[train_index])
+            result = r2_score(y[test_index], model.predict(X[test_index]))
+        except Exception:
+            result = np.nan
+    return result, start, time.time()
+
 class MLPredictor:
     """Sistema de predição usando Machine Learning"""
     
-    def __init__(self, forecast_horizon: int = 1):
+    def __init__(self, forecast_horizon: int = 1, dtype_policy: Optional[DtypePolicy] = None,
+                 max_workers: Optional[int] = None, n_jobs: Optional[int] = None):
         self.forecast_horizon = forecast_horizon
+        # Treino em paralelo: max_workers processos (None = um por CPU, 1 = sem pool) e
+        # n_jobs repassado aos modelos que aceitam (ex.: RandomForest). Os dois juntos
+        # multiplicam os processos/threads, então em geral só um deles passa de 1
+        self.max_workers = max_workers
+        self.n_jobs = n_jobs
         self.models = {}
         self.scalers = {}
-        self.feature_engineer = FeatureEngineer()
+        # Com dtype_policy, as features e a entrada dos modelos ficam em float32 (ver DtypePolicy)
+        self.dtype_policy = dtype_policy
+        self.feature_engineer = FeatureEngineer(dtype_policy=dtype_policy)
         self.feature_importance = {}
         self.predictions_history = []
         
+        # Caminho rápido de predict_next_prices: colunas usadas no treino e se as features
+        # de uma vela só já foram conferidas com o pipeline completo (None = ainda não)
+        self.trained_features = []
+        self.fast_path_verified = None
+        self.training_results = {}
+        
+        # Protege o conjunto modelo/scaler/features durante a predição e a troca (hot_swap)
+        self.lock = threading.RLock()
+        
         # Configurar modelos
         self._setup_models()
     
@@ -56,6 +97,11 @@ class MLPredictor:
             'svr': SVR(kernel='rbf', C=100, gamma=0.1)
         }
         
+        if self.n_jobs is not None:
+            for model in self.models.values():
+                if 'n_jobs' in model.get_params():
+                    model.set_params(n_jobs=self.n_jobs)
+        
         # Scalers para cada modelo
         for model_name in self.models:
             self.scalers[model_name] = RobustScaler()
@@ -83,47 +129,78 @@ class MLPredictor:
         
         return X_train, X_test, y_train, y_test
     
-    def train_models(self, X_train: pd.DataFrame, y_train: pd.Series) -> Dict[str, Dict]:
-        """Treina todos os modelos"""
+    def train_models(self, X_train: pd.DataFrame, y_train: pd.Series, cv: int = 5) -> Dict[str, Dict]:
+        """
+        Treina todos os modelos. O treino de cada modelo e cada fold do cross-validation
+        (KFold sem embaralhar, como o cross_val_score) são tarefas independentes, rodadas
+        num pool de max_workers processos; o tempo de cada modelo fica em 'wall_time'.
+        """
         print("Treinando modelos...")
         results = {}
+        self.trained_features = list(X_train.columns)
+        self.fast_path_verified = None
+        y = y_train.to_numpy()
+        folds = list(KFold(n_splits=cv).split(X_train))
         
-        for model_name, model in self.models.items():
-            print(f"Treinando {model_name}...")
+        started = time.time()
+        executor = ProcessPoolExecutor(max_workers=self.max_workers) if self.max_workers != 1 else None
+        try:
+            tasks = {}
+            for model_name, model in self.models.items():
+                try:
+                    # Escalar dados
+                    X_scaled = self._model_input(self.scalers[model_name].fit_transform(X_train))
+                    
+                    # Treinar modelo e folds do cross-validation (cada fold num clone)
+                    jobs = [(model, X_scaled, y)] + [(clone(model), X_scaled, y, train_index, test_index)
+                                                     for train_index, test_index in folds]
+                    if executor is None:
+                        tasks[model_name] = [_fit_task(*job) for job in jobs]
+                    else:
+                        tasks[model_name] = [executor.submit(_fit_task, *job) for job in jobs]
+                except Exception as e:
+                    tasks[model_name] = e
             
-            try:
-                # Escalar dados
-                X_scaled = self.scalers[model_name].fit_transform(X_train)
-                
-                # Treinar modelo
-                model.fit(X_scaled, y_train)
-                
-                # Cross-validation
-                cv_scores = cross_val_score(model, X_scaled, y_train, cv=5, scoring='r2')
-                
-                # Feature importance (se disponível)
-                feature_importance = None
-                if hasattr(model, 'feature_importances_'):
-                    importance_df = pd.DataFrame({
-                        'feature': X_train.columns,
-                        'importance': model.feature_importances_
-                    }).sort_values('importance', ascending=False)
-                    self.feature_importance[model_name] = importance_df
-                    feature_importance = importance_df.head(10)
-                
-                results[model_name] = {
-                    'model': model,
-                    'cv_mean': cv_scores.mean(),
-                    'cv_std': cv_scores.std(),
-                    'feature_importance': feature_importance
-                }
-                
-                print(f"✓ {model_name}: CV R² = {cv_scores.mean():.4f} (±{cv_scores.std():.4f})")
-                
-            except Exception as e:
-                print(f"✗ Erro ao treinar {model_name}: {e}")
-                results[model_name] = {'model': None, 'error': str(e)}
-        
+            for model_name, model_tasks in tasks.items():
+                try:
+                    if isinstance(model_tasks, Exception):
+                        raise model_tasks
+                    if executor is not None:
+                        model_tasks = [task.result() for task in model_tasks]
+                    model = model_tasks[0][0]
+                    self.models[model_name] = model
+                    cv_scores = np.array([score for score, _, _ in model_tasks[1:]])
+                    wall_time = max(end for _, _, end in model_tasks) - min(start for _, start, _ in model_tasks)
+                    
+                    # Feature importance (se disponível)
+                    feature_importance = None
+                    if hasattr(model, 'feature_importances_'):
+                        importance_df = pd.DataFrame({
+                            'feature': X_train.columns,
+                            'importance': model.feature_importances_
+                        }).sort_values('importance', ascending=False)
+                        self.feature_importance[model_name] = importance_df
+                        feature_importance = importance_df.head(10)
+                    
+                    results[model_name] = {
+                        'model': model,
+                        'cv_mean': cv_scores.mean(),
+                        'cv_std': cv_scores.std(),
+                        'feature_importance': feature_importance,
+                        'wall_time': wall_time
+                    }
+                    
+                    print(f"✓ {model_name}: CV R² = {cv_scores.mean():.4f} (±{cv_scores.std():.4f}) em {wall_time:.1f}s")
+                    
+                except Exception as e:
+                    print(f"✗ Erro ao treinar {model_name}: {e}")
+                    results[model_name] = {'model': None, 'error': str(e)}
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        
+        print(f"Treino concluído em {time.time() - started:.1f}s")
+        self.training_results = results
         return results
     
     def evaluate_models(self, X_test: pd.DataFrame, y_test: pd.Series, 
@@ -140,7 +217,7 @@ class MLPredictor:
                 model = result['model']
                 
                 # Escalar dados de teste
-                X_scaled = self.scalers[model_name].transform(X_test)
+                X_scaled = self._model_input(self.scalers[model_name].transform(X_test))
                 
                 # Predição
                 y_pred = model.predict(X_scaled)
@@ -172,6 +249,45 @@ class MLPredictor:
         
         return evaluation_results
     
+    def _fast_features(self, df: pd.DataFrame) -> Optional[np.ndarray]:
+        """Vetor de features da mesma vela que o pipeline completo usaria (a última com target)"""
+        if not self.trained_features or self.fast_path_verified is False:
+            return None
+        row = len(df) - 1 - self.forecast_horizon
+        features = self.feature_engineer.latest_features(df, row)
+        if features is None or any(name not in features for name in self.trained_features):
+            return None
+        x = np.array([features[name] for name in self.trained_features], dtype=np.float64)
+        
+        if self.fast_path_verified is None:
+            # Confere uma vez por treino com o pipeline completo
+            df_features = self.feature_engineer.engineer_incremental(df, self.forecast_horizon)
+            expected = df_features[df_features['open_time'] == df['open_time'].iloc[row]][self.trained_features]
+            tolerance = 1e-5 if self.dtype_policy is not None else 1e-7
+            self.fast_path_verified = (len(expected) == 1 and
+                                       np.allclose(x, expected.to_numpy(dtype=np.float64)[0], rtol=tolerance, atol=1e-9))
+            if not self.fast_path_verified:
+                print("⚠️ Features do caminho rápido diferem do pipeline completo; usando o pipeline completo")
+                return None
+        return x
+    
+    def _fast_predict(self, model, scaler: RobustScaler, x: np.ndarray) -> float:
+        """Aplica scaler e modelo numa única linha sem a validação do sklearn a cada chamada"""
+        x_scaled = self._model_input(((x - scaler.center_) / scaler.scale_).reshape(1, -1))
+        if isinstance(model, RandomForestRegressor):
+            # Cada árvore direto, sem o joblib do predict da floresta
+            x_tree = np.ascontiguousarray(x_scaled, dtype=np.float32)
+            return float(np.mean([tree.tree_.predict(x_tree)[0, 0] for tree in model.estimators_]))
+        if isinstance(model, (LinearRegression, Ridge, Lasso)):
+            return float(x_scaled[0] @ model.coef_ + model.intercept_)
+        return float(model.predict(x_scaled)[0])
+    
+    def _model_input(self, X_scaled: np.ndarray) -> np.ndarray:
+        """Mantém a saída do scaler no float da política (o RobustScaler sobe flags int8 para float64)"""
+        if self.dtype_policy is None:
+            return X_scaled
+        return X_scaled.astype(self.dtype_policy.float_dtype, copy=False)
+    
     def create_ensemble_model(self, training_results: Dict) -> Optional[VotingRegressor]:
         """Cria modelo ensemble com os melhores modelos"""
         # Selecionar modelos com CV score > 0
@@ -198,24 +314,122 @@ class MLPredictor:
         
         return best_model_name, evaluation_results[best_model_name]
     
-    def predict_next_prices(self, df: pd.DataFrame, model_name: str = 'random_forest') -> Dict:
-        """Prediz próximos preços usando modelo treinado"""
-        if model_name not in self.models:
-            raise ValueError(f"Modelo {model_name} não encontrado")
-        
-        # Preparar últimas features
-        df_features = self.feature_engineer.engineer_all_features(df, self.forecast_horizon)
-        latest_features = df_features[self.feature_engineer.feature_names].iloc[-1:].dropna()
-        
-        if latest_features.empty:
-            return {'error': 'Não foi possível extrair features dos dados'}
-        
-        # Escalar e predizer
-        model = self.models[model_name]
-        scaler = self.scalers[model_name]
-        
-        X_scaled = scaler.transform(latest_features)
-        predicted_return = model.predict(X_scaled)[0]
+    def is_trained(self) -> bool:
+        """Se já há modelos treinados para predict_next_prices"""
+        return bool(self.trained_features)
+    
+    def score(self, X_test: pd.DataFrame, y_test: pd.Series, model_name: str = 'random_forest') -> Optional[float]:
+        """R² do modelo ativo em outro conjunto de teste; None se não treinado ou com outras features"""
+        with self.lock:
+            if not self.is_trained() or model_name not in self.models:
+                return None
+            if any(name not in X_test.columns for name in self.trained_features):
+                return None
+            X_scaled = self._model_input(self.scalers[model_name].transform(X_test[self.trained_features]))
+            return r2_score(y_test, self.models[model_name].predict(X_scaled))
+    
+    def hot_swap(self, other: 'MLPredictor'):
+        """Passa a usar os modelos, scalers e features treinados em `other`, de uma vez"""
+        with self.lock:
+            self.models = other.models
+            self.scalers = other.scalers
+            self.feature_engineer = other.feature_engineer
+            self.feature_importance = other.feature_importance
+            self.trained_features = other.trained_features
+            self.fast_path_verified = other.fast_path_verified
+            self.training_results = other.training_results
+    
+    def training_summary(self) -> Dict[str, Dict]:
+        """Resultado do treino sem os objetos dos modelos (CV, tempo, erro), para o metadata"""
+        return {name: {key: (float(value) if isinstance(value, (float, np.floating)) else value)
+                       for key, value in result.items() if key in ('cv_mean', 'cv_std', 'wall_time', 'error')}
+                for name, result in self.training_results.items()}
+    
+    def export_state(self) -> Dict:
+        """Tudo que predict_next_prices precisa depois do treino (ver ModelRegistry)"""
+        with self.lock:
+            return {
+                'forecast_horizon': self.forecast_horizon,
+                'dtype_policy': self.dtype_policy,
+                'models': self.models,
+                'scalers': self.scalers,
+                'trained_features': self.trained_features,
+                'feature_names': self.feature_engineer.feature_names,
+                'lookback_periods': self.feature_engineer.lookback_periods,
+                'ewm_warmup': self.feature_engineer.ewm_warmup,
+                'feature_importance': self.feature_importance,
+                'training_summary': self.training_summary()
+            }
+    
+    @classmethod
+    def from_state(cls, state: Dict, **kwargs) -> 'MLPredictor':
+        """MLPredictor pronto para prever a partir de export_state"""
+        predictor = cls(state['forecast_horizon'], state['dtype_policy'], **kwargs)
+        predictor.feature_engineer = FeatureEngineer(state['lookback_periods'], state['ewm_warmup'],
+                                                     state['dtype_policy'])
+        predictor.feature_engineer.feature_names = state['feature_names']
+        predictor.models = state['models']
+        predictor.scalers = state['scalers']
+        predictor.trained_features = state['trained_features']
+        predictor.feature_importance = state['feature_importance']
+        predictor.training_results = {
+            name: {**summary, 'model': state['models'][name] if 'error' not in summary else None,
+                   'feature_importance': (state['feature_importance'][name].head(10)
+                                          if name in state['feature_importance'] else None)}
+            for name, summary in state['training_summary'].items()
+        }
+        return predictor
+    
+    def fit_or_load(self, df: pd.DataFrame, symbol: str, timeframe: str, registry=None,
+                    max_age_hours: Optional[float] = 24) -> Tuple[pd.DataFrame, pd.DataFrame, pd.Series, pd.Series, Dict]:
+        """
+        prepare_data e train_models, mas usando a versão salva em `registry` (ModelRegistry)
+        se ela tem até max_age_hours e as mesmas features; o que for treinado é salvo.
+        Retorna os splits e os resultados do treino (os salvos, se carregou).
+        """
+        X_train, X_test, y_train, y_test = self.prepare_data(df)
+        if registry is not None:
+            stored = registry.load_latest(symbol, timeframe, self.forecast_horizon, max_age_hours)
+            if stored is not None and stored.trained_features == list(X_train.columns):
+                self.hot_swap(stored)
+                return X_train, X_test, y_train, y_test, self.training_results
+            if stored is not None:
+                print("Modelos salvos usam outras features; treinando de novo")
+        
+        training_results = self.train_models(X_train, y_train)
+        if registry is not None and self.is_trained():
+            registry.save(self, symbol, timeframe, {'samples': len(X_train) + len(X_test),
+                                                     'last_candle': str(df['open_time'].iloc[-1])})
+        return X_train, X_test, y_train, y_test, training_results
+    
+    def predict_next_prices(self, df: pd.DataFrame, model_name: str = 'random_forest', fast: bool = True) -> Dict:
+        """
+        Prediz próximos preços usando modelo treinado. Com fast=True, calcula só as features
+        da vela usada na predição (FeatureEngineer.latest_features) e aplica o scaler e o
+        modelo direto nos arrays; o pipeline completo só roda se não houver velas
+        suficientes ou se a primeira conferência depois do treino não bater.
+        """
+        with self.lock:
+            if model_name not in self.models:
+                raise ValueError(f"Modelo {model_name} não encontrado")
+            
+            model = self.models[model_name]
+            scaler = self.scalers[model_name]
+            
+            features = self._fast_features(df) if fast else None
+            if features is not None:
+                predicted_return = self._fast_predict(model, scaler, features)
+            else:
+                # Preparar últimas features (só as velas novas desde a última previsão)
+                df_features = self.feature_engineer.engineer_incremental(df, self.forecast_horizon)
+                latest_features = df_features[self.feature_engineer.feature_names].iloc[-1:].dropna()
+                
+                if latest_features.empty:
+                    return {'error': 'Não foi possível extrair features dos dados'}
+                
+                # Escalar e predizer
+                X_scaled = self._model_input(scaler.transform(latest_features))
+                predicted_return = model.predict(X_scaled)[0]
         
         # Converter para preço
         current_price = df['close'].iloc[-1]
@@ -287,8 +501,9 @@ class MLPredictor:
         return fig
     
     def run_complete_analysis(self, symbol: str, timeframe: str = '60', 
-                            emas: List[int] = [9, 21]) -> Dict:
-        """Executa análise completa de ML"""
+                            emas: List[int] = [9, 21], registry=None,
+                            max_age_hours: Optional[float] = 24) -> Dict:
+        """Executa análise completa de ML (com registry, reaproveita os modelos salvos; ver fit_or_load)"""
         print(f"=== Análise ML Completa para {symbol} ===")
         
         try:
@@ -296,11 +511,9 @@ class MLPredictor:
             df = busca_velas(symbol, timeframe, emas)
             print(f"Dados carregados: {len(df)} velas")
             
-            # Preparar dados
-            X_train, X_test, y_train, y_test = self.prepare_data(df)
-            
-            # Treinar modelos
-            training_results = self.train_models(X_train, y_train)
+            # Preparar dados e treinar modelos (ou carregar os salvos, com registry)
+            X_train, X_test, y_train, y_test, training_results = self.fit_or_load(
+                df, symbol, timeframe, registry, max_age_hours)
             
             # Avaliar modelos
             evaluation_results = self.evaluate_models(X_test, y_test, training_results)
@@ -340,6 +553,87 @@ class MLPredictor:
             print(f"Erro na análise: {e}")
             return {'error': str(e)}
 
+class BackgroundTrainer:
+    """
+    Retreina um MLPredictor numa thread, sem parar quem usa o predictor. Cada retreino
+    treina um MLPredictor novo com as velas recebidas, avalia no período de teste dessas
+    velas e só troca (hot_swap) se o R² de `model_name` for maior que o do modelo ativo
+    nas mesmas velas (mais `min_improvement`). O primeiro treino é sempre aceito.
+    Com `registry` (ModelRegistry), cada modelo aceito é salvo em (symbol, timeframe).
+    O candidato herda max_workers/n_jobs do predictor: num processo com outras threads
+    (ex.: o bot), use max_workers=1, porque o pool faria fork a partir desta thread.
+    """
+    
+    def __init__(self, predictor: MLPredictor, model_name: str = 'random_forest',
+                 retrain_hours: float = 4, min_improvement: float = 0.0,
+                 registry=None, symbol: Optional[str] = None, timeframe: Optional[str] = None):
+        self.predictor = predictor
+        self.registry = registry
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.model_name = model_name
+        self.retrain_hours = retrain_hours
+        self.min_improvement = min_improvement
+        self.thread = None
+        self.last_trained = None
+        self.last_result = None
+    
+    def is_training(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+    
+    def maybe_retrain(self, df: pd.DataFrame, force: bool = False) -> bool:
+        """Inicia um retreino se já passou retrain_hours (ou force); retorna na hora se iniciou"""
+        if self.is_training():
+            return False
+        if self.last_trained is not None and not force:
+            hours_since = (time.time() - self.last_trained) / 3600
+            if hours_since < self.retrain_hours:
+                return False
+        
+        # Cópia das velas: o loop de trading segue usando (e trocando) o DataFrame dele
+        self.thread = threading.Thread(target=self._retrain, args=(df.copy(),), daemon=True)
+        self.thread.start()
+        return True
+    
+    def _retrain(self, df: pd.DataFrame):
+        started = time.time()
+        try:
+            print("\n🧠 Treinando modelo ML em segundo plano...", flush=True)
+            current = self.predictor
+            candidate = MLPredictor(current.forecast_horizon, current.dtype_policy,
+                                    max_workers=current.max_workers, n_jobs=current.n_jobs)
+            X_train, X_test, y_train, y_test = candidate.prepare_data(df)
+            training_results = candidate.train_models(X_train, y_train)
+            evaluation_results = candidate.evaluate_models(X_test, y_test, training_results)
+            
+            if self.model_name not in evaluation_results:
+                print(f"✗ {self.model_name} não treinou; mantendo o modelo atual", flush=True)
+                self.last_result = {'swapped': False, 'error': training_results.get(self.model_name, {}).get('error')}
+                return
+            
+            new_r2 = evaluation_results[self.model_name]['r2']
+            current_r2 = current.score(X_test, y_test, self.model_name)
+            swapped = np.isfinite(new_r2) and (current_r2 is None or new_r2 > current_r2 + self.min_improvement)
+            if swapped:
+                current.hot_swap(candidate)
+                print(f"✓ Novo modelo ativo: {self.model_name} R² {new_r2:.4f} "
+                      f"(anterior: {'-' if current_r2 is None else f'{current_r2:.4f}'})", flush=True)
+                if self.registry is not None:
+                    self.registry.save(candidate, self.symbol, self.timeframe,
+                                       {'samples': len(X_train) + len(X_test), 'test_r2': float(new_r2),
+                                        'last_candle': str(df['open_time'].iloc[-1])})
+            else:
+                print(f"✗ Novo modelo não superou o atual ({new_r2:.4f} vs "
+                      f"{'-' if current_r2 is None else f'{current_r2:.4f}'}); mantendo o atual", flush=True)
+            
+            self.last_trained = time.time()
+            self.last_result = {'swapped': swapped, 'new_r2': new_r2, 'current_r2': current_r2,
+                                'duration': self.last_trained - started}
+        except Exception as e:
+            # Sem last_trained, o próximo maybe_retrain tenta de novo
+            print(f"⚠️ Erro ao treinar ML em segundo plano: {e}", flush=True)
+            self.last_result = {'swapped': False, 'error': str(e)}
+
 def teste_ml_predictor():
     """Teste do sistema de predição ML"""
     predictor = MLPredictor(forecast_horizon=1)
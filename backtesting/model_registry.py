@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Model Registry - Modelos treinados do MLPredictor salvos em disco
+Cada treino vira uma versão por (símbolo, timeframe, horizonte), para a próxima
+inicialização carregar os modelos em vez de treinar tudo de novo
+"""
+
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+import joblib
+import sklearn
+from ml_predictor import MLPredictor
+
+
+class ModelRegistry:
+    """
+    Versões em <root>/<símbolo>/<timeframe>m_h<horizonte>/v0001/, cada uma com
+    modelo.joblib (modelos, scalers, features; ver MLPredictor.export_state) e
+    metadata.json. A versão é gravada numa pasta temporária e renomeada no fim, então
+    quem carrega nunca vê uma versão pela metade. Guarda só as `keep_versions` mais novas.
+    """
+
+    ARTIFACT = 'modelo.joblib'
+    METADATA = 'metadata.json'
+
+    def __init__(self, root: str = 'modelos_ml', keep_versions: int = 5):
+        self.root = root
+        self.keep_versions = keep_versions
+
+    def _folder(self, symbol: str, timeframe: str, forecast_horizon: int) -> str:
+        return os.path.join(self.root, symbol, f'{timeframe}m_h{forecast_horizon}')
+
+    def versions(self, symbol: str, timeframe: str, forecast_horizon: int = 1) -> List[int]:
+        """Versões completas salvas, da mais antiga para a mais nova"""
+        folder = self._folder(symbol, timeframe, forecast_horizon)
+        if not os.path.isdir(folder):
+            return []
+        versions = []
+        for name in os.listdir(folder):
+            match = re.fullmatch(r'v(\d+)', name)
+            if match and os.path.exists(os.path.join(folder, name, self.METADATA)):
+                versions.append(int(match.group(1)))
+        return sorted(versions)
+
+    def metadata(self, symbol: str, timeframe: str, forecast_horizon: int = 1,
+                 version: Optional[int] = None) -> Optional[Dict]:
+        """Metadata de uma versão (a mais nova se version=None)"""
+        versions = self.versions(symbol, timeframe, forecast_horizon)
+        if not versions:
+            return None
+        version = versions[-1] if version is None else version
+        path = os.path.join(self._folder(symbol, timeframe, forecast_horizon), f'v{version:04d}', self.METADATA)
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def save(self, predictor: MLPredictor, symbol: str, timeframe: str, extra: Optional[Dict] = None) -> int:
+        """Salva os modelos treinados de `predictor` como uma nova versão e retorna o número dela"""
+        if not predictor.is_trained():
+            raise ValueError("MLPredictor sem modelos treinados")
+
+        folder = self._folder(symbol, timeframe, predictor.forecast_horizon)
+        os.makedirs(folder, exist_ok=True)
+        state = predictor.export_state()
+
+        temporary = tempfile.mkdtemp(prefix='.tmp_', dir=folder)
+        try:
+            joblib.dump(state, os.path.join(temporary, self.ARTIFACT))
+
+            # Outro processo pode salvar ao mesmo tempo: tenta a versão seguinte
+            while True:
+                versions = self.versions(symbol, timeframe, predictor.forecast_horizon)
+                version = versions[-1] + 1 if versions else 1
+                metadata = {
+                    'version': version,
+                    'symbol': symbol,
+                    'timeframe': str(timeframe),
+                    'forecast_horizon': predictor.forecast_horizon,
+                    'created_at': datetime.now().isoformat(),
+                    'created_ts': time.time(),
+                    'sklearn_version': sklearn.__version__,
+                    'features': len(state['trained_features']),
+                    'dtype_policy': predictor.dtype_policy.key() if predictor.dtype_policy is not None else None,
+                    'training': predictor.training_summary(),
+                    **(extra or {})
+                }
+                with open(os.path.join(temporary, self.METADATA), 'w') as f:
+                    json.dump(metadata, f, indent=2, default=str)
+                try:
+                    os.rename(temporary, os.path.join(folder, f'v{version:04d}'))
+                    break
+                except OSError:
+                    if not os.path.exists(os.path.join(folder, f'v{version:04d}')):
+                        raise
+        except Exception:
+            shutil.rmtree(temporary, ignore_errors=True)
+            raise
+
+        for old in self.versions(symbol, timeframe, predictor.forecast_horizon)[:-self.keep_versions]:
+            shutil.rmtree(os.path.join(folder, f'v{old:04d}'), ignore_errors=True)
+
+        print(f"💾 Modelos salvos: {symbol} {timeframe}m h{predictor.forecast_horizon} v{version:04d}")
+        return version
+
+    def load_latest(self, symbol: str, timeframe: str, forecast_horizon: int = 1,
+                    max_age_hours: Optional[float] = None) -> Optional[MLPredictor]:
+        """
+        MLPredictor com a versão mais nova, ou None se não há versão, se ela é mais velha
+        que `max_age_hours` ou se não carrega (ex.: salva com outra versão do sklearn)
+        """
+        metadata = self.metadata(symbol, timeframe, forecast_horizon)
+        if metadata is None:
+            return None
+        age_hours = (time.time() - metadata['created_ts']) / 3600
+        if max_age_hours is not None and age_hours > max_age_hours:
+            print(f"Modelos salvos de {symbol} têm {age_hours:.1f}h; treinando de novo")
+            return None
+        if metadata['sklearn_version'] != sklearn.__version__:
+            print(f"⚠️ Modelos salvos com sklearn {metadata['sklearn_version']} (atual: {sklearn.__version__})")
+
+        path = os.path.join(self._folder(symbol, timeframe, forecast_horizon),
+                            f"v{metadata['version']:04d}", self.ARTIFACT)
+        try:
+            started = time.perf_counter()
+            predictor = MLPredictor.from_state(joblib.load(path))
+        except Exception as e:
+            print(f"⚠️ Erro ao carregar modelos salvos de {symbol}: {e}")
+            return None
+
+        print(f"📂 Modelos carregados: {symbol} {timeframe}m h{forecast_horizon} v{metadata['version']:04d} "
+              f"({age_hours:.1f}h, {(time.perf_counter() - started) * 1000:.0f}ms)")
+        return predictor
@@ -0,0 +1,396 @@
+import sys
+import time
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+from estado_trade import EstadoDeTrade
+from data_loader import carregar_velas, velas_para_array
+
+# Motor de eventos: as velas fecham uma a uma, a estratégia decide em on_bar e recebe as
+# execuções em on_fill. A mesma classe de estratégia roda no replay (CorretoraSimulada)
+# e ao vivo (CorretoraBybit), porque as duas corretoras têm os mesmos métodos.
+
+# tipo: 'entrada', 'parcial', 'breakeven', 'alvo', 'stop' ou 'saida' (fechada por fora)
+Execucao = namedtuple('Execucao', ['indice', 'tipo', 'estado', 'preco', 'quantidade', 'resultado'])
+
+
+class Estrategia:
+    """
+    Base das estratégias. `dados` é um dict de arrays do NumPy com as colunas de
+    data_loader.DTYPE_VELAS (tempo_abertura, abertura, maxima, minima, fechamento, volume, turnover).
+    """
+
+    def preparar(self, dados):
+        # Chamado com todas as velas antes do replay (ou a cada vela nova ao vivo):
+        # é aqui que os indicadores são calculados de uma vez, vetorizados
+        pass
+
+    def on_bar(self, i, dados, corretora):
+        raise NotImplementedError
+
+    def on_fill(self, execucao, corretora):
+        pass
+
+
+def colunas_das_velas(velas):
+    # Aceita o array do armazenamento ou um DataFrame com as mesmas colunas
+    if isinstance(velas, pd.DataFrame):
+        return {coluna: velas[coluna].to_numpy() for coluna in velas.columns}
+    return {coluna: velas[coluna] for coluna in velas.dtype.names}
+
+
+class CorretoraSimulada:
+    """
+    Simula as ordens das funções de funcoes_bybit sobre as velas do replay: entrada a
+    mercado no fechamento da vela, stop e alvo (alvo tem prioridade na mesma vela, como
+    em backtesting.py), saída parcial limitada e stop no breakeven. Saídas só são
+    verificadas a partir da vela seguinte à entrada.
+    """
+
+    def __init__(self, saldo=1000, taxa_corretora=0.055):
+        self.saldo = saldo
+        self.taxa_corretora = taxa_corretora
+        self.estado = EstadoDeTrade.DE_FORA
+        self.execucoes = []
+        self.trades = []
+        self.ao_executar = None
+        self.indice = -1
+        self.preco_atual = 0.0
+        self._zerar_posicao()
+
+    def _zerar_posicao(self):
+        self.quantidade = 0.0
+        self.preco_entrada = 0.0
+        self.preco_stop = 0.0
+        self.preco_alvo = 0.0
+        self.indice_entrada = -1
+        self.parcial = None
+        self.gatilho_breakeven = None
+        self.resultado_trade = 0.0
+        self._atualizar_limites()
+
+    def _atualizar_limites(self):
+        # Faixa de preço em que nada acontece com a posição: o replay só chama
+        # processar_vela quando a vela sai dela. De fora, a faixa é infinita
+        if self.estado == EstadoDeTrade.DE_FORA:
+            self.limite_superior, self.limite_inferior = float('inf'), float('-inf')
+            return
+        precos = [self.preco_alvo]
+        if self.parcial is not None:
+            precos.append(self.parcial[0])
+        if self.gatilho_breakeven is not None:
+            precos.append(self.gatilho_breakeven)
+        if self.estado == EstadoDeTrade.COMPRADO:
+            self.limite_superior, self.limite_inferior = min(precos), self.preco_stop
+        else:
+            self.limite_superior, self.limite_inferior = self.preco_stop, max(precos)
+
+    def _executar(self, tipo, preco, quantidade):
+        taxa = preco * quantidade * self.taxa_corretora / 100
+        if tipo == 'entrada':
+            resultado = -taxa
+        else:
+            lado = 1 if self.estado == EstadoDeTrade.COMPRADO else -1
+            resultado = (preco - self.preco_entrada) * quantidade * lado - taxa
+        self.saldo += resultado
+        self.resultado_trade += resultado
+        execucao = Execucao(self.indice, tipo, self.estado, preco, quantidade, resultado)
+        self.execucoes.append(execucao)
+        if self.ao_executar is not None:
+            self.ao_executar(execucao, self)
+        return execucao
+
+    def _abrir(self, estado, quantidade, preco_stop, preco_alvo, preco_entrada):
+        if self.estado != EstadoDeTrade.DE_FORA:
+            return None
+        self.estado = estado
+        self.quantidade = quantidade
+        self.preco_entrada = self.preco_atual if preco_entrada is None else preco_entrada
+        self.preco_stop = preco_stop
+        self.preco_alvo = preco_alvo
+        self.indice_entrada = self.indice
+        self._atualizar_limites()
+        return self._executar('entrada', self.preco_entrada, quantidade)
+
+    def abre_compra(self, quantidade, preco_stop, preco_alvo, preco_entrada=None):
+        return self._abrir(EstadoDeTrade.COMPRADO, quantidade, preco_stop, preco_alvo, preco_entrada)
+
+    def abre_venda(self, quantidade, preco_stop, preco_alvo, preco_entrada=None):
+        return self._abrir(EstadoDeTrade.VENDIDO, quantidade, preco_stop, preco_alvo, preco_entrada)
+
+    def abre_parcial(self, preco_parcial, fracao=0.5):
+        self.parcial = (preco_parcial, self.quantidade * fracao)
+        self._atualizar_limites()
+
+    def stop_breakeven(self, preco_gatilho):
+        # Move o stop para a entrada quando o preço tocar `preco_gatilho`
+        self.gatilho_breakeven = preco_gatilho
+        self._atualizar_limites()
+
+    def fechar(self, tipo='saida', preco=None):
+        if self.estado == EstadoDeTrade.DE_FORA:
+            return None
+        execucao = self._executar(tipo, self.preco_atual if preco is None else preco, self.quantidade)
+        self.trades.append({
+            'estado': self.estado,
+            'indice_entrada': self.indice_entrada,
+            'indice_saida': self.indice,
+            'preco_entrada': self.preco_entrada,
+            'preco_saida': execucao.preco,
+            'tipo_saida': tipo,
+            'resultado': self.resultado_trade,
+            'saldo': self.saldo,
+        })
+        self.estado = EstadoDeTrade.DE_FORA
+        self._zerar_posicao()
+        return execucao
+
+    def processar_vela(self, maxima, minima):
+        comprado = self.estado == EstadoDeTrade.COMPRADO
+        favoravel = maxima if comprado else minima
+        contra = minima if comprado else maxima
+        lado = 1 if comprado else -1
+
+        if (favoravel - self.preco_alvo) * lado >= 0:
+            # A parcial fica antes do alvo, então foi executada no caminho
+            if self.parcial is not None and (favoravel - self.parcial[0]) * lado >= 0:
+                self._executar_parcial()
+            self.fechar('alvo', self.preco_alvo)
+        elif (contra - self.preco_stop) * lado <= 0:
+            self.fechar('stop', self.preco_stop)
+        else:
+            if self.parcial is not None and (favoravel - self.parcial[0]) * lado >= 0:
+                self._executar_parcial()
+            if self.gatilho_breakeven is not None and (favoravel - self.gatilho_breakeven) * lado >= 0:
+                self.gatilho_breakeven = None
+                self.preco_stop = self.preco_entrada
+                self._atualizar_limites()
+                self._executar('breakeven', self.preco_entrada, 0.0)
+
+    def _executar_parcial(self):
+        preco, quantidade = self.parcial
+        self.parcial = None
+        quantidade = min(quantidade, self.quantidade)
+        self.quantidade -= quantidade
+        self._atualizar_limites()
+        self._executar('parcial', preco, quantidade)
+
+
+def executar_replay(estrategia, velas, corretora=None, inicio=0):
+    """
+    Passa as velas (array do armazenamento ou DataFrame) pela estratégia, uma por vez,
+    e retorna a corretora simulada com saldo, execucoes e trades.
+    """
+    corretora = corretora or CorretoraSimulada()
+    corretora.ao_executar = estrategia.on_fill
+    dados = colunas_das_velas(velas)
+    estrategia.preparar(dados)
+
+    # Listas são bem mais rápidas que arrays do NumPy para ler um valor por vez
+    maximas = dados['maxima'].tolist()
+    minimas = dados['minima'].tolist()
+    fechamentos = dados['fechamento'].tolist()
+    on_bar = estrategia.on_bar
+
+    # A entrada acontece em on_bar, depois da verificação, então as saídas só são
+    # conferidas a partir da vela seguinte
+    for i in range(inicio, len(fechamentos)):
+        corretora.indice = i
+        corretora.preco_atual = fechamentos[i]
+        if maximas[i] >= corretora.limite_superior or minimas[i] <= corretora.limite_inferior:
+            corretora.processar_vela(maximas[i], minimas[i])
+        on_bar(i, dados, corretora)
+
+    return corretora
+
+
+class CorretoraBybit:
+    """
+    Mesmos métodos da CorretoraSimulada, enviando as ordens pela Bybit com as funções
+    de funcoes_bybit. As saídas acontecem na corretora; sincronizar() lê a posição a
+    cada vela e avisa a estratégia quando ela foi fechada.
+    """
+
+    def __init__(self, cripto):
+        # Importado aqui para o replay não precisar das chaves da API
+        import funcoes_bybit
+        self.funcoes = funcoes_bybit
+        self.cripto = cripto
+        self.ao_executar = None
+        self.indice = -1
+        self.preco_atual = 0.0
+        self.gatilho_breakeven = None
+        self.estado, self.preco_entrada, self.preco_stop, self.preco_alvo = funcoes_bybit.tem_trade_aberto(cripto)
+        # Posição aberta antes de o bot subir: parcial e fechamento usam o tamanho dela
+        self.quantidade = funcoes_bybit.tamanho_da_posicao(cripto) if self.estado != EstadoDeTrade.DE_FORA else 0.0
+
+    @property
+    def saldo(self):
+        return self.funcoes.saldo_da_conta()
+
+    def _avisar(self, tipo, preco, quantidade):
+        execucao = Execucao(self.indice, tipo, self.estado, preco, quantidade, None)
+        if self.ao_executar is not None:
+            self.ao_executar(execucao, self)
+        return execucao
+
+    def _abrir(self, estado, quantidade, preco_stop, preco_alvo):
+        if self.estado != EstadoDeTrade.DE_FORA:
+            return None
+        # Quantidade no passo e preços no tick do instrumento, senão a Bybit recusa a ordem
+        instrumentos = self.funcoes.instrumentos
+        quantidade = instrumentos.arredondar_quantidade(self.cripto, quantidade)
+        if quantidade < instrumentos.instrumento(self.cripto)['qtd_minima']:
+            print(f'Quantidade {quantidade} abaixo do mínimo de {self.cripto}, ignorando entrada.', flush=True)
+            return None
+        preco_stop = float(instrumentos.arredondar_preco(self.cripto, preco_stop))
+        preco_alvo = float(instrumentos.arredondar_preco(self.cripto, preco_alvo))
+        if estado == EstadoDeTrade.COMPRADO:
+            self.funcoes.abre_compra(self.cripto, quantidade, preco_stop, preco_alvo)
+        else:
+            self.funcoes.abre_venda(self.cripto, quantidade, preco_stop, preco_alvo)
+        self.estado, self.quantidade = estado, float(quantidade)
+        self.preco_entrada, self.preco_stop, self.preco_alvo = self.preco_atual, preco_stop, preco_alvo
+        return self._avisar('entrada', self.preco_atual, self.quantidade)
+
+    def abre_compra(self, quantidade, preco_stop, preco_alvo, preco_entrada=None):
+        return self._abrir(EstadoDeTrade.COMPRADO, quantidade, preco_stop, preco_alvo)
+
+    def abre_venda(self, quantidade, preco_stop, preco_alvo, preco_entrada=None):
+        return self._abrir(EstadoDeTrade.VENDIDO, quantidade, preco_stop, preco_alvo)
+
+    def abre_parcial(self, preco_parcial, fracao=0.5):
+        instrumentos = self.funcoes.instrumentos
+        try:
+            quantidade = max(instrumentos.arredondar_quantidade(self.cripto, float(self.quantidade) * fracao),
+                             instrumentos.instrumento(self.cripto)['qtd_minima'])
+            self.funcoes.cliente.place_order(
+                category="linear",
+                symbol=self.cripto,
+                side="Sell" if self.estado == EstadoDeTrade.COMPRADO else "Buy",
+                orderType="Limit",
+                qty=quantidade,
+                price=instrumentos.arredondar_preco(self.cripto, preco_parcial),
+                timeInForce="GTC",
+                reduceOnly=True
+            )
+        except Exception as e:
+            print(f'Erro ao configurar ordem parcial: {e}', flush=True)
+            instrumentos.invalidar(self.cripto)
+
+    def stop_breakeven(self, preco_gatilho):
+        # Quem move o stop é sincronizar(), a cada vela
+        self.gatilho_breakeven = preco_gatilho
+
+    def fechar(self, tipo='saida', preco=None):
+        if self.estado == EstadoDeTrade.DE_FORA:
+            return None
+        self.funcoes.reduzir_posicao(self.cripto, 1)
+        execucao = self._avisar(tipo, self.preco_atual, self.quantidade)
+        self.estado = EstadoDeTrade.DE_FORA
+        return execucao
+
+    def sincronizar(self):
+        estado, preco_entrada, preco_stop, preco_alvo = self.funcoes.tem_trade_aberto(self.cripto)
+        if self.estado != EstadoDeTrade.DE_FORA and estado == EstadoDeTrade.DE_FORA:
+            self._avisar('saida', self.preco_atual, self.quantidade)
+            self.gatilho_breakeven = None
+        self.estado, self.preco_entrada, self.preco_stop, self.preco_alvo = estado, preco_entrada, preco_stop, preco_alvo
+
+        if self.gatilho_breakeven is not None and self.estado != EstadoDeTrade.DE_FORA:
+            if self.estado == EstadoDeTrade.COMPRADO:
+                movido = self.funcoes.stop_breakeven_compra(self.cripto, preco_entrada, self.gatilho_breakeven,
+                                                            self.estado, self.preco_atual)
+            else:
+                movido = self.funcoes.stop_breakeven_venda(self.cripto, preco_entrada, self.gatilho_breakeven,
+                                                           self.estado, self.preco_atual)
+            if movido:
+                self.gatilho_breakeven = None
+                self._avisar('breakeven', preco_entrada, 0.0)
+
+
+def executar_ao_vivo(estrategia, cripto, tempo_grafico, intervalo_consulta=15):
+    # A cada vela fechada: recalcula os indicadores, sincroniza a posição e chama on_bar
+    corretora = CorretoraBybit(cripto)
+    corretora.ao_executar = estrategia.on_fill
+    ultima_vela = None
+    print(f'Estratégia {type(estrategia).__name__} ao vivo em {cripto} ({tempo_grafico}m)', flush=True)
+
+    while True:
+        try:
+            resposta = corretora.funcoes.cliente.get_kline(symbol=cripto, interval=tempo_grafico, limit=1000)
+            # A primeira vela da resposta ainda está aberta
+            velas = velas_para_array(resposta['result']['list'][1:][::-1])
+            if len(velas) and velas['tempo_abertura'][-1] != ultima_vela:
+                ultima_vela = velas['tempo_abertura'][-1]
+                dados = colunas_das_velas(velas)
+                estrategia.preparar(dados)
+                corretora.indice = len(velas) - 1
+                corretora.preco_atual = float(dados['fechamento'][-1])
+                corretora.sincronizar()
+                estrategia.on_bar(corretora.indice, dados, corretora)
+        except Exception as e:
+            print(f'Erro no loop principal: {e}', flush=True)
+
+        time.sleep(intervalo_consulta)
+
+
+class EstrategiaEmas(Estrategia):
+    """
+    Exemplo: cruzamento de EMAs com stop na mínima/máxima das últimas velas, alvo por
+    risco/retorno, metade da mão no alvo parcial e stop no breakeven, como nos live_trading_*.
+    """
+
+    def __init__(self, ema_rapida=9, ema_lenta=21, qtd_velas_stop=17, risco_retorno=3.1,
+                 parcial=0.005, breakeven=0.01, risco_por_trade=0.01):
+        self.ema_rapida = ema_rapida
+        self.ema_lenta = ema_lenta
+        self.qtd_velas_stop = qtd_velas_stop
+        self.risco_retorno = risco_retorno
+        self.parcial = parcial
+        self.breakeven = breakeven
+        self.risco_por_trade = risco_por_trade
+
+    def preparar(self, dados):
+        fechamento = pd.Series(dados['fechamento'])
+        rapida = fechamento.ewm(span=self.ema_rapida, adjust=False).mean().to_numpy()
+        lenta = fechamento.ewm(span=self.ema_lenta, adjust=False).mean().to_numpy()
+        acima = rapida > lenta
+        cruzamentos = np.flatnonzero(acima[1:] != acima[:-1]) + 1
+        # Só as velas com cruzamento: on_bar não faz nada nas outras
+        self.sinais = dict(zip(cruzamentos.tolist(), np.where(acima[cruzamentos], 1, -1).tolist()))
+        self.minima_stop = pd.Series(dados['minima']).rolling(self.qtd_velas_stop).min().to_numpy()
+        self.maxima_stop = pd.Series(dados['maxima']).rolling(self.qtd_velas_stop).max().to_numpy()
+
+    def on_bar(self, i, dados, corretora):
+        sinal = self.sinais.get(i)
+        if sinal is None or corretora.estado != EstadoDeTrade.DE_FORA:
+            return
+        preco = corretora.preco_atual
+        stop = float(self.minima_stop[i] if sinal > 0 else self.maxima_stop[i])
+        risco = abs(preco - stop)
+        if not risco > 0:
+            return
+        quantidade = corretora.saldo * self.risco_por_trade / risco
+        if sinal > 0:
+            corretora.abre_compra(quantidade, stop, preco + risco * self.risco_retorno)
+        else:
+            corretora.abre_venda(quantidade, stop, preco - risco * self.risco_retorno)
+
+    def on_fill(self, execucao, corretora):
+        if execucao.tipo == 'entrada':
+            lado = 1 if execucao.estado == EstadoDeTrade.COMPRADO else -1
+            corretora.abre_parcial(execucao.preco * (1 + lado * self.parcial))
+            corretora.stop_breakeven(execucao.preco * (1 + lado * self.breakeven))
+
+
+if __name__ == "__main__":
+    # python motor_eventos.py BTCUSDT 60 — replay do armazenamento de velas
+    cripto = sys.argv[1] if len(sys.argv) > 1 else 'BTCUSDT'
+    tempo_grafico = sys.argv[2] if len(sys.argv) > 2 else '60'
+    velas = carregar_velas(cripto, tempo_grafico)
+    inicio = time.perf_counter()
+    corretora = executar_replay(EstrategiaEmas(), velas)
+    duracao = time.perf_counter() - inicio
+    print(f'{len(velas)} velas em {duracao:.3f}s ({len(velas) / max(duracao, 1e-9):,.0f} velas/s)', flush=True)
+    print(f'{len(corretora.trades)} trades, saldo final: {corretora.saldo:.2f}', flush=True)
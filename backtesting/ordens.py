@@ -0,0 +1,138 @@
+import itertools
+import time
+from collections import deque
+
+# Entrada a mercado (com stop e alvo) e take profit parcial numa chamada só, por
+# place_batch_order, no lugar de abre_compra + abre_parcial_compra (duas idas ao REST em
+# série, mais a busca do lote mínimo). Quantidade e preços saem do RegistroDeInstrumentos,
+# sem rede. Cada perna guarda a latência do envio até a confirmação do REST e, com o
+# espelho da conta ativo, até a ordem aparecer no order_stream.
+
+LADO_CONTRARIO = {'Buy': 'Sell', 'Sell': 'Buy'}
+
+
+class PipelineDeOrdens:
+    """
+    Uso:
+        ordens = PipelineDeOrdens(cliente, instrumentos)
+        ordens.entrar('BTCUSDT', 'Buy', 0.01, preco_stop, preco_alvo, preco_entrada)
+        ordens.latencias()   # uma linha por perna: ack_ms (REST) e stream_ms (order_stream)
+
+    A parcial é uma Limit reduce-only de `fracao_parcial` da mão a `distancia_parcial` do
+    preço de entrada (os 50% a 0,5% de abre_parcial_compra/abre_parcial_venda).
+    """
+
+    def __init__(self, cliente, instrumentos, espelho=None, categoria='linear', historico=200):
+        self.cliente = cliente
+        self.instrumentos = instrumentos
+        self.espelho = espelho
+        self.categoria = categoria
+        self.envios = deque(maxlen=historico)
+        self._contador = itertools.count()
+
+    def _id(self, perna):
+        # orderLinkId único (até 36 caracteres) para achar a perna no order_stream
+        return f'nb{int(time.time() * 1000)}{next(self._contador) % 1000:03d}{perna[0]}'
+
+    def montar_entrada(self, cripto, lado, quantidade, preco_stop, preco_alvo, preco_entrada,
+                       fracao_parcial=0.5, distancia_parcial=0.005):
+        """As pernas do lote: entrada a mercado com stop e alvo, e a parcial reduce-only"""
+        instrumentos, categoria = self.instrumentos, self.categoria
+        entrada = {
+            'symbol': cripto,
+            'side': lado,
+            'orderType': 'Market',
+            'qty': str(instrumentos.arredondar_quantidade(cripto, quantidade, categoria)),
+            'stopLoss': str(instrumentos.arredondar_preco(cripto, preco_stop, categoria)),
+            'takeProfit': str(instrumentos.arredondar_preco(cripto, preco_alvo, categoria)),
+            'orderLinkId': self._id('entrada'),
+        }
+        if not fracao_parcial:
+            return [entrada]
+
+        sinal = 1 if lado == 'Buy' else -1
+        quantidade_parcial = max(instrumentos.arredondar_quantidade(cripto, float(quantidade) * fracao_parcial, categoria),
+                                 instrumentos.instrumento(cripto, categoria)['qtd_minima'])
+        parcial = {
+            'symbol': cripto,
+            'side': LADO_CONTRARIO[lado],
+            'orderType': 'Limit',
+            'qty': str(quantidade_parcial),
+            'price': str(instrumentos.arredondar_preco(cripto, float(preco_entrada) * (1 + sinal * distancia_parcial),
+                                                       categoria)),
+            'timeInForce': 'GTC',
+            'reduceOnly': True,
+            'orderLinkId': self._id('parcial'),
+        }
+        return [entrada, parcial]
+
+    def _registrar(self, perna, nome, enviado, confirmado, codigo, mensagem, order_id=None):
+        envio = {
+            'perna': nome,
+            'symbol': perna['symbol'],
+            'orderLinkId': perna['orderLinkId'],
+            'orderId': order_id,
+            'codigo': codigo,
+            'mensagem': mensagem,
+            'enviado': enviado,
+            'ack_ms': (confirmado - enviado) * 1000,
+        }
+        self.envios.append(envio)
+        return envio
+
+    def enviar(self, pernas, nomes=('entrada', 'parcial')):
+        """
+        Manda as pernas num place_batch_order. Erro na primeira (a entrada) levanta
+        exceção, como abre_compra; a parcial recusada (ex.: a posição ainda não existia
+        quando o reduce-only foi checado) é reenviada sozinha uma vez.
+        """
+        enviado = time.perf_counter()
+        resposta = self.cliente.place_batch_order(category=self.categoria, request=pernas)
+        confirmado = time.perf_counter()
+
+        resultados = resposta['result']['list']
+        codigos = resposta.get('retExtInfo', {}).get('list', [{'code': 0, 'msg': 'OK'}] * len(pernas))
+        envios = []
+        for perna, nome, resultado, codigo in zip(pernas, nomes, resultados, codigos):
+            envios.append(self._registrar(perna, nome, enviado, confirmado, codigo['code'], codigo['msg'],
+                                          resultado.get('orderId') or None))
+
+        if envios[0]['codigo'] != 0:
+            # Passo ou tick podem ter mudado: recarrega o instrumento na próxima ordem
+            self.instrumentos.invalidar(pernas[0]['symbol'], self.categoria)
+            raise ValueError(f"Ordem de entrada recusada ({envios[0]['codigo']}): {envios[0]['mensagem']}")
+        if self.espelho is not None:
+            # A posição do espelho só vale de novo quando o stream mostrar a entrada
+            self.espelho.marcar_pendente(pernas[0]['symbol'])
+
+        for indice, envio in enumerate(envios[1:], start=1):
+            if envio['codigo'] == 0:
+                continue
+            print(f"Perna {envio['perna']} recusada no lote ({envio['codigo']}: {envio['mensagem']}), "
+                  f"reenviando sozinha", flush=True)
+            perna = {**pernas[indice], 'orderLinkId': self._id(envio['perna'])}
+            enviado = time.perf_counter()
+            try:
+                resposta = self.cliente.place_order(category=self.categoria, **perna)
+                envios[indice] = self._registrar(perna, f"{envio['perna']} (avulsa)", enviado, time.perf_counter(),
+                                                 0, 'OK', resposta['result']['orderId'])
+            except Exception as e:
+                self.instrumentos.invalidar(perna['symbol'], self.categoria)
+                print(f"Erro ao reenviar a perna {envio['perna']}: {e}", flush=True)
+
+        print(' | '.join(f"{envio['perna']}: {envio['ack_ms']:.0f}ms" for envio in envios), flush=True)
+        return envios
+
+    def entrar(self, cripto, lado, quantidade, preco_stop, preco_alvo, preco_entrada, **parcial):
+        return self.enviar(self.montar_entrada(cripto, lado, quantidade, preco_stop, preco_alvo, preco_entrada,
+                                               **parcial))
+
+    def latencias(self, ultimos=None):
+        """
+        Os últimos envios, com stream_ms (do envio até a ordem chegar pelo order_stream)
+        quando o espelho da conta está ativo e a ordem já apareceu
+        """
+        envios = list(self.envios)[-ultimos:] if ultimos else list(self.envios)
+        chegadas = self.espelho.chegada_ordens if self.espelho is not None else {}
+        return [{**envio, 'stream_ms': (chegadas[envio['orderLinkId']] - envio['enviado']) * 1000
+                 if envio['orderLinkId'] in chegadas else None} for envio in envios]
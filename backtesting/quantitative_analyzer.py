@@ -7,21 +7,26 @@ Integra feature engineering, ML predictions e visualizações
 import pandas as pd
 import numpy as np
 from datetime import datetime
-from feature_engineering import FeatureEngineer
+from feature_engineering import FeatureEngineer, DtypePolicy
 from ml_predictor import MLPredictor
+from model_registry import ModelRegistry
 from chart_predictor import ChartPredictor
 from funcoes_bybit import busca_velas
-from typing import Dict, List
+from typing import Dict, List, Optional
 import warnings
 warnings.filterwarnings('ignore')
 
 class QuantitativeAnalyzer:
     """Sistema principal de análise quantitativa para trading"""
     
-    def __init__(self):
-        self.feature_engineer = FeatureEngineer()
-        self.ml_predictor = MLPredictor()
+    def __init__(self, dtype_policy: Optional[DtypePolicy] = DtypePolicy(),
+                 registry: Optional[ModelRegistry] = None):
+        # Análise de vários símbolos guarda vários frames de features: float32/int8 por padrão
+        self.feature_engineer = FeatureEngineer(dtype_policy=dtype_policy)
+        self.ml_predictor = MLPredictor(dtype_policy=dtype_policy)
         self.chart_predictor = ChartPredictor()
+        # Modelos salvos por símbolo/timeframe: a próxima análise carrega em vez de treinar
+        self.registry = registry if registry is not None else ModelRegistry()
         self.analysis_history = []
     
     def analyze_symbol(self, symbol: str, timeframe: str = '60', 
@@ -45,7 +50,7 @@ class QuantitativeAnalyzer:
             
             # 3. ML Analysis
             print("🤖 Executando análise ML...")
-            ml_results = self.ml_predictor.run_complete_analysis(symbol, timeframe, emas)
+            ml_results = self.ml_predictor.run_complete_analysis(symbol, timeframe, emas, self.registry)
             
             # 4. Gerar relatório
             analysis_report = self._generate_analysis_report(
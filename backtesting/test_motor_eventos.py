@@ -0,0 +1,199 @@
+import sys
+import types
+import unittest
+from decimal import Decimal
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from estado_trade import EstadoDeTrade
+from instrumentos import RegistroDeInstrumentos
+from motor_eventos import CorretoraBybit, CorretoraSimulada, Estrategia, EstrategiaEmas, executar_replay
+
+
+class ClienteFalso:
+    def get_instruments_info(self, **parametros):
+        return {'result': {'list': [{
+            'symbol': 'BTCUSDT',
+            'lotSizeFilter': {'minOrderQty': '0.001', 'maxOrderQty': '100', 'qtyStep': '0.001'},
+            'priceFilter': {'tickSize': '0.10'},
+        }]}}
+
+
+def funcoes_falsas(posicao=(EstadoDeTrade.DE_FORA, 0, 0, 0), tamanho=0.0):
+    funcoes = types.ModuleType('funcoes_bybit')
+    funcoes.cliente = mock.Mock()
+    funcoes.instrumentos = RegistroDeInstrumentos(ClienteFalso())
+    funcoes.posicao = posicao
+    funcoes.tem_trade_aberto = lambda cripto: funcoes.posicao
+    funcoes.tamanho_da_posicao = mock.Mock(return_value=tamanho)
+    funcoes.saldo_da_conta = lambda: 1000.0
+    funcoes.abre_compra = mock.Mock()
+    funcoes.abre_venda = mock.Mock()
+    funcoes.reduzir_posicao = mock.Mock()
+    funcoes.stop_breakeven_compra = mock.Mock(return_value=False)
+    funcoes.stop_breakeven_venda = mock.Mock(return_value=False)
+    return funcoes
+
+
+def velas_com_cruzamento(quantidade=60):
+    # Queda e depois alta: a EMA rápida cruza a lenta para cima uma vez
+    fechamento = np.concatenate([np.linspace(110, 100, quantidade // 2), np.linspace(100, 130, quantidade // 2)])
+    return {
+        'fechamento': fechamento,
+        'maxima': fechamento + 1.2345,
+        'minima': fechamento - 1.2345,
+    }
+
+
+class CorretoraBybitTest(unittest.TestCase):
+    def criar(self, funcoes):
+        patcher = mock.patch.dict(sys.modules, {'funcoes_bybit': funcoes})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return CorretoraBybit('BTCUSDT')
+
+    def test_estrategia_emas_entra_ao_vivo(self):
+        funcoes = funcoes_falsas()
+        corretora = self.criar(funcoes)
+        estrategia = EstrategiaEmas()
+        corretora.ao_executar = estrategia.on_fill
+
+        dados = velas_com_cruzamento()
+        estrategia.preparar(dados)
+        indice = next(i for i, sinal in estrategia.sinais.items() if sinal > 0)
+        corretora.indice, corretora.preco_atual = indice, float(dados['fechamento'][indice])
+        corretora.sincronizar()
+        estrategia.on_bar(indice, dados, corretora)
+
+        self.assertEqual(corretora.estado, EstadoDeTrade.COMPRADO)
+        _, quantidade, preco_stop, preco_alvo = funcoes.abre_compra.call_args.args
+        self.assertEqual(quantidade, quantidade.quantize(Decimal('0.001')))
+        self.assertAlmostEqual(preco_stop * 10, round(preco_stop * 10))
+        self.assertAlmostEqual(preco_alvo * 10, round(preco_alvo * 10))
+
+        # on_fill: parcial no passo/tick e gatilho do breakeven guardado para sincronizar()
+        parcial = funcoes.cliente.place_order.call_args.kwargs
+        self.assertEqual(parcial['side'], 'Sell')
+        self.assertEqual(parcial['qty'], (quantidade / 2).quantize(Decimal('0.001'), rounding='ROUND_DOWN'))
+        self.assertEqual(parcial['price'], parcial['price'].quantize(Decimal('0.10')))
+        self.assertIsNotNone(corretora.gatilho_breakeven)
+
+        funcoes.posicao = (EstadoDeTrade.COMPRADO, corretora.preco_entrada, preco_stop, preco_alvo)
+        corretora.preco_atual = corretora.gatilho_breakeven
+        corretora.sincronizar()
+        funcoes.stop_breakeven_compra.assert_called_once()
+
+    def test_posicao_aberta_antes_do_bot(self):
+        funcoes = funcoes_falsas(posicao=(EstadoDeTrade.VENDIDO, 100.0, 110.0, 70.0), tamanho=0.25)
+        corretora = self.criar(funcoes)
+        self.assertEqual(corretora.quantidade, 0.25)
+
+        corretora.abre_parcial(99.5)
+        self.assertEqual(funcoes.cliente.place_order.call_args.kwargs['qty'], Decimal('0.125'))
+        self.assertEqual(funcoes.cliente.place_order.call_args.kwargs['side'], 'Buy')
+
+
+class EstrategiaRoteirizada(Estrategia):
+    # Entra na vela `vela_entrada` e, na execução da entrada, arma a parcial e o breakeven
+    def __init__(self, vela_entrada, comprar, stop, alvo, parcial=None, breakeven=None):
+        self.vela_entrada = vela_entrada
+        self.comprar = comprar
+        self.stop = stop
+        self.alvo = alvo
+        self.parcial = parcial
+        self.breakeven = breakeven
+
+    def on_bar(self, i, dados, corretora):
+        if i == self.vela_entrada:
+            abrir = corretora.abre_compra if self.comprar else corretora.abre_venda
+            abrir(1.0, self.stop, self.alvo)
+
+    def on_fill(self, execucao, corretora):
+        if execucao.tipo != 'entrada':
+            return
+        if self.parcial is not None:
+            corretora.abre_parcial(self.parcial)
+        if self.breakeven is not None:
+            corretora.stop_breakeven(self.breakeven)
+
+
+def velas(*barras):
+    # barras: (maxima, minima, fechamento)
+    maximas, minimas, fechamentos = zip(*barras)
+    return pd.DataFrame({'maxima': maximas, 'minima': minimas, 'fechamento': fechamentos}, dtype=float)
+
+
+class CorretoraSimuladaTest(unittest.TestCase):
+    def replay(self, estrategia, *barras):
+        return executar_replay(estrategia, velas(*barras), CorretoraSimulada(saldo=1000, taxa_corretora=0))
+
+    def tipos(self, corretora):
+        return [(execucao.indice, execucao.tipo, execucao.preco) for execucao in corretora.execucoes]
+
+    def test_alvo_tem_prioridade_sobre_stop_na_mesma_vela(self):
+        corretora = self.replay(EstrategiaRoteirizada(0, True, stop=95, alvo=110),
+                                (101, 99, 100), (111, 94, 100))
+        self.assertEqual(self.tipos(corretora), [(0, 'entrada', 100), (1, 'alvo', 110)])
+        self.assertEqual(corretora.trades[0]['tipo_saida'], 'alvo')
+        self.assertEqual(corretora.saldo, 1010)
+
+    def test_saida_so_a_partir_da_vela_seguinte(self):
+        # A vela da entrada já passa do stop, mas a entrada é no fechamento dela
+        corretora = self.replay(EstrategiaRoteirizada(0, True, stop=95, alvo=110),
+                                (101, 90, 100), (102, 98, 100))
+        self.assertEqual(self.tipos(corretora), [(0, 'entrada', 100)])
+        self.assertEqual(corretora.estado, EstadoDeTrade.COMPRADO)
+
+    def test_parcial_antes_do_alvo(self):
+        corretora = self.replay(EstrategiaRoteirizada(0, False, stop=105, alvo=90, parcial=97),
+                                (101, 99, 100), (100, 96, 98), (99, 89, 92))
+        self.assertEqual(self.tipos(corretora),
+                         [(0, 'entrada', 100), (1, 'parcial', 97), (2, 'alvo', 90)])
+        self.assertEqual([execucao.quantidade for execucao in corretora.execucoes], [1.0, 0.5, 0.5])
+        # Venda: metade a 97 (+1,5) e metade a 90 (+5)
+        self.assertAlmostEqual(corretora.trades[0]['resultado'], 6.5)
+
+    def test_parcial_e_alvo_na_mesma_vela(self):
+        corretora = self.replay(EstrategiaRoteirizada(0, True, stop=95, alvo=110, parcial=103),
+                                (101, 99, 100), (112, 99, 105))
+        self.assertEqual(self.tipos(corretora),
+                         [(0, 'entrada', 100), (1, 'parcial', 103), (1, 'alvo', 110)])
+
+    def test_breakeven_move_o_stop_para_a_entrada(self):
+        corretora = self.replay(EstrategiaRoteirizada(0, True, stop=95, alvo=120, breakeven=105),
+                                (101, 99, 100), (106, 101, 104), (103, 99.5, 100))
+        self.assertEqual(self.tipos(corretora),
+                         [(0, 'entrada', 100), (1, 'breakeven', 100), (2, 'stop', 100)])
+        self.assertEqual(corretora.trades[0]['tipo_saida'], 'stop')
+        self.assertEqual(corretora.saldo, 1000)
+
+    def test_faixa_pula_velas_sem_perder_a_saida(self):
+        barras = [(101, 99, 100)] + [(104, 96, 100)] * 5 + [(104, 94.9, 96), (100, 90, 92)]
+        corretora = CorretoraSimulada(saldo=1000, taxa_corretora=0)
+        processadas = []
+        processar_vela = corretora.processar_vela
+
+        def contar(maxima, minima):
+            processadas.append(corretora.indice)
+            processar_vela(maxima, minima)
+
+        corretora.processar_vela = contar
+        executar_replay(EstrategiaRoteirizada(0, True, stop=95, alvo=110, parcial=105, breakeven=105),
+                        velas(*barras), corretora)
+        self.assertEqual((corretora.limite_inferior, corretora.limite_superior), (float('-inf'), float('inf')))
+        # As velas dentro de (95, 105) não chegam em processar_vela; a primeira fora da faixa sai no stop
+        self.assertEqual(processadas, [6])
+        self.assertEqual(self.tipos(corretora), [(0, 'entrada', 100), (6, 'stop', 95)])
+
+    def test_faixa_acompanha_o_breakeven(self):
+        # Depois do breakeven o stop sobe para 100: a vela que toca 99,9 tem que sair
+        barras = [(101, 99, 100), (105, 101, 104), (103, 100.5, 102), (102, 99.9, 100)]
+        corretora = self.replay(EstrategiaRoteirizada(0, True, stop=95, alvo=120, breakeven=105), *barras)
+        self.assertEqual(self.tipos(corretora),
+                         [(0, 'entrada', 100), (1, 'breakeven', 100), (3, 'stop', 100)])
+
+
+if __name__ == '__main__':
+    unittest.main()
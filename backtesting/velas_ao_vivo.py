@@ -0,0 +1,146 @@
+import threading
+import time
+import numpy as np
+import pandas as pd
+from historico_velas import intervalo_em_ms
+
+# Velas ao vivo pelo kline_stream da Bybit, no lugar de chamar busca_velas (1000 velas por
+# REST) a cada 0,25s. O REST só é usado para aquecer o histórico e para reparar lacunas
+# (reconexão, vela fechada que não chegou); o resto vem do WebSocket, e o loop do bot só
+# roda quando a vela muda.
+
+COLUNAS_VALORES = ['open', 'high', 'low', 'close', 'volume', 'turnover']
+
+
+class VelasAoVivo:
+    """
+    Mantém as últimas `limite` velas de `cripto`/`tempo_grafico` e entrega um DataFrame no
+    formato de busca_velas (com EMAs, RSI e Volume_EMA_20) a cada atualização:
+
+        velas = VelasAoVivo('BTCUSDT', '5', [9, 21])
+        velas.iniciar()
+        while True:
+            df = velas.esperar_atualizacao(timeout=60)
+
+    Vários VelasAoVivo podem dividir o mesmo `websocket` (WebSocket linear da pybit). Com
+    `fila` (queue.Queue), cada atualização também coloca este objeto na fila, para um
+    loop só atender várias velas (ver executor_de_bots).
+    """
+
+    def __init__(self, cripto, tempo_grafico, emas, limite=1000, cliente=None, websocket=None, fila=None):
+        self.cripto = cripto
+        self.tempo_grafico = str(tempo_grafico)
+        self.emas = emas
+        self.limite = limite
+        self.passo = intervalo_em_ms(tempo_grafico)
+        self.cliente = cliente
+        self.websocket = websocket
+        self.fila = fila
+
+        self.tempos = np.empty(0, dtype=np.int64)
+        self.valores = np.empty((0, len(COLUNAS_VALORES)))
+        self.ultima_confirmada = True
+        self.condicao = threading.Condition()
+        self.versao = 0
+        self._versao_entregue = 0
+        self.vela_fechou = False
+
+        self.requisicoes_rest = 0
+        self.mensagens = 0
+        self.ultima_mensagem = None
+
+    def _buscar_rest(self, **parametros):
+        if self.cliente is None:
+            # Importado aqui para não criar o cliente HTTP só de importar este módulo
+            from funcoes_bybit import cliente
+            self.cliente = cliente
+        self.requisicoes_rest += 1
+        resposta = self.cliente.get_kline(category='linear', symbol=self.cripto,
+                                          interval=self.tempo_grafico, **parametros)
+        return resposta['result']['list']
+
+    def iniciar(self):
+        # Aquece com as últimas velas (como busca_velas) e passa a ouvir o kline_stream
+        self._mesclar(self._buscar_rest(limit=self.limite))
+        with self.condicao:
+            # A última vela do aquecimento ainda está aberta
+            self.ultima_confirmada = False
+            self.versao += 1
+        if self.websocket is None:
+            from pybit.unified_trading import WebSocket
+            self.websocket = WebSocket(testnet=False, channel_type='linear')
+        self.websocket.kline_stream(interval=self.tempo_grafico, symbol=self.cripto,
+                                    callback=self._ao_receber)
+        print(f'Velas de {self.cripto} ({self.tempo_grafico}m) pelo WebSocket, '
+              f'{len(self.tempos)} velas de aquecimento', flush=True)
+        return self
+
+    def parar(self):
+        if self.websocket is not None:
+            self.websocket.exit()
+
+    def _mesclar(self, velas):
+        # Velas cruas da Bybit ([tempo, abertura, ...], strings) por cima das que já existem
+        if not velas:
+            return
+        with self.condicao:
+            por_tempo = dict(zip(self.tempos.tolist(), self.valores))
+            for vela in velas:
+                por_tempo[int(vela[0])] = np.asarray(vela[1:7], dtype=np.float64)
+            tempos = sorted(por_tempo)[-self.limite:]
+            self.tempos = np.array(tempos, dtype=np.int64)
+            self.valores = np.array([por_tempo[tempo] for tempo in tempos])
+
+    def _ao_receber(self, mensagem):
+        self.mensagens += 1
+        self.ultima_mensagem = time.time()
+        for vela in mensagem['data']:
+            self._atualizar(vela)
+
+    def _atualizar(self, vela):
+        tempo = int(vela['start'])
+        linha = np.array([float(vela[coluna]) for coluna in COLUNAS_VALORES])
+        ultimo = int(self.tempos[-1]) if len(self.tempos) else None
+
+        # Vela nova depois de lacuna, ou a anterior fechou sem a mensagem de confirmação
+        # (reconexão): busca por REST as velas que faltam antes de seguir
+        if ultimo is not None and tempo > ultimo and (tempo > ultimo + self.passo or not self.ultima_confirmada):
+            try:
+                self._mesclar(self._buscar_rest(start=ultimo, end=tempo - 1, limit=self.limite))
+            except Exception as e:
+                print(f'Erro ao reparar lacuna das velas de {self.cripto}: {e}', flush=True)
+
+        with self.condicao:
+            ultimo = int(self.tempos[-1]) if len(self.tempos) else None
+            if ultimo is not None and tempo < ultimo:
+                return  # Mensagem atrasada de uma vela antiga
+            if tempo == ultimo:
+                self.valores[-1] = linha
+            else:
+                self.tempos = np.append(self.tempos, tempo)[-self.limite:]
+                self.valores = np.vstack([self.valores, linha])[-self.limite:]
+            self.ultima_confirmada = bool(vela['confirm'])
+            self.vela_fechou = self.ultima_confirmada
+            self.versao += 1
+            self.condicao.notify_all()
+        if self.fila is not None:
+            self.fila.put(self)
+
+    def esperar_atualizacao(self, timeout=None):
+        """
+        Espera a próxima atualização das velas e retorna o DataFrame (como busca_velas),
+        ou None se nada chegou em `timeout` segundos. Atualizações que chegaram enquanto o
+        bot processava a anterior são juntadas: volta só o estado mais recente.
+        """
+        with self.condicao:
+            if not self.condicao.wait_for(lambda: self.versao != self._versao_entregue, timeout):
+                return None
+            self._versao_entregue = self.versao
+            tempos, valores = self.tempos.copy(), self.valores.copy()
+        return self._dataframe(tempos, valores)
+
+    def _dataframe(self, tempos, valores):
+        from funcoes_bybit import adiciona_indicadores
+        df = pd.DataFrame(valores, columns=COLUNAS_VALORES)
+        df.insert(0, 'open_time', pd.to_datetime(tempos, unit='ms'))
+        return adiciona_indicadores(df, self.cripto, self.tempo_grafico, self.emas)
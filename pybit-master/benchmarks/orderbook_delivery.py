@@ -0,0 +1,127 @@
+"""
+Messages/sec for orderbook stream processing, from message parsed to
+callback invoked, without a network connection.
+
+    PYTHONPATH=. python benchmarks/orderbook_delivery.py [depth] [messages]
+
+"before" is the pre-OrderBook processing: unsorted string lists updated with
+linear scans, and a copy.deepcopy of every message.
+"""
+import copy
+import random
+import sys
+import time
+
+from pybit import _helpers
+from pybit._websocket_stream import _V5WebSocketManager
+
+TOPIC = "orderbook.{depth}.BTCUSDT"
+
+
+def make_messages(depth, count, seed=7):
+    rng = random.Random(seed)
+    tick = 0.1
+    mid = 65000.0
+    bids = {round(mid - tick * (i + 1), 1) for i in range(depth)}
+    asks = {round(mid + tick * (i + 1), 1) for i in range(depth)}
+
+    def level(price):
+        return [f"{price:.1f}", f"{rng.uniform(0.001, 5):.3f}"]
+
+    topic = TOPIC.format(depth=depth)
+    messages = [
+        {
+            "topic": topic,
+            "type": "snapshot",
+            "ts": 0,
+            "data": {
+                "s": "BTCUSDT",
+                "b": [level(p) for p in sorted(bids, reverse=True)],
+                "a": [level(p) for p in sorted(asks)],
+                "u": 1,
+                "seq": 1,
+            },
+        }
+    ]
+    for u in range(2, count + 2):
+        data = {"s": "BTCUSDT", "b": [], "a": [], "u": u, "seq": u}
+        for side, levels, sign in (("b", bids, -1), ("a", asks, 1)):
+            for _ in range(rng.randint(5, 25)):
+                action = rng.random()
+                if action < 0.6:
+                    data[side].append(level(rng.choice(tuple(levels))))
+                elif action < 0.8 and len(levels) > depth // 2:
+                    price = rng.choice(tuple(levels))
+                    levels.discard(price)
+                    data[side].append([f"{price:.1f}", "0"])
+                else:
+                    edge = min(levels) if sign < 0 else max(levels)
+                    price = round(edge + sign * tick, 1)
+                    levels.add(price)
+                    data[side].append(level(price))
+        messages.append({"topic": topic, "type": "delta", "ts": u, "data": data})
+    return messages
+
+
+def before(messages, callback):
+    local = {}
+    for message in messages:
+        topic = message["topic"]
+        if "snapshot" in message["type"]:
+            local[topic] = message["data"]
+        else:
+            local[topic]["u"] = message["data"]["u"]
+            local[topic]["seq"] = message["data"]["seq"]
+            for side in ("b", "a"):
+                for entry in message["data"][side]:
+                    if float(entry[1]) == 0:
+                        index = _helpers.find_index(local[topic][side], entry, 0)
+                        local[topic][side].pop(index)
+                        continue
+                    if entry[0] not in [level[0] for level in local[topic][side]]:
+                        local[topic][side].append(entry)
+                        continue
+                    if entry[1] != next(
+                        level[1]
+                        for level in local[topic][side]
+                        if level[0] == entry[0]
+                    ):
+                        index = _helpers.find_index(local[topic][side], entry, 0)
+                        local[topic][side][index] = entry
+        callback_data = copy.deepcopy(message)
+        callback_data["type"] = "snapshot"
+        callback_data["data"] = local[topic]
+        callback(callback_data)
+
+
+def after(messages, callback, **kwargs):
+    manager = _V5WebSocketManager("benchmark", testnet=False, **kwargs)
+    manager._set_callback(messages[0]["topic"], callback)
+    for message in messages:
+        manager._handle_incoming_message(message)
+
+
+def callback(message):
+    pass
+
+
+def run(name, function, messages, **kwargs):
+    # The snapshot's lists become local state, so each run gets its own copy.
+    messages = copy.deepcopy(messages)
+    start = time.perf_counter()
+    function(messages, callback, **kwargs)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<32} {len(messages) / elapsed:>12,.0f} msgs/s")
+
+
+if __name__ == "__main__":
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    messages = make_messages(depth, count)
+    print(f"orderbook.{depth}, {count} deltas")
+    run("before (lists + deepcopy)", before, messages)
+    run("after, legacy_orderbook=True", after, messages)
+    run("after, copy_callback_data=True", after, messages,
+        legacy_orderbook=False, copy_callback_data=True)
+    run("after, legacy_orderbook=False", after, messages,
+        legacy_orderbook=False)
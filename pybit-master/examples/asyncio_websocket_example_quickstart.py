@@ -0,0 +1,19 @@
+import asyncio
+from pybit.unified_trading import AsyncWebSocket
+
+
+async def watch_klines(ws, symbol):
+    stream = await ws.kline_stream(interval=1, symbol=symbol)
+    async for message in stream:
+        print(message)
+
+
+async def main():
+    # One connection and one event loop carry every symbol.
+    async with AsyncWebSocket(testnet=True, channel_type="linear") as ws:
+        await asyncio.gather(
+            *(watch_klines(ws, symbol) for symbol in ("BTCUSDT", "ETHUSDT", "SOLUSDT"))
+        )
+
+
+asyncio.run(main())
@@ -0,0 +1,175 @@
+from dataclasses import dataclass, field
+from datetime import timedelta
+import asyncio
+import json
+import time
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from ._http_manager import _V5HTTPManager
+from ._async_websocket_stream import _require_aiohttp
+
+
+@dataclass
+class _V5AsyncHTTPManager(_V5HTTPManager):
+    """
+    asyncio counterpart of _V5HTTPManager. Requests go through one pooled
+    aiohttp session with keep-alive, and use the same payload preparation,
+    signing, retry codes and ignore codes as the blocking manager.
+    """
+
+    # Pass a session to share its connection pool between clients; it is not
+    # closed by close().
+    session: object = field(default=None)
+    max_connections: int = field(default=100)
+    keepalive_timeout: int = field(default=30)
+
+    def _init_client(self):
+        _require_aiohttp()
+        self._owns_session = self.session is None
+        # The session is created on first use, inside the running event loop.
+        return self.session
+
+    def _get_client(self):
+        if self.client is None or self.client.closed:
+            self.client = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.max_connections,
+                    keepalive_timeout=self.keepalive_timeout,
+                ),
+            )
+            self._owns_session = True
+        return self.client
+
+    async def close(self):
+        """
+        Close the connection pool, unless the session was passed in.
+        """
+        if self._owns_session and self.client is not None:
+            await self.client.close()
+            self.client = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def _submit_request(self, method=None, path=None, query=None, auth=False):
+        """
+        Submits the request to the API. See _V5HTTPManager._submit_request.
+        """
+
+        query = self._prepare_query(query)
+
+        # Store original recv_window.
+        recv_window = self.recv_window
+
+        # Send request and return headers with body. Retry if failed.
+        retries_attempted = self.max_retries
+        req_params = None
+
+        while True:
+            retries_attempted -= 1
+            if retries_attempted < 0:
+                raise self._retries_exceeded_error(method, path, req_params)
+
+            retries_remaining = f"{retries_attempted} retries remain."
+
+            req_params = self.prepare_payload(method, query)
+
+            # Wait for the rate limiter before signing, so the wait does not
+            # count against recv_window.
+            delay_time = self._rate_limit_delay(path, auth)
+            if delay_time:
+                await asyncio.sleep(delay_time)
+            headers = self._default_headers()
+            headers.update(self._prepare_headers(req_params, recv_window, auth))
+
+            if method == "GET":
+                url = path + f"?{req_params}" if req_params else path
+                data = None
+            else:
+                url = path
+                data = req_params
+
+            # Log the request.
+            if self.log_requests:
+                if req_params:
+                    self.logger.debug(
+                        f"Request -> {method} {path}. Body: {req_params}. "
+                        f"Headers: {headers}"
+                    )
+                else:
+                    self.logger.debug(
+                        f"Request -> {method} {path}. Headers: {headers}"
+                    )
+
+            # Attempt the request.
+            start = time.monotonic()
+            try:
+                async with self._get_client().request(
+                    method,
+                    url,
+                    data=data,
+                    headers=headers,
+                    timeout=aiohttp.ClientTimeout(total=self.timeout),
+                ) as s:
+                    text = await s.text()
+
+            # If aiohttp fires an error, retry.
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if self.force_retry:
+                    self.logger.error(f"{e}. {retries_remaining}")
+                    await asyncio.sleep(self.retry_delay)
+                    continue
+                else:
+                    raise e
+            elapsed = timedelta(seconds=time.monotonic() - start)
+
+            self._update_rate_limit(path, s.headers)
+            self._check_status_code(
+                s.status, text, s.headers, method, path, req_params
+            )
+
+            # Convert response to dictionary, or raise if it is not JSON.
+            try:
+                s_json = json.loads(text)
+
+            # If we have trouble converting, handle the error and retry.
+            except json.JSONDecodeError as e:
+                if self.force_retry:
+                    self.logger.error(f"{e}. {retries_remaining}")
+                    await asyncio.sleep(self.retry_delay)
+                    continue
+                else:
+                    self.logger.debug(f"Response text: {text}")
+                    raise self._json_decode_error(
+                        method, path, req_params, s.headers
+                    )
+
+            # If Bybit returns an error, retry, ignore or raise.
+            if s_json["retCode"]:
+                retry = self._handle_ret_code(
+                    s_json, s.headers, method, path, req_params,
+                    recv_window, retries_remaining,
+                )
+                if retry is not None:
+                    delay_time, recv_window = retry
+                    await asyncio.sleep(delay_time)
+                    continue
+            else:
+                if self.log_requests:
+                    self.logger.debug(
+                        f"Response headers: {s.headers}"
+                    )
+
+                if self.return_response_headers:
+                    return s_json, elapsed, s.headers,
+                elif self.record_request_time:
+                    return s_json, elapsed
+                else:
+                    return s_json
@@ -0,0 +1,364 @@
+import asyncio
+import json
+import logging
+from uuid import uuid4
+
+import websocket
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from ._http_manager import generate_signature
+from ._websocket_stream import (
+    _V5MessageHandler,
+    SUBDOMAIN_TESTNET,
+    SUBDOMAIN_MAINNET,
+    DEMO_SUBDOMAIN_TESTNET,
+    DEMO_SUBDOMAIN_MAINNET,
+    DOMAIN_MAIN,
+    TLD_MAIN,
+)
+from . import _helpers
+
+
+logger = logging.getLogger(__name__)
+
+
+def _require_aiohttp():
+    if aiohttp is None:
+        raise ImportError(
+            "The asyncio clients require aiohttp. Install it with "
+            "`pip install pybit[async]`."
+        )
+
+
+class TopicStream:
+    """
+    Async iterator over the messages of one subscription.
+
+    Messages are buffered in a bounded queue. When the consumer falls behind
+    and the queue is full, the oldest message is dropped and counted in
+    `dropped`, so a slow consumer always resumes on recent data.
+
+    Orderbook subscriptions made with legacy_orderbook=False deliver
+    OrderBookView objects, which go stale once the next message is applied.
+    Pass copy_callback_data=True when consuming those from a queue.
+    """
+
+    def __init__(self, topics, maxsize=1000):
+        self.topics = topics
+        self.dropped = 0
+        self._queue = asyncio.Queue(maxsize=maxsize)
+
+    def _put(self, message):
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(message)
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    async def get(self):
+        return await self._queue.get()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self._queue.get()
+
+
+class _AsyncWebSocketManager:
+    """
+    asyncio counterpart of _WebSocketManager. The connection, reader and ping
+    loops are tasks on the running event loop, so any number of connections
+    can share one thread and no call waits by polling.
+    """
+
+    def __init__(
+        self,
+        ws_name,
+        testnet,
+        tld="",
+        domain="",
+        demo=False,
+        rsa_authentication=False,
+        api_key=None,
+        api_secret=None,
+        ping_interval=20,
+        ping_timeout=10,
+        retries=10,
+        restart_on_error=True,
+        private_auth_expire=1,
+        session=None,
+    ):
+        _require_aiohttp()
+        self.testnet = testnet
+        self.domain = domain
+        self.tld = tld
+        self.rsa_authentication = rsa_authentication
+        self.demo = demo
+        self.api_key = api_key
+        self.api_secret = api_secret
+
+        self.ws_name = ws_name
+        if api_key:
+            self.ws_name += " (Auth)"
+
+        self.private_auth_expire = private_auth_expire
+        self.callback_directory = {}
+        self.subscriptions = {}
+
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.custom_ping_message = json.dumps({"op": "ping"})
+        self.retries = retries
+        self.handle_error = restart_on_error
+
+        # A session passed in is shared with other clients and is not closed
+        # by exit().
+        self.session = session
+        self._owns_session = session is None
+
+        self.ws = None
+        self.endpoint = None
+        self._connected = None
+        self._auth_waiter = None
+        self._reader_task = None
+        self._ping_task = None
+        self._reset()
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.exit()
+
+    def _format_url(self, url):
+        subdomain = SUBDOMAIN_TESTNET if self.testnet else SUBDOMAIN_MAINNET
+        domain = DOMAIN_MAIN if not self.domain else self.domain
+        tld = TLD_MAIN if not self.tld else self.tld
+        if self.demo:
+            if self.testnet:
+                subdomain = DEMO_SUBDOMAIN_TESTNET
+            else:
+                subdomain = DEMO_SUBDOMAIN_MAINNET
+        return url.format(SUBDOMAIN=subdomain, DOMAIN=domain, TLD=tld)
+
+    def is_connected(self):
+        return self.ws is not None and not self.ws.closed
+
+    async def connect(self):
+        """
+        Open the connection. Called automatically by the first request if
+        the client is not used as an async context manager.
+        """
+        await self._connect(self.WS_URL)
+
+    async def _connect(self, url):
+        """
+        Open the websocket, authenticate and resubscribe, retrying with a
+        backoff up to `retries` times (forever if retries is 0).
+        """
+        if self._connected is None:
+            self._connected = asyncio.Event()
+        if self.session is None:
+            self.session = aiohttp.ClientSession()
+        self.endpoint = self._format_url(url)
+
+        attempt = 0
+        while not self.is_connected():
+            attempt += 1
+            logger.info(f"WebSocket {self.ws_name} attempting connection...")
+            try:
+                self.ws = await asyncio.wait_for(
+                    self.session.ws_connect(
+                        self.endpoint, heartbeat=self.ping_interval
+                    ),
+                    self.ping_timeout,
+                )
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if self.retries and attempt >= self.retries:
+                    await self.exit()
+                    raise websocket.WebSocketTimeoutException(
+                        f"WebSocket {self.ws_name} ({self.endpoint}) "
+                        f"connection failed. Too many connection attempts. "
+                        f"pybit will no longer try to reconnect."
+                    ) from e
+                await asyncio.sleep(min(2 ** (attempt - 1), 30))
+
+        logger.info(f"WebSocket {self.ws_name} connected")
+
+        self._reader_task = asyncio.ensure_future(self._read_loop())
+        if self.api_key and self.api_secret:
+            await self._auth()
+
+        for subscription_message in self.subscriptions.values():
+            await self.ws.send_str(subscription_message)
+
+        if self._ping_task is None:
+            self._ping_task = asyncio.ensure_future(self._ping_loop())
+        self._connected.set()
+
+    async def _auth(self):
+        """
+        Prepares authentication signature per Bybit API specifications and
+        waits for the server to accept it.
+        """
+        expires = _helpers.generate_timestamp() + (self.private_auth_expire * 1000)
+        param_str = f"GET/realtime{expires}"
+        signature = generate_signature(
+            self.rsa_authentication, self.api_secret, param_str
+        )
+
+        self._auth_waiter = asyncio.get_running_loop().create_future()
+        await self.ws.send_str(
+            json.dumps(
+                {"op": "auth", "args": [self.api_key, expires, signature]}
+            )
+        )
+        await asyncio.wait_for(self._auth_waiter, self.ping_timeout)
+
+    def _resolve_auth(self, error=None):
+        if self._auth_waiter is None or self._auth_waiter.done():
+            return
+        if error is None:
+            self._auth_waiter.set_result(True)
+        else:
+            self._auth_waiter.set_exception(error)
+
+    async def _read_loop(self):
+        ws = self.ws
+        async for msg in ws:
+            if msg.type == aiohttp.WSMsgType.TEXT:
+                message = json.loads(msg.data)
+                if self._is_custom_pong(message):
+                    continue
+                try:
+                    self._handle_incoming_message(message)
+                except Exception as e:
+                    logger.exception(
+                        f"WebSocket {self.ws_name} failed to process "
+                        f"message: {e}"
+                    )
+            elif msg.type == aiohttp.WSMsgType.ERROR:
+                break
+
+        if self.exited:
+            return
+        logger.error(
+            f"WebSocket {self.ws_name} ({self.endpoint}) disconnected: "
+            f"{ws.exception()}."
+        )
+        self._connected.clear()
+        if self.handle_error:
+            self._reset()
+            await self._connect(self.endpoint)
+        else:
+            await self.exit()
+
+    async def _ping_loop(self):
+        """
+        Bybit expects a custom ping text message on top of protocol pings.
+        """
+        while not self.exited:
+            await asyncio.sleep(self.ping_interval)
+            if self.is_connected():
+                try:
+                    await self.ws.send_str(self.custom_ping_message)
+                except ConnectionResetError:
+                    pass
+
+    async def _send(self, message):
+        if self._connected is None:
+            await self.connect()
+        elif not self.is_connected():
+            await self._connected.wait()
+        await self.ws.send_str(message)
+
+    @staticmethod
+    def _is_custom_pong(message):
+        """
+        Referring to OPCODE_TEXT pongs from Bybit, not OPCODE_PONG.
+        """
+        if message.get("ret_msg") == "pong" or message.get("op") == "pong":
+            return True
+
+    def _reset(self):
+        """
+        Set state booleans and initialize dictionary.
+        """
+        self.exited = False
+        self.auth = False
+        self.data = {}
+
+    async def exit(self):
+        """
+        Closes the websocket connection and cancels its tasks.
+        """
+        self.exited = True
+        current = asyncio.current_task()
+        for task in (self._ping_task, self._reader_task):
+            if task is not None and task is not current:
+                task.cancel()
+        self._ping_task = None
+        self._reader_task = None
+        if self.ws is not None:
+            await self.ws.close()
+        if self._owns_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+
+
+class _AsyncV5WebSocketManager(_V5MessageHandler, _AsyncWebSocketManager):
+    def __init__(self, ws_name, **kwargs):
+        self.legacy_orderbook = kwargs.pop("legacy_orderbook", True)
+        self.copy_callback_data = kwargs.pop("copy_callback_data", False)
+        self.queue_size = kwargs.pop("queue_size", 1000)
+        super().__init__(ws_name, **kwargs)
+
+    def _process_auth_message(self, message):
+        try:
+            super()._process_auth_message(message)
+        except Exception as e:
+            self._resolve_auth(e)
+        else:
+            self._resolve_auth()
+
+    async def subscribe(
+            self,
+            topic: str,
+            callback=None,
+            symbol: (str, list) = False
+    ):
+        """
+        Subscribe to a topic. Messages are passed to `callback` if one is
+        given (coroutine functions are scheduled as tasks). Otherwise a
+        TopicStream is returned to iterate over them.
+        """
+        subscription_args = self._prepare_subscription_args(topic, symbol)
+        self._check_callback_directory(subscription_args)
+
+        stream = None
+        if callback is None:
+            stream = TopicStream(subscription_args, self.queue_size)
+            callback = stream._put
+        elif asyncio.iscoroutinefunction(callback):
+            coroutine_function = callback
+
+            def callback(message):
+                asyncio.ensure_future(coroutine_function(message))
+
+        req_id = str(uuid4())
+        subscription_message = json.dumps(
+            {"op": "subscribe", "req_id": req_id, "args": subscription_args}
+        )
+        for topic in subscription_args:
+            self._set_callback(topic, callback)
+        self.subscriptions[req_id] = subscription_message
+        await self._send(subscription_message)
+        return stream
@@ -0,0 +1,103 @@
+import asyncio
+import json
+import uuid
+import logging
+from ._async_websocket_stream import _AsyncWebSocketManager
+from ._websocket_trading import WSS_NAME, TRADE_WSS
+from . import _helpers
+
+
+logger = logging.getLogger(__name__)
+
+
+class _AsyncV5TradeWebSocketManager(_AsyncWebSocketManager):
+    def __init__(self, recv_window, referral_id, timeout=10, **kwargs):
+        # Futures of order operations waiting for their response, by reqId.
+        self._pending = {}
+        super().__init__(WSS_NAME, **kwargs)
+        self.recv_window = recv_window
+        self.referral_id = referral_id
+        self.timeout = timeout
+        self.WS_URL = TRADE_WSS
+
+    def _reset(self):
+        super()._reset()
+        # Responses to requests sent on a dropped connection never arrive.
+        for request_id, future in self._pending.items():
+            if not future.done():
+                future.set_exception(
+                    ConnectionError(
+                        f"WebSocket {self.ws_name} disconnected before "
+                        f"request {request_id} was answered."
+                    )
+                )
+        self._pending.clear()
+
+    def _process_auth_message(self, message):
+        # If we get successful auth, notify user
+        if message.get("retCode") == 0:
+            logger.debug(f"Authorization for {self.ws_name} successful.")
+            self.auth = True
+            self._resolve_auth()
+        # If we get unsuccessful auth, notify user.
+        else:
+            self._resolve_auth(
+                Exception(
+                    f"Authorization for {self.ws_name} failed. Please check "
+                    f"your API keys and resync your system time. Raw error: "
+                    f"{message}"
+                )
+            )
+
+    def _handle_incoming_message(self, message):
+        if message.get("op") == "auth":
+            self._process_auth_message(message)
+            return
+
+        request_id = message.get("reqId")
+        if message.get("retCode") != 0:
+            logger.error(
+                f"WebSocket request {request_id} hit an error. Raw error: "
+                f"{message}"
+            )
+
+        callback_function = self.callback_directory.pop(request_id, None)
+        if callback_function is not None:
+            callback_function(message)
+        future = self._pending.pop(request_id, None)
+        if future is not None and not future.done():
+            future.set_result(message)
+
+    async def _send_order_operation(self, operation, callback, request):
+        """
+        Send an order operation and wait for its response, which is also
+        passed to `callback` if one is given.
+        """
+        request_id = str(uuid.uuid4())
+
+        message = {
+            "reqId": request_id,
+            "header": {
+                "X-BAPI-TIMESTAMP": _helpers.generate_timestamp(),
+            },
+            "op": operation,
+            "args": [
+                request
+            ],
+        }
+
+        if self.recv_window:
+            message["header"]["X-BAPI-RECV-WINDOW"] = self.recv_window
+        if self.referral_id:
+            message["header"]["Referer"] = self.referral_id
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        if callback is not None:
+            self.callback_directory[request_id] = callback
+        try:
+            await self._send(json.dumps(message))
+            return await asyncio.wait_for(future, self.timeout)
+        finally:
+            self._pending.pop(request_id, None)
+            self.callback_directory.pop(request_id, None)
@@ -14,6 +14,7 @@ import requests
 from datetime import datetime as dt, timezone
 
 from .exceptions import FailedRequestError, InvalidRequestError
+from ._rate_limiter import RateLimiter
 from . import _helpers
 
 # Requests will use simplejson if available.
@@ -79,6 +80,7 @@ class _V5HTTPManager:
     referral_id: bool = field(default=None)
     record_request_time: bool = field(default=False)
     return_response_headers: bool = field(default=False)
+    rate_limiter: RateLimiter = field(default=None)
 
     def __post_init__(self):
         subdomain = SUBDOMAIN_TESTNET if self.testnet else SUBDOMAIN_MAINNET
@@ -95,6 +97,10 @@ class _V5HTTPManager:
             self.ignore_codes = set()
         if not self.retry_codes:
             self.retry_codes = {10002, 10006, 30034, 30035, 130035, 130150}
+        # Pass True for a limiter of this session only, or a RateLimiter to
+        # share one between sessions.
+        if self.rate_limiter is True:
+            self.rate_limiter = RateLimiter()
         self.logger = logging.getLogger(__name__)
         if len(logging.root.handlers) == 0:
             # no handler on root logger set -> we add handler just for this logger to not mess with custom logic from outside
@@ -110,15 +116,21 @@ class _V5HTTPManager:
 
         self.logger.debug("Initializing HTTP session.")
 
-        self.client = requests.Session()
-        self.client.headers.update(
-            {
-                "Content-Type": "application/json",
-                "Accept": "application/json",
-            }
-        )
+        self.client = self._init_client()
+
+    def _default_headers(self):
+        headers = {
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+        }
         if self.referral_id:
-            self.client.headers.update({"Referer": self.referral_id})
+            headers["Referer"] = self.referral_id
+        return headers
+
+    def _init_client(self):
+        client = requests.Session()
+        client.headers.update(self._default_headers())
+        return client
 
     @staticmethod
     def prepare_payload(method, parameters):
@@ -179,6 +191,175 @@ class _V5HTTPManager:
                 return True
         return True
 
+    @staticmethod
+    def _prepare_query(query):
+        if query is None:
+            return {}
+
+        # Bug fix: change floating whole numbers to integers to prevent
+        # auth signature errors.
+        for i in query.keys():
+            if isinstance(query[i], float) and query[i] == int(query[i]):
+                query[i] = int(query[i])
+
+        # Remove params with None value from the request.
+        return {key: value for key, value in query.items()
+                if value is not None}
+
+    def _prepare_headers(self, req_params, recv_window, auth):
+        # Authenticate if we are using a private endpoint.
+        if not auth:
+            return {}
+
+        # Prepare signature.
+        timestamp = _helpers.generate_timestamp()
+        signature = self._auth(
+            payload=req_params,
+            recv_window=recv_window,
+            timestamp=timestamp,
+        )
+        return {
+            "Content-Type": "application/json",
+            "X-BAPI-API-KEY": self.api_key,
+            "X-BAPI-SIGN": signature,
+            "X-BAPI-SIGN-TYPE": "2",
+            "X-BAPI-TIMESTAMP": str(timestamp),
+            "X-BAPI-RECV-WINDOW": str(recv_window),
+        }
+
+    def _rate_limit_path(self, path):
+        if path.startswith(self.endpoint):
+            return path[len(self.endpoint):]
+        return path
+
+    def _rate_limit_delay(self, path, auth):
+        """
+        Returns:
+            Seconds to wait before sending, to stay under the rate limit.
+        """
+        if not self.rate_limiter:
+            return 0
+        delay = self.rate_limiter.acquire(self._rate_limit_path(path), auth)
+        if delay and self.log_requests:
+            self.logger.debug(
+                f"Rate limiter delaying {path} by {int(delay * 10**3)} "
+                f"milliseconds"
+            )
+        return delay
+
+    def _update_rate_limit(self, path, resp_headers):
+        if self.rate_limiter:
+            self.rate_limiter.update(self._rate_limit_path(path), resp_headers)
+
+    def rate_limit_status(self):
+        """
+        Returns:
+            The headroom of each rate limit bucket, or an empty dict if
+            no rate_limiter is set. See RateLimiter.status().
+        """
+        if not self.rate_limiter:
+            return {}
+        return self.rate_limiter.status()
+
+    @staticmethod
+    def _retries_exceeded_error(method, path, req_params):
+        return FailedRequestError(
+            request=f"{method} {path}: {req_params}",
+            message="Bad Request. Retries exceeded maximum.",
+            status_code=400,
+            time=dt.now(timezone.utc).strftime("%H:%M:%S"),
+            resp_headers=None,
+        )
+
+    def _check_status_code(self, status_code, text, resp_headers, method, path, req_params):
+        # Check HTTP status code before trying to decode JSON.
+        if status_code != 200:
+            if status_code == 403:
+                error_msg = "You have breached the IP rate limit or your IP is from the USA."
+            else:
+                error_msg = "HTTP status code is not 200."
+            self.logger.debug(f"Response text: {text}")
+            raise FailedRequestError(
+                request=f"{method} {path}: {req_params}",
+                message=error_msg,
+                status_code=status_code,
+                time=dt.now(timezone.utc).strftime("%H:%M:%S"),
+                resp_headers=resp_headers,
+            )
+
+    @staticmethod
+    def _json_decode_error(method, path, req_params, resp_headers):
+        return FailedRequestError(
+            request=f"{method} {path}: {req_params}",
+            message="Conflict. Could not decode JSON.",
+            status_code=409,
+            time=dt.now(timezone.utc).strftime("%H:%M:%S"),
+            resp_headers=resp_headers,
+        )
+
+    def _handle_ret_code(self, s_json, resp_headers, method, path, req_params,
+                         recv_window, retries_remaining):
+        """
+        Applies the retry and ignore codes to a response with a non-zero
+        retCode.
+
+        Returns:
+            (delay, recv_window) if the request should be retried after
+            sleeping for delay seconds, or None if the code is ignored.
+
+        Raises:
+            InvalidRequestError for any other code.
+        """
+        ret_code = "retCode"
+        ret_msg = "retMsg"
+
+        # Generate error message.
+        error_msg = f"{s_json[ret_msg]} (ErrCode: {s_json[ret_code]})"
+
+        # Set default retry delay.
+        delay_time = self.retry_delay
+
+        # Retry non-fatal whitelisted error requests.
+        if s_json[ret_code] in self.retry_codes:
+            # 10002, recv_window error; add 2.5 seconds and retry.
+            if s_json[ret_code] == 10002:
+                error_msg += ". Added 2.5 seconds to recv_window"
+                recv_window += 2500
+
+            # 10006, rate limit error; wait until
+            # X-Bapi-Limit-Reset-Timestamp and retry.
+            elif s_json[ret_code] == 10006:
+                self.logger.error(
+                    f"{error_msg}. Hit the API rate limit. "
+                    f"Sleeping, then trying again. Request: {path}"
+                )
+
+                # Calculate how long we need to wait in milliseconds.
+                limit_reset_time = int(resp_headers["X-Bapi-Limit-Reset-Timestamp"])
+                limit_reset_str = dt.fromtimestamp(limit_reset_time / 10**3).strftime(
+                    "%H:%M:%S.%f")[:-3]
+                delay_time = (int(limit_reset_time) - _helpers.generate_timestamp()) / 10**3
+                error_msg = (
+                    f"API rate limit will reset at {limit_reset_str}. "
+                    f"Sleeping for {int(delay_time * 10**3)} milliseconds"
+                )
+
+            # Log the error.
+            self.logger.error(f"{error_msg}. {retries_remaining}")
+            return max(delay_time, 0), recv_window
+
+        elif s_json[ret_code] in self.ignore_codes:
+            return None
+
+        else:
+            raise InvalidRequestError(
+                request=f"{method} {path}: {req_params}",
+                message=s_json[ret_msg],
+                status_code=s_json[ret_code],
+                time=dt.now(timezone.utc).strftime("%H:%M:%S"),
+                resp_headers=resp_headers,
+            )
+
     def _submit_request(self, method=None, path=None, query=None, auth=False):
         """
         Submits the request to the API.
@@ -191,23 +372,11 @@ class _V5HTTPManager:
 
         """
 
-        if query is None:
-            query = {}
+        query = self._prepare_query(query)
 
         # Store original recv_window.
         recv_window = self.recv_window
 
-        # Bug fix: change floating whole numbers to integers to prevent
-        # auth signature errors.
-        if query is not None:
-            for i in query.keys():
-                if isinstance(query[i], float) and query[i] == int(query[i]):
-                    query[i] = int(query[i])
-
-            # Remove params with None value from the request.
-            query = {key: value for key, value in query.items()
-                     if value is not None}
-
         # Send request and return headers with body. Retry if failed.
         retries_attempted = self.max_retries
         req_params = None
@@ -215,37 +384,18 @@ class _V5HTTPManager:
         while True:
             retries_attempted -= 1
             if retries_attempted < 0:
-                raise FailedRequestError(
-                    request=f"{method} {path}: {req_params}",
-                    message="Bad Request. Retries exceeded maximum.",
-                    status_code=400,
-                    time=dt.now(timezone.utc).strftime("%H:%M:%S"),
-                    resp_headers=None,
-                )
+                raise self._retries_exceeded_error(method, path, req_params)
 
             retries_remaining = f"{retries_attempted} retries remain."
 
             req_params = self.prepare_payload(method, query)
 
-            # Authenticate if we are using a private endpoint.
-            if auth:
-                # Prepare signature.
-                timestamp = _helpers.generate_timestamp()
-                signature = self._auth(
-                    payload=req_params,
-                    recv_window=recv_window,
-                    timestamp=timestamp,
-                )
-                headers = {
-                    "Content-Type": "application/json",
-                    "X-BAPI-API-KEY": self.api_key,
-                    "X-BAPI-SIGN": signature,
-                    "X-BAPI-SIGN-TYPE": "2",
-                    "X-BAPI-TIMESTAMP": str(timestamp),
-                    "X-BAPI-RECV-WINDOW": str(recv_window),
-                }
-            else:
-                headers = {}
+            # Wait for the rate limiter before signing, so the wait does not
+            # count against recv_window.
+            delay_time = self._rate_limit_delay(path, auth)
+            if delay_time:
+                time.sleep(delay_time)
+            headers = self._prepare_headers(req_params, recv_window, auth)
 
             if method == "GET":
                 if req_params:
@@ -294,20 +444,10 @@ class _V5HTTPManager:
                 else:
                     raise e
 
-            # Check HTTP status code before trying to decode JSON.
-            if s.status_code != 200:
-                if s.status_code == 403:
-                    error_msg = "You have breached the IP rate limit or your IP is from the USA."
-                else:
-                    error_msg = "HTTP status code is not 200."
-                self.logger.debug(f"Response text: {s.text}")
-                raise FailedRequestError(
-                    request=f"{method} {path}: {req_params}",
-                    message=error_msg,
-                    status_code=s.status_code,
-                    time=dt.now(timezone.utc).strftime("%H:%M:%S"),
-                    resp_headers=s.headers,
-                )
+            self._update_rate_limit(path, s.headers)
+            self._check_status_code(
+                s.status_code, s.text, s.headers, method, path, req_params
+            )
 
             # Convert response to dictionary, or raise if requests error.
             try:
@@ -321,66 +461,20 @@ class _V5HTTPManager:
                     continue
                 else:
                     self.logger.debug(f"Response text: {s.text}")
-                    raise FailedRequestError(
-                        request=f"{method} {path}: {req_params}",
-                        message="Conflict. Could not decode JSON.",
-                        status_code=409,
-                        time=dt.now(timezone.utc).strftime("%H:%M:%S"),
-                        resp_headers=s.headers,
+                    raise self._json_decode_error(
+                        method, path, req_params, s.headers
                     )
 
-            ret_code = "retCode"
-            ret_msg = "retMsg"
-
-            # If Bybit returns an error, raise.
-            if s_json[ret_code]:
-                # Generate error message.
-                error_msg = f"{s_json[ret_msg]} (ErrCode: {s_json[ret_code]})"
-
-                # Set default retry delay.
-                delay_time = self.retry_delay
-
-                # Retry non-fatal whitelisted error requests.
-                if s_json[ret_code] in self.retry_codes:
-                    # 10002, recv_window error; add 2.5 seconds and retry.
-                    if s_json[ret_code] == 10002:
-                        error_msg += ". Added 2.5 seconds to recv_window"
-                        recv_window += 2500
-
-                    # 10006, rate limit error; wait until
-                    # X-Bapi-Limit-Reset-Timestamp and retry.
-                    elif s_json[ret_code] == 10006:
-                        self.logger.error(
-                            f"{error_msg}. Hit the API rate limit. "
-                            f"Sleeping, then trying again. Request: {path}"
-                        )
-
-                        # Calculate how long we need to wait in milliseconds.
-                        limit_reset_time = int(s.headers["X-Bapi-Limit-Reset-Timestamp"])
-                        limit_reset_str = dt.fromtimestamp(limit_reset_time / 10**3).strftime(
-                            "%H:%M:%S.%f")[:-3]
-                        delay_time = (int(limit_reset_time) - _helpers.generate_timestamp()) / 10**3
-                        error_msg = (
-                            f"API rate limit will reset at {limit_reset_str}. "
-                            f"Sleeping for {int(delay_time * 10**3)} milliseconds"
-                        )
-
-                    # Log the error.
-                    self.logger.error(f"{error_msg}. {retries_remaining}")
+            # If Bybit returns an error, retry, ignore or raise.
+            if s_json["retCode"]:
+                retry = self._handle_ret_code(
+                    s_json, s.headers, method, path, req_params,
+                    recv_window, retries_remaining,
+                )
+                if retry is not None:
+                    delay_time, recv_window = retry
                     time.sleep(delay_time)
                     continue
-
-                elif s_json[ret_code] in self.ignore_codes:
-                    pass
-
-                else:
-                    raise InvalidRequestError(
-                        request=f"{method} {path}: {req_params}",
-                        message=s_json[ret_msg],
-                        status_code=s_json[ret_code],
-                        time=dt.now(timezone.utc).strftime("%H:%M:%S"),
-                        resp_headers=s.headers,
-                    )
             else:
                 if self.log_requests:
                     self.logger.debug(
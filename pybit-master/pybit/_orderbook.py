@@ -0,0 +1,304 @@
+from bisect import bisect_left
+
+from .exceptions import StaleOrderBookError
+
+
+class _BookSide:
+    """
+    One side (bids or asks) of a local order book.
+
+    Sizes are kept in a dict keyed by numeric price, next to a sorted index of
+    price keys so that the best level, top-N and cumulative depth can be read
+    without re-sorting. Bid keys are stored negated, which keeps index 0 as
+    the best level on both sides.
+
+    Lookups are O(log n) bisections. Inserting or removing a level also shifts
+    the index list, which is a single memmove and is negligible next to the
+    per-level Python overhead at exchange depths (<= 1000 levels).
+    """
+
+    def __init__(self, descending):
+        self._sign = -1 if descending else 1
+        self._keys = []
+        self.sizes = {}
+        # The original [price, size] string pairs, used to build the legacy
+        # list view without reformatting floats.
+        self._raw = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, price):
+        return price in self.sizes
+
+    def clear(self):
+        self._keys.clear()
+        self.sizes.clear()
+        self._raw.clear()
+
+    def update(self, entry):
+        """
+        Apply a single [price, size] level. A size of zero deletes the level.
+        """
+        price = float(entry[0])
+        size = float(entry[1])
+        key = self._sign * price
+
+        if size == 0:
+            if price in self.sizes:
+                del self.sizes[price]
+                del self._raw[price]
+                del self._keys[bisect_left(self._keys, key)]
+            return
+
+        if price not in self.sizes:
+            self._keys.insert(bisect_left(self._keys, key), key)
+        self.sizes[price] = size
+        self._raw[price] = entry
+
+    def prices(self, n=None):
+        """
+        Return up to n prices, best first.
+        """
+        keys = self._keys if n is None else self._keys[:n]
+        sign = self._sign
+        return [sign * key for key in keys]
+
+    def best(self):
+        if not self._keys:
+            return None
+        price = self._sign * self._keys[0]
+        return price, self.sizes[price]
+
+    def top(self, n=None):
+        """
+        Return up to n (price, size) tuples, best first.
+        """
+        sizes = self.sizes
+        return [(price, sizes[price]) for price in self.prices(n)]
+
+    def cumulative(self, n=None):
+        """
+        Return up to n (price, cumulative size) tuples, best first.
+        """
+        total = 0.0
+        depth = []
+        for price, size in self.top(n):
+            total += size
+            depth.append((price, total))
+        return depth
+
+    def copy(self):
+        """
+        Return a detached side. The containers are copied, the [price, size]
+        entries are shared: the stream replaces entries, it never edits them.
+        """
+        side = _BookSide.__new__(_BookSide)
+        side._sign = self._sign
+        side._keys = self._keys.copy()
+        side.sizes = self.sizes.copy()
+        side._raw = self._raw.copy()
+        return side
+
+    def raw(self, n=None):
+        """
+        Return up to n levels as received from the exchange, best first.
+        """
+        raw = self._raw
+        return [raw[price] for price in self.prices(n)]
+
+
+class OrderBook:
+    """
+    Local order book maintained from Bybit's snapshot/delta orderbook stream.
+
+    Prices and sizes are stored as floats, bids sorted descending and asks
+    ascending. Use `to_dict()` for the legacy `{"s", "b", "a", "u", "seq"}`
+    representation with string [price, size] pairs.
+    """
+
+    def __init__(self, symbol=None):
+        self.symbol = symbol
+        self.bids = _BookSide(descending=True)
+        self.asks = _BookSide(descending=False)
+        self.update_id = None
+        self.seq = None
+        # Incremented on every applied message; see OrderBookView.
+        self.version = 0
+
+    def _sides(self, data):
+        return (self.bids, data.get("b", [])), (self.asks, data.get("a", []))
+
+    def apply_snapshot(self, data):
+        """
+        Replace the book with the levels from a snapshot message's `data`.
+        """
+        self.symbol = data.get("s", self.symbol)
+        self.bids.clear()
+        self.asks.clear()
+        for side, entries in self._sides(data):
+            for entry in entries:
+                side.update(entry)
+        self.update_id = data.get("u")
+        self.seq = data.get("seq")
+        self.version += 1
+
+    def apply_delta(self, data):
+        """
+        Apply the inserts, updates and deletes from a delta message's `data`.
+        """
+        for side, entries in self._sides(data):
+            for entry in entries:
+                side.update(entry)
+        self.update_id = data.get("u", self.update_id)
+        self.seq = data.get("seq", self.seq)
+        self.version += 1
+
+    def apply(self, message):
+        """
+        Apply a raw orderbook stream message of type snapshot or delta.
+        """
+        if "snapshot" in message["type"]:
+            self.apply_snapshot(message["data"])
+        else:
+            self.apply_delta(message["data"])
+
+    def best_bid(self):
+        """
+        Returns:
+            The (price, size) of the best bid, or None if there are no bids.
+        """
+        return self.bids.best()
+
+    def best_ask(self):
+        """
+        Returns:
+            The (price, size) of the best ask, or None if there are no asks.
+        """
+        return self.asks.best()
+
+    def mid_price(self):
+        bid, ask = self.bids.best(), self.asks.best()
+        if bid is None or ask is None:
+            return None
+        return (bid[0] + ask[0]) / 2
+
+    def spread(self):
+        bid, ask = self.bids.best(), self.asks.best()
+        if bid is None or ask is None:
+            return None
+        return ask[0] - bid[0]
+
+    def top_bids(self, n):
+        return self.bids.top(n)
+
+    def top_asks(self, n):
+        return self.asks.top(n)
+
+    def bid_depth(self, n=None):
+        """
+        Returns:
+            Up to n (price, cumulative size) tuples, from the best bid down.
+        """
+        return self.bids.cumulative(n)
+
+    def ask_depth(self, n=None):
+        """
+        Returns:
+            Up to n (price, cumulative size) tuples, from the best ask up.
+        """
+        return self.asks.cumulative(n)
+
+    def to_dict(self):
+        """
+        Returns:
+            The book in the format of Bybit's orderbook snapshot `data`, with
+            levels sorted best first.
+        """
+        return {
+            "s": self.symbol,
+            "b": self.bids.raw(),
+            "a": self.asks.raw(),
+            "u": self.update_id,
+            "seq": self.seq,
+        }
+
+    def copy(self):
+        """
+        Returns:
+            A copy of the book that is not updated by the stream.
+        """
+        book = OrderBook(self.symbol)
+        book.bids = self.bids.copy()
+        book.asks = self.asks.copy()
+        book.update_id = self.update_id
+        book.seq = self.seq
+        book.version = self.version
+        return book
+
+
+class OrderBookView:
+    """
+    Read-only handle to an OrderBook, stamped with the book's version.
+
+    No levels are copied when a view is created. Reading from a view after
+    the book has applied another message raises StaleOrderBookError, so a
+    view is either consistent with the message it was delivered with or
+    unusable. Call `copy()` inside the callback to keep a snapshot.
+    """
+
+    __slots__ = ("_book", "version", "symbol", "update_id", "seq")
+
+    def __init__(self, book):
+        self._book = book
+        self.version = book.version
+        self.symbol = book.symbol
+        self.update_id = book.update_id
+        self.seq = book.seq
+
+    @property
+    def is_stale(self):
+        return self._book.version != self.version
+
+    def _get_book(self):
+        if self._book.version != self.version:
+            raise StaleOrderBookError(
+                f"OrderBook {self.symbol} moved from version {self.version} "
+                f"to {self._book.version}. Copy the view inside the callback "
+                f"to keep it."
+            )
+        return self._book
+
+    def best_bid(self):
+        return self._get_book().best_bid()
+
+    def best_ask(self):
+        return self._get_book().best_ask()
+
+    def mid_price(self):
+        return self._get_book().mid_price()
+
+    def spread(self):
+        return self._get_book().spread()
+
+    def top_bids(self, n):
+        return self._get_book().top_bids(n)
+
+    def top_asks(self, n):
+        return self._get_book().top_asks(n)
+
+    def bid_depth(self, n=None):
+        return self._get_book().bid_depth(n)
+
+    def ask_depth(self, n=None):
+        return self._get_book().ask_depth(n)
+
+    def to_dict(self):
+        return self._get_book().to_dict()
+
+    def copy(self):
+        """
+        Returns:
+            A detached OrderBook holding the levels of this version.
+        """
+        return self._get_book().copy()
@@ -0,0 +1,154 @@
+import threading
+import time
+
+
+IP_LIMIT_GROUP = "ip"
+# Bybit allows 600 requests per 5 seconds per IP across all endpoints.
+IP_LIMIT_RATE = 120
+IP_LIMIT_CAPACITY = 600
+# Used for an endpoint until its X-Bapi-Limit header has been seen. This is
+# the lowest per-second limit of the private trade and position endpoints.
+DEFAULT_ENDPOINT_RATE = 10
+
+
+class _TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        # As last reported by the exchange.
+        self.limit = None
+        self.remaining = None
+        self.reset_timestamp = None
+        self.throttled = 0
+        self.waited = 0.0
+
+    def _refill(self, now):
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+
+    def reserve(self, now):
+        """
+        Take a token, going into debt if there are none left.
+
+        Returns:
+            The seconds to wait before the reserved request may be sent.
+        """
+        self._refill(now)
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        wait = -self.tokens / self.rate
+        self.throttled += 1
+        self.waited += wait
+        return wait
+
+    def calibrate(self, limit, remaining, reset_timestamp, now):
+        self.limit = limit
+        self.remaining = remaining
+        self.reset_timestamp = reset_timestamp
+        # Limits on Bybit's endpoints are per second.
+        self.rate = self.capacity = float(limit)
+        self._refill(now)
+        self.tokens = min(self.tokens, float(remaining))
+        if remaining <= 0 and reset_timestamp:
+            # Nothing left until the window resets: owe that many seconds of
+            # tokens, so the next reservation waits for the reset.
+            reset_in = max(reset_timestamp / 10**3 - time.time(), 0)
+            self.tokens = min(self.tokens, -reset_in * self.rate)
+
+
+class RateLimiter:
+    """
+    Client-side token buckets that keep requests under Bybit's rate limits.
+
+    Every request takes a token from the IP-wide bucket, and private requests
+    also take one from the bucket of their endpoint. Endpoint buckets are
+    calibrated from the X-Bapi-Limit, X-Bapi-Limit-Status and
+    X-Bapi-Limit-Reset-Timestamp response headers.
+
+    One instance may be shared by several HTTP/AsyncHTTP sessions and
+    threads, which is what keeps a multi-symbol deployment using one API key
+    under the account's limits.
+
+    Args:
+        groups (dict): Map endpoint paths to a shared bucket name, for
+            endpoints that count against the same limit.
+        default_rate (int): Requests per second for an endpoint until its
+            limit has been read from a response.
+    """
+
+    def __init__(self, groups=None, default_rate=DEFAULT_ENDPOINT_RATE):
+        self.groups = groups or {}
+        self.default_rate = default_rate
+        self._buckets = {
+            IP_LIMIT_GROUP: _TokenBucket(IP_LIMIT_RATE, IP_LIMIT_CAPACITY)
+        }
+        self._lock = threading.Lock()
+
+    def _get_bucket(self, group):
+        bucket = self._buckets.get(group)
+        if bucket is None:
+            bucket = _TokenBucket(self.default_rate, self.default_rate)
+            self._buckets[group] = bucket
+        return bucket
+
+    def acquire(self, path, private=True):
+        """
+        Reserve a request to `path`. Reservations are served in order, so
+        concurrent callers are spread out instead of bursting.
+
+        Returns:
+            The seconds the caller must wait before sending the request.
+        """
+        now = time.monotonic()
+        with self._lock:
+            wait = self._buckets[IP_LIMIT_GROUP].reserve(now)
+            if private:
+                group = self.groups.get(path, path)
+                wait = max(wait, self._get_bucket(group).reserve(now))
+        return wait
+
+    def update(self, path, headers):
+        """
+        Calibrate the bucket of `path` from the rate limit response headers.
+        """
+        limit = headers.get("X-Bapi-Limit")
+        remaining = headers.get("X-Bapi-Limit-Status")
+        if limit is None or remaining is None:
+            return
+        reset_timestamp = headers.get("X-Bapi-Limit-Reset-Timestamp")
+        group = self.groups.get(path, path)
+        with self._lock:
+            self._get_bucket(group).calibrate(
+                int(limit),
+                int(remaining),
+                int(reset_timestamp) if reset_timestamp else None,
+                time.monotonic(),
+            )
+
+    def status(self):
+        """
+        Returns:
+            A dict of bucket name to its current headroom: the configured
+            `limit` per second, `available` tokens, the exchange-reported
+            `remaining` and `reset_timestamp`, and how many requests were
+            `throttled` for how many seconds (`waited`) in total.
+        """
+        now = time.monotonic()
+        status = {}
+        with self._lock:
+            for group, bucket in self._buckets.items():
+                bucket._refill(now)
+                status[group] = {
+                    "limit": bucket.rate,
+                    "available": bucket.tokens,
+                    "remaining": bucket.remaining,
+                    "reset_timestamp": bucket.reset_timestamp,
+                    "throttled": bucket.throttled,
+                    "waited": bucket.waited,
+                }
+        return status
@@ -7,6 +7,7 @@ import logging
 import copy
 from uuid import uuid4
 from . import _helpers
+from ._orderbook import OrderBook, OrderBookView
 
 
 logger = logging.getLogger(__name__)
@@ -174,6 +175,7 @@ class _WebSocketManager:
             while self.wst.is_alive():
                 if self.ws.sock and self.is_connected():
                     break
+                time.sleep(0.01)
 
             # If connection was not successful, raise error.
             if not infinitely_reconnect and retries <= 0:
@@ -291,75 +293,47 @@ class _WebSocketManager:
 
         self.ws.close()
         while self.ws.sock:
-            continue
+            time.sleep(0.01)
         self.exited = True
 
 
-class _V5WebSocketManager(_WebSocketManager):
-    def __init__(self, ws_name, **kwargs):
-        callback_function = (
-            kwargs.pop("callback_function")
-            if kwargs.get("callback_function")
-            else self._handle_incoming_message
-        )
-        super().__init__(callback_function, ws_name, **kwargs)
+class _V5MessageHandler:
+    """
+    Subscription and message handling for V5 streams that does not depend on
+    the transport. Shared by the threaded and asyncio WebSocket managers.
+    """
 
-        self.subscriptions = {}
+    standard_private_topics = [
+        "position",
+        "execution",
+        "order",
+        "wallet",
+        "greeks",
+        "spread.order",
+        "spread.execution",
+    ]
 
-        self.standard_private_topics = [
-            "position",
-            "execution",
-            "order",
-            "wallet",
-            "greeks",
-            "spread.order",
-            "spread.execution",
-        ]
+    other_private_topics = [
+        "execution.fast"
+    ]
 
-        self.other_private_topics = [
-            "execution.fast"
-        ]
-
-    def subscribe(
-            self,
-            topic: str,
-            callback,
-            symbol: (str, list) = False
-    ):
-
-        def prepare_subscription_args(list_of_symbols):
-            """
-            Prepares the topic for subscription by formatting it with the
-            desired symbols.
-            """
-
-            if topic in self.standard_private_topics:
-                # private topics do not support filters
-                return [topic]
+    def _prepare_subscription_args(self, topic, symbol):
+        """
+        Prepares the topic for subscription by formatting it with the
+        desired symbols.
+        """
 
-            topics = []
-            for single_symbol in list_of_symbols:
-                topics.append(topic.format(symbol=single_symbol))
-            return topics
+        if topic in self.standard_private_topics:
+            # private topics do not support filters
+            return [topic]
 
         if type(symbol) == str:
             symbol = [symbol]
 
-        subscription_args = prepare_subscription_args(symbol)
-        self._check_callback_directory(subscription_args)
-
-        req_id = str(uuid4())
-
-        subscription_message = json.dumps(
-            {"op": "subscribe", "req_id": req_id, "args": subscription_args}
-        )
-        while not self.is_connected():
-            # Wait until the connection is open before subscribing.
-            time.sleep(0.1)
-        self.ws.send(subscription_message)
-        self.subscriptions[req_id] = subscription_message
-        for topic in subscription_args:
-            self._set_callback(topic, callback)
+        topics = []
+        for single_symbol in symbol:
+            topics.append(topic.format(symbol=single_symbol))
+        return topics
 
     def _initialise_local_data(self, topic):
         # Create self.data
@@ -369,48 +343,11 @@ class _V5WebSocketManager(_WebSocketManager):
             self.data[topic] = []
 
     def _process_delta_orderbook(self, message, topic):
-        self._initialise_local_data(topic)
-
-        # Record the initial snapshot.
-        if "snapshot" in message["type"]:
-            self.data[topic] = message["data"]
-            return
-
-        # Make updates according to delta response.
-        book_sides = {"b": message["data"]["b"], "a": message["data"]["a"]}
-        self.data[topic]["u"]=message["data"]["u"]
-        self.data[topic]["seq"]=message["data"]["seq"]
-
-        for side, entries in book_sides.items():
-            for entry in entries:
-                # Delete.
-                if float(entry[1]) == 0:
-                    index = _helpers.find_index(
-                        self.data[topic][side], entry, 0
-                    )
-                    self.data[topic][side].pop(index)
-                    continue
-
-                # Insert.
-                price_level_exists = entry[0] in [
-                    level[0] for level in self.data[topic][side]
-                ]
-                if not price_level_exists:
-                    self.data[topic][side].append(entry)
-                    continue
-
-                # Update.
-                qty_changed = entry[1] != next(
-                    level[1]
-                    for level in self.data[topic][side]
-                    if level[0] == entry[0]
-                )
-                if price_level_exists and qty_changed:
-                    index = _helpers.find_index(
-                        self.data[topic][side], entry, 0
-                    )
-                    self.data[topic][side][index] = entry
-                    continue
+        # A new snapshot resets the book, so a fresh OrderBook is only needed
+        # on the first message for a topic.
+        if not isinstance(self.data.get(topic), OrderBook):
+            self.data[topic] = OrderBook()
+        self.data[topic].apply(message)
 
     def _process_delta_ticker(self, message, topic):
         self._initialise_local_data(topic)
@@ -457,14 +394,26 @@ class _V5WebSocketManager(_WebSocketManager):
         topic = message["topic"]
         if "orderbook" in topic:
             self._process_delta_orderbook(message, topic)
-            callback_data = copy.deepcopy(message)
+            # The parsed message is not kept anywhere, so a shallow copy is
+            # enough to relabel it without touching the local data.
+            callback_data = dict(message)
             callback_data["type"] = "snapshot"
-            callback_data["data"] = self.data[topic]
+            book = self.data[topic]
+            if self.legacy_orderbook:
+                # Already a fresh dict and fresh level lists per message.
+                callback_data["data"] = book.to_dict()
+            elif self.copy_callback_data:
+                callback_data["data"] = book.copy()
+            else:
+                callback_data["data"] = OrderBookView(book)
         elif "tickers" in topic:
             self._process_delta_ticker(message, topic)
-            callback_data = copy.deepcopy(message)
+            callback_data = dict(message)
             callback_data["type"] = "snapshot"
-            callback_data["data"] = self.data[topic]
+            if self.copy_callback_data:
+                callback_data["data"] = copy.deepcopy(self.data[topic])
+            else:
+                callback_data["data"] = self.data[topic]
         else:
             callback_data = message
         callback_function = self._get_callback(topic)
@@ -511,3 +460,44 @@ class _V5WebSocketManager(_WebSocketManager):
 
     def _pop_callback(self, topic):
         self.callback_directory.pop(topic)
+
+
+class _V5WebSocketManager(_V5MessageHandler, _WebSocketManager):
+    def __init__(self, ws_name, **kwargs):
+        callback_function = (
+            kwargs.pop("callback_function")
+            if kwargs.get("callback_function")
+            else self._handle_incoming_message
+        )
+        # When True, orderbook callbacks receive the book as a dict of string
+        # [price, size] lists, like Bybit's snapshot message. When False they
+        # receive a read-only OrderBookView of the local book.
+        self.legacy_orderbook = kwargs.pop("legacy_orderbook", True)
+        # When True, orderbook and ticker callbacks receive a deep copy of
+        # the local data instead of a reference to it.
+        self.copy_callback_data = kwargs.pop("copy_callback_data", False)
+        super().__init__(callback_function, ws_name, **kwargs)
+
+        self.subscriptions = {}
+
+    def subscribe(
+            self,
+            topic: str,
+            callback,
+            symbol: (str, list) = False
+    ):
+        subscription_args = self._prepare_subscription_args(topic, symbol)
+        self._check_callback_directory(subscription_args)
+
+        req_id = str(uuid4())
+
+        subscription_message = json.dumps(
+            {"op": "subscribe", "req_id": req_id, "args": subscription_args}
+        )
+        while not self.is_connected():
+            # Wait until the connection is open before subscribing.
+            time.sleep(0.1)
+        self.ws.send(subscription_message)
+        self.subscriptions[req_id] = subscription_message
+        for topic in subscription_args:
+            self._set_callback(topic, callback)
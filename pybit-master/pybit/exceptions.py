@@ -10,6 +10,10 @@ class TopicMismatchError(Exception):
     pass
 
 
+class StaleOrderBookError(Exception):
+    pass
+
+
 class FailedRequestError(Exception):
     """
     Exception raised for failed requests.
@@ -19,8 +19,11 @@ from ._v5_broker import BrokerHTTP
 from ._v5_institutional_loan import InstitutionalLoanHTTP
 from ._v5_crypto_loan import CryptoLoanHTTP
 from ._v5_earn import EarnHTTP
+from ._async_http_manager import _V5AsyncHTTPManager
 from ._websocket_stream import _V5WebSocketManager
 from ._websocket_trading import _V5TradeWebSocketManager
+from ._async_websocket_stream import _AsyncV5WebSocketManager
+from ._async_websocket_trading import _AsyncV5TradeWebSocketManager
 from ._v5_spread import (
     SpreadHTTP,
     _V5WebSocketSpreadTrading,
@@ -62,6 +65,43 @@ class HTTP(
         super().__init__(**args)
 
 
+@dataclass
+class AsyncHTTP(
+    MiscHTTP,
+    MarketHTTP,
+    TradeHTTP,
+    AccountHTTP,
+    AssetHTTP,
+    PositionHTTP,
+    PreUpgradeHTTP,
+    SpotLeverageHTTP,
+    SpotMarginTradeHTTP,
+    UserHTTP,
+    BrokerHTTP,
+    InstitutionalLoanHTTP,
+    CryptoLoanHTTP,
+    EarnHTTP,
+    _V5AsyncHTTPManager,
+):
+    """asyncio HTTP client with the methods of HTTP as coroutines. Requires
+    aiohttp.
+
+    Takes the same arguments as HTTP, plus:
+        session (aiohttp.ClientSession): Share one connection pool
+        max_connections (int): Connection pool size
+        keepalive_timeout (int): Seconds to keep idle connections open
+
+        async with AsyncHTTP(api_key=..., api_secret=...) as session:
+            kline, positions = await asyncio.gather(
+                session.get_kline(category="linear", symbol="BTCUSDT", interval=1),
+                session.get_positions(category="linear", symbol="BTCUSDT"),
+            )
+    """
+
+    def __init__(self, **args):
+        super().__init__(**args)
+
+
 class WebSocket(_V5WebSocketManager):
     def _validate_public_topic(self):
         if "/v5/public" not in self.WS_URL:
@@ -236,6 +276,18 @@ class WebSocket(_V5WebSocketManager):
         topic = f"orderbook.{depth}." + "{symbol}"
         self.subscribe(topic, callback, symbol)
 
+    def get_orderbook(self, depth: int, symbol: str):
+        """Get the local orderbook maintained from orderbook_stream().
+
+        Required args:
+            symbol (string): Symbol name
+            depth (int): Orderbook depth
+
+        Returns:
+            The OrderBook, or None if no message has been received yet.
+        """
+        return self.data.get(f"orderbook.{depth}.{symbol}")
+
     def trade_stream(self, symbol: (str, list), callback):
         """
         Subscribe to the recent trades stream.
@@ -395,6 +447,168 @@ class WebSocketTrading(_V5TradeWebSocketManager):
         self._send_order_operation(operation, callback, kwargs)
 
 
+class AsyncWebSocket(_AsyncV5WebSocketManager):
+    """asyncio client for the V5 public and private streams. Requires aiohttp.
+
+    Takes the same arguments as WebSocket, plus:
+        session (aiohttp.ClientSession): Share one session between clients
+        queue_size (int): Messages buffered per subscription iterator
+
+    The connection is opened by `await connect()`, `async with`, or the
+    first subscription. Each topic method returns an async iterator of
+    messages, unless a callback (function or coroutine function) is passed.
+
+        async with AsyncWebSocket(channel_type="linear") as ws:
+            stream = await ws.kline_stream(1, "BTCUSDT")
+            async for message in stream:
+                ...
+    """
+
+    _validate_public_topic = WebSocket._validate_public_topic
+    _validate_private_topic = WebSocket._validate_private_topic
+
+    def __init__(
+        self,
+        channel_type: str,
+        **kwargs,
+    ):
+        super().__init__(WSS_NAME, **kwargs)
+        if channel_type not in AVAILABLE_CHANNEL_TYPES:
+            raise InvalidChannelTypeError(
+                f"Channel type is not correct. Available: {AVAILABLE_CHANNEL_TYPES}"
+            )
+
+        if channel_type == "private":
+            self.WS_URL = PRIVATE_WSS
+        else:
+            self.WS_URL = PUBLIC_WSS.replace("{CHANNEL_TYPE}", channel_type)
+            # Do not pass keys and attempt authentication on a public connection
+            self.api_key = None
+            self.api_secret = None
+
+        if (
+            self.api_key is None or self.api_secret is None
+        ) and channel_type == "private":
+            raise UnauthorizedExceptionError(
+                "API_KEY or API_SECRET is not set. They both are needed in order to access private topics"
+            )
+
+    # Private topics. See the WebSocket methods of the same name.
+
+    async def position_stream(self, callback=None):
+        self._validate_private_topic()
+        return await self.subscribe("position", callback)
+
+    async def order_stream(self, callback=None):
+        self._validate_private_topic()
+        return await self.subscribe("order", callback)
+
+    async def execution_stream(self, callback=None):
+        self._validate_private_topic()
+        return await self.subscribe("execution", callback)
+
+    async def fast_execution_stream(self, callback=None, categorised_topic=""):
+        self._validate_private_topic()
+        topic = "execution.fast"
+        if categorised_topic:
+            topic += "." + categorised_topic
+        return await self.subscribe(topic, callback)
+
+    async def wallet_stream(self, callback=None):
+        self._validate_private_topic()
+        return await self.subscribe("wallet", callback)
+
+    async def greek_stream(self, callback=None):
+        self._validate_private_topic()
+        return await self.subscribe("greeks", callback)
+
+    async def spread_order_stream(self, callback=None):
+        self._validate_private_topic()
+        return await self.subscribe("spread.order", callback)
+
+    async def spread_execution_stream(self, callback=None):
+        self._validate_private_topic()
+        return await self.subscribe("spread.execution", callback)
+
+    # Public topics. See the WebSocket methods of the same name.
+
+    async def orderbook_stream(self, depth: int, symbol: (str, list), callback=None):
+        self._validate_public_topic()
+        topic = f"orderbook.{depth}." + "{symbol}"
+        return await self.subscribe(topic, callback, symbol)
+
+    get_orderbook = WebSocket.get_orderbook
+
+    async def trade_stream(self, symbol: (str, list), callback=None):
+        self._validate_public_topic()
+        topic = f"publicTrade." + "{symbol}"
+        return await self.subscribe(topic, callback, symbol)
+
+    async def ticker_stream(self, symbol: (str, list), callback=None):
+        self._validate_public_topic()
+        topic = "tickers.{symbol}"
+        return await self.subscribe(topic, callback, symbol)
+
+    async def kline_stream(self, interval: int, symbol: (str, list), callback=None):
+        self._validate_public_topic()
+        topic = f"kline.{interval}." + "{symbol}"
+        return await self.subscribe(topic, callback, symbol)
+
+    async def all_liquidation_stream(self, symbol: (str, list), callback=None):
+        self._validate_public_topic()
+        topic = "allLiquidation.{symbol}"
+        return await self.subscribe(topic, callback, symbol)
+
+    async def lt_kline_stream(self, interval: int, symbol: (str, list), callback=None):
+        self._validate_public_topic()
+        topic = f"kline_lt.{interval}." + "{symbol}"
+        return await self.subscribe(topic, callback, symbol)
+
+    async def lt_ticker_stream(self, symbol: (str, list), callback=None):
+        self._validate_public_topic()
+        topic = "tickers_lt.{symbol}"
+        return await self.subscribe(topic, callback, symbol)
+
+    async def lt_nav_stream(self, symbol: (str, list), callback=None):
+        self._validate_public_topic()
+        topic = "lt.{symbol}"
+        return await self.subscribe(topic, callback, symbol)
+
+
+class AsyncWebSocketTrading(_AsyncV5TradeWebSocketManager):
+    """asyncio client for WebSocket order entry. Requires aiohttp.
+
+    Each method sends the operation and returns the response message.
+    """
+
+    def __init__(self, recv_window=0, referral_id="", **kwargs):
+        super().__init__(recv_window, referral_id, **kwargs)
+
+    async def place_order(self, callback=None, **kwargs):
+        operation = "order.create"
+        return await self._send_order_operation(operation, callback, kwargs)
+
+    async def amend_order(self, callback=None, **kwargs):
+        operation = "order.amend"
+        return await self._send_order_operation(operation, callback, kwargs)
+
+    async def cancel_order(self, callback=None, **kwargs):
+        operation = "order.cancel"
+        return await self._send_order_operation(operation, callback, kwargs)
+
+    async def place_batch_order(self, callback=None, **kwargs):
+        operation = "order.create-batch"
+        return await self._send_order_operation(operation, callback, kwargs)
+
+    async def amend_batch_order(self, callback=None, **kwargs):
+        operation = "order.amend-batch"
+        return await self._send_order_operation(operation, callback, kwargs)
+
+    async def cancel_batch_order(self, callback=None, **kwargs):
+        operation = "order.cancel-batch"
+        return await self._send_order_operation(operation, callback, kwargs)
+
+
 class WebsocketSpreadTrading(_V5WebSocketSpreadTrading):
     def __init__(self,  **kwargs):
         super().__init__(**kwargs)
@@ -32,4 +32,7 @@ setup(
         "websocket-client",
         "pycryptodome",
     ],
+    extras_require={
+        "async": ["aiohttp"],
+    },
 )
@@ -0,0 +1,111 @@
+import asyncio
+import unittest
+
+try:
+    from aiohttp import web
+except ImportError:
+    web = None
+
+from pybit._http_manager import generate_signature
+from pybit.exceptions import InvalidRequestError
+from pybit.unified_trading import AsyncHTTP
+
+
+@unittest.skipIf(web is None, "aiohttp is not installed")
+class AsyncHTTPTest(unittest.IsolatedAsyncioTestCase):
+    # A local server standing in for Bybit, so no network access is needed.
+    async def asyncSetUp(self):
+        self.requests = []
+        self.responses = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        app = web.Application()
+        app.router.add_route("*", "/{path:.*}", self._handler)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.endpoint = f"http://127.0.0.1:{port}"
+
+    async def asyncTearDown(self):
+        await self.runner.cleanup()
+
+    async def _handler(self, request):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        body = await request.text()
+        self.requests.append((request.method, request.path_qs, request.headers, body))
+        await asyncio.sleep(0.05)
+        self.in_flight -= 1
+        response = self.responses.pop(0) if self.responses else {}
+        return web.json_response(
+            {"retCode": 0, "retMsg": "OK", "result": {}, **response},
+            headers={"X-Bapi-Limit": "10", "X-Bapi-Limit-Status": "9"},
+        )
+
+    def _session(self, **kwargs):
+        session = AsyncHTTP(
+            api_key="key", api_secret="secret", retry_delay=0, **kwargs
+        )
+        session.endpoint = self.endpoint
+        return session
+
+    async def test_calls_run_concurrently(self):
+        async with self._session() as session:
+            results = await asyncio.gather(
+                session.get_kline(category="linear", symbol="BTCUSDT", interval=1),
+                session.get_instruments_info(category="linear"),
+                session.get_positions(category="linear", symbol="BTCUSDT"),
+                session.get_wallet_balance(accountType="UNIFIED"),
+            )
+        self.assertEqual([r["retMsg"] for r in results], ["OK"] * 4)
+        self.assertEqual(self.max_in_flight, 4)
+
+    async def test_signature_matches_blocking_client(self):
+        async with self._session() as session:
+            await session.place_order(
+                category="linear", symbol="BTCUSDT", side="Buy", qty=0.001
+            )
+        method, path, headers, body = self.requests[0]
+        self.assertEqual((method, path), ("POST", "/v5/order/create"))
+        param_str = (
+            headers["X-BAPI-TIMESTAMP"] + "key"
+            + headers["X-BAPI-RECV-WINDOW"] + body
+        )
+        self.assertEqual(
+            headers["X-BAPI-SIGN"], generate_signature(False, "secret", param_str)
+        )
+        self.assertIn('"qty": "0.001"', body)
+
+    async def test_retry_code_extends_recv_window(self):
+        self.responses = [{"retCode": 10002, "retMsg": "recv_window"}]
+        async with self._session() as session:
+            response = await session.get_positions(category="linear")
+        self.assertEqual(response["retCode"], 0)
+        windows = [r[2]["X-BAPI-RECV-WINDOW"] for r in self.requests]
+        self.assertEqual(windows, ["5000", "7500"])
+
+    async def test_error_code_raises(self):
+        self.responses = [{"retCode": 110007, "retMsg": "not enough balance"}]
+        async with self._session() as session:
+            with self.assertRaises(InvalidRequestError) as error:
+                await session.get_positions(category="linear")
+        self.assertEqual(error.exception.status_code, 110007)
+
+    async def test_rate_limiter_calibrated_from_headers(self):
+        async with self._session(rate_limiter=True) as session:
+            await session.get_positions(category="linear")
+            status = session.rate_limit_status()
+        self.assertEqual(status["/v5/position/list"]["remaining"], 9)
+        self.assertEqual(status["/v5/position/list"]["limit"], 10)
+
+    async def test_private_endpoint_requires_keys(self):
+        session = AsyncHTTP()
+        with self.assertRaises(PermissionError):
+            await session.get_positions(category="linear")
+        await session.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
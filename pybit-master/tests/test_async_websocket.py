@@ -0,0 +1,98 @@
+import asyncio
+import json
+import unittest
+
+try:
+    from aiohttp import web
+except ImportError:
+    web = None
+
+from pybit.unified_trading import AsyncWebSocket, AsyncWebSocketTrading
+
+
+@unittest.skipIf(web is None, "aiohttp is not installed")
+class AsyncWebSocketTest(unittest.IsolatedAsyncioTestCase):
+    # A local server standing in for Bybit, so no network access is needed.
+    async def asyncSetUp(self):
+        self.received = []
+        self.connections = 0
+        app = web.Application()
+        app.router.add_get("/v5/public/linear", self._handler)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"ws://127.0.0.1:{port}/v5/public/linear"
+
+    async def asyncTearDown(self):
+        await self.runner.cleanup()
+
+    async def _handler(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections += 1
+        async for msg in ws:
+            message = json.loads(msg.data)
+            self.received.append(message)
+            if message.get("op") == "subscribe":
+                await ws.send_json(
+                    {"op": "subscribe", "success": True, "req_id": message["req_id"]}
+                )
+                for topic in message["args"]:
+                    await ws.send_json(
+                        {"topic": topic, "type": "snapshot", "data": [{"confirm": False}]}
+                    )
+                if self.connections == 1 and message["args"][0].endswith("ETHUSDT"):
+                    await ws.close()
+            elif message.get("op") == "order.create":
+                await ws.send_json(
+                    {"reqId": message["reqId"], "retCode": 0, "op": "order.create"}
+                )
+        return ws
+
+    def _client(self):
+        ws = AsyncWebSocket(channel_type="linear", testnet=False)
+        ws.WS_URL = self.url
+        return ws
+
+    async def test_kline_stream_iterator(self):
+        async with self._client() as ws:
+            stream = await ws.kline_stream(1, ["BTCUSDT", "SOLUSDT"])
+            topics = {(await stream.get())["topic"] for _ in range(2)}
+        self.assertEqual(topics, {"kline.1.BTCUSDT", "kline.1.SOLUSDT"})
+
+    async def test_callback(self):
+        messages = []
+        done = asyncio.Event()
+
+        async def callback(message):
+            messages.append(message)
+            done.set()
+
+        async with self._client() as ws:
+            self.assertIsNone(await ws.trade_stream("BTCUSDT", callback))
+            await asyncio.wait_for(done.wait(), 1)
+        self.assertEqual(messages[0]["topic"], "publicTrade.BTCUSDT")
+
+    async def test_resubscribes_after_disconnect(self):
+        ws = self._client()
+        ws.retries = 1
+        stream = await ws.kline_stream(1, "ETHUSDT")
+        first = await asyncio.wait_for(stream.get(), 1)
+        second = await asyncio.wait_for(stream.get(), 5)
+        await ws.exit()
+        self.assertEqual(first["topic"], second["topic"])
+        self.assertEqual(self.connections, 2)
+
+    async def test_trading_response(self):
+        ws = AsyncWebSocketTrading(testnet=False)
+        ws.WS_URL = self.url
+        response = await ws.place_order(category="linear", symbol="BTCUSDT")
+        await ws.exit()
+        self.assertEqual(response["retCode"], 0)
+        self.assertEqual(self.received[-1]["args"][0]["symbol"], "BTCUSDT")
+
+
+if __name__ == "__main__":
+    unittest.main()
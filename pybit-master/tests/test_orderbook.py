@@ -0,0 +1,143 @@
+import unittest
+
+from pybit._orderbook import OrderBook
+from pybit.exceptions import StaleOrderBookError
+from pybit._websocket_stream import _V5WebSocketManager
+
+
+def _snapshot():
+    return {
+        "topic": "orderbook.50.BTCUSDT",
+        "type": "snapshot",
+        "ts": 1,
+        "data": {
+            "s": "BTCUSDT",
+            "b": [["100.0", "1"], ["101.5", "2"], ["99", "3"]],
+            "a": [["103", "1"], ["102", "4"], ["104.25", "2"]],
+            "u": 1,
+            "seq": 10,
+        },
+    }
+
+
+def _delta(bids, asks, u=2, seq=11):
+    return {
+        "topic": "orderbook.50.BTCUSDT",
+        "type": "delta",
+        "ts": 2,
+        "data": {"s": "BTCUSDT", "b": bids, "a": asks, "u": u, "seq": seq},
+    }
+
+
+class OrderBookTest(unittest.TestCase):
+    def setUp(self):
+        self.book = OrderBook()
+        self.book.apply(_snapshot())
+
+    def test_snapshot_is_sorted(self):
+        self.assertEqual(self.book.symbol, "BTCUSDT")
+        self.assertEqual(self.book.top_bids(3), [(101.5, 2), (100, 1), (99, 3)])
+        self.assertEqual(self.book.top_asks(2), [(102, 4), (103, 1)])
+        self.assertEqual(self.book.best_bid(), (101.5, 2))
+        self.assertEqual(self.book.best_ask(), (102, 4))
+        self.assertEqual(self.book.spread(), 0.5)
+
+    def test_delta_insert_update_delete(self):
+        self.book.apply(
+            _delta(
+                bids=[["101.5", "0"], ["100.0", "5"], ["100.5", "1"]],
+                asks=[["101.9", "2"], ["104.25", "0"]],
+            )
+        )
+        self.assertEqual(self.book.top_bids(5), [(100.5, 1), (100, 5), (99, 3)])
+        self.assertEqual(self.book.top_asks(5), [(101.9, 2), (102, 4), (103, 1)])
+        self.assertEqual((self.book.update_id, self.book.seq), (2, 11))
+
+    def test_delete_unknown_level_is_ignored(self):
+        self.book.apply(_delta(bids=[["50", "0"]], asks=[]))
+        self.assertEqual(len(self.book.bids), 3)
+
+    def test_new_snapshot_resets_book(self):
+        self.book.apply(
+            {
+                "type": "snapshot",
+                "data": {"s": "BTCUSDT", "b": [["90", "1"]], "a": [], "u": 5, "seq": 20},
+            }
+        )
+        self.assertEqual(self.book.top_bids(5), [(90, 1)])
+        self.assertIsNone(self.book.best_ask())
+
+    def test_cumulative_depth(self):
+        self.assertEqual(self.book.bid_depth(2), [(101.5, 2), (100, 3)])
+        self.assertEqual(
+            self.book.ask_depth(), [(102, 4), (103, 5), (104.25, 7)]
+        )
+
+    def test_legacy_dict_keeps_raw_strings(self):
+        self.assertEqual(
+            self.book.to_dict(),
+            {
+                "s": "BTCUSDT",
+                "b": [["101.5", "2"], ["100.0", "1"], ["99", "3"]],
+                "a": [["102", "4"], ["103", "1"], ["104.25", "2"]],
+                "u": 1,
+                "seq": 10,
+            },
+        )
+
+
+class OrderBookCallbackTest(unittest.TestCase):
+    # Exercise message processing without opening a connection.
+    def _manager(self, **kwargs):
+        manager = _V5WebSocketManager("test", testnet=False, **kwargs)
+        self.received = []
+        manager._set_callback("orderbook.50.BTCUSDT", self.received.append)
+        return manager
+
+    def test_legacy_callback_contract(self):
+        manager = self._manager()
+        manager._handle_incoming_message(_snapshot())
+        manager._handle_incoming_message(_delta([["102", "1"]], []))
+        message = self.received[-1]
+        self.assertEqual(message["type"], "snapshot")
+        self.assertEqual(message["data"]["b"][0], ["102", "1"])
+        self.assertEqual(message["data"]["u"], 2)
+
+    def test_orderbook_view_callback(self):
+        manager = self._manager(legacy_orderbook=False)
+        manager._handle_incoming_message(_snapshot())
+        view = self.received[-1]["data"]
+        self.assertEqual(view.best_bid(), (101.5, 2))
+        snapshot = view.copy()
+
+        manager._handle_incoming_message(_delta([["102", "1"]], []))
+        self.assertTrue(view.is_stale)
+        with self.assertRaises(StaleOrderBookError):
+            view.best_bid()
+        self.assertEqual(snapshot.best_bid(), (101.5, 2))
+        self.assertEqual(self.received[-1]["data"].best_bid(), (102, 1))
+
+    def test_copy_callback_data(self):
+        manager = self._manager(legacy_orderbook=False, copy_callback_data=True)
+        manager._handle_incoming_message(_snapshot())
+        book = self.received[-1]["data"]
+        manager._handle_incoming_message(_delta([["102", "1"]], []))
+        self.assertEqual(book.best_bid(), (101.5, 2))
+        self.assertIsNot(book, manager.data["orderbook.50.BTCUSDT"])
+
+        # Deleting and resizing levels in the live book leaves the copy alone.
+        manager._handle_incoming_message(_delta([["101.5", "0"], ["102", "3"]], []))
+        self.assertEqual(book.best_bid(), (101.5, 2))
+        self.assertEqual(self.received[-1]["data"].best_bid(), (102, 3))
+
+    def test_copy_callback_data_legacy(self):
+        manager = self._manager(copy_callback_data=True)
+        manager._handle_incoming_message(_snapshot())
+        data = self.received[-1]["data"]
+        manager._handle_incoming_message(_delta([["101.5", "0"]], []))
+        self.assertEqual(data["b"][0], ["101.5", "2"])
+        self.assertNotEqual(self.received[-1]["data"]["b"][0], ["101.5", "2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
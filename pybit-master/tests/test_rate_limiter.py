@@ -0,0 +1,88 @@
+import unittest
+from unittest import mock
+
+from pybit._rate_limiter import RateLimiter
+from pybit.unified_trading import HTTP
+
+
+class RateLimiterTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch("pybit._rate_limiter.time")
+        self.time = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.time.monotonic.return_value = 100.0
+        self.time.time.return_value = 1_700_000_000.0
+        self.limiter = RateLimiter(default_rate=5)
+
+    def test_burst_then_spaced(self):
+        waits = [self.limiter.acquire("/v5/order/create") for _ in range(7)]
+        self.assertEqual(waits[:5], [0.0] * 5)
+        self.assertAlmostEqual(waits[5], 0.2)
+        self.assertAlmostEqual(waits[6], 0.4)
+
+        self.time.monotonic.return_value = 101.0
+        self.assertEqual(self.limiter.acquire("/v5/order/create"), 0.0)
+
+    def test_endpoints_have_separate_buckets(self):
+        for _ in range(5):
+            self.limiter.acquire("/v5/order/create")
+        self.assertEqual(self.limiter.acquire("/v5/position/list"), 0.0)
+        self.assertGreater(self.limiter.acquire("/v5/order/create"), 0)
+
+    def test_groups_share_a_bucket(self):
+        limiter = RateLimiter(
+            groups={"/v5/order/create": "orders", "/v5/order/cancel": "orders"},
+            default_rate=1,
+        )
+        self.assertEqual(limiter.acquire("/v5/order/create"), 0.0)
+        self.assertGreater(limiter.acquire("/v5/order/cancel"), 0)
+
+    def test_public_requests_only_use_ip_bucket(self):
+        waits = [self.limiter.acquire("/v5/market/kline", private=False)
+                 for _ in range(600)]
+        self.assertEqual(max(waits), 0.0)
+        self.assertAlmostEqual(
+            self.limiter.acquire("/v5/market/kline", private=False), 1 / 120
+        )
+
+    def test_calibrate_from_headers(self):
+        self.limiter.update(
+            "/v5/order/create",
+            {"X-Bapi-Limit": "20", "X-Bapi-Limit-Status": "2"},
+        )
+        waits = [self.limiter.acquire("/v5/order/create") for _ in range(3)]
+        self.assertEqual(waits[:2], [0.0, 0.0])
+        self.assertAlmostEqual(waits[2], 1 / 20)
+        status = self.limiter.status()["/v5/order/create"]
+        self.assertEqual((status["limit"], status["remaining"]), (20, 2))
+        self.assertEqual(status["throttled"], 1)
+
+    def test_exhausted_waits_for_reset(self):
+        self.limiter.update(
+            "/v5/order/create",
+            {
+                "X-Bapi-Limit": "10",
+                "X-Bapi-Limit-Status": "0",
+                "X-Bapi-Limit-Reset-Timestamp": "1700000000500",
+            },
+        )
+        self.assertAlmostEqual(self.limiter.acquire("/v5/order/create"), 0.6)
+
+
+class HTTPRateLimitTest(unittest.TestCase):
+    def test_session_options(self):
+        self.assertEqual(HTTP().rate_limit_status(), {})
+        self.assertIsInstance(HTTP(rate_limiter=True).rate_limiter, RateLimiter)
+        shared = RateLimiter()
+        self.assertIs(HTTP(rate_limiter=shared).rate_limiter, shared)
+
+    def test_path_relative_to_endpoint(self):
+        session = HTTP(rate_limiter=True)
+        self.assertEqual(
+            session._rate_limit_path(session.endpoint + "/v5/order/create"),
+            "/v5/order/create",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()